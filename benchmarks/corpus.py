@@ -0,0 +1,95 @@
+import io
+import random
+from typing import Dict, List, Tuple
+
+import docx
+
+VOCABULARY = (
+    "pump filter valve pressure motor impeller seal bearing housing inlet outlet flow rate "
+    "temperature sensor controller firmware maintenance inspection warranty installation "
+    "calibration cleaning replacement schedule monthly weekly operator manual safety warning"
+).split()
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(VOCABULARY, k=rng.randint(8, 18))
+    return " ".join(words).capitalize() + "."
+
+def make_pages(pages: int, paragraphs_per_page: int = 4, seed: int = 0) -> Tuple[List[str], Dict[str, str]]:
+    """Synthetic manual pages plus facts planted in them (error code -> meaning) for QA."""
+    rng = random.Random(seed)
+    facts: Dict[str, str] = {}
+    texts = []
+    for page in range(pages):
+        paragraphs = []
+        for _ in range(paragraphs_per_page):
+            paragraphs.append(" ".join(_sentence(rng) for _ in range(rng.randint(3, 6))))
+        code = f"E{seed % 100:02d}{page:03d}"
+        facts[code] = f"the {rng.choice(VOCABULARY)} needs {rng.choice(['cleaning', 'replacement', 'calibration'])}"
+        paragraphs.append(f"Error code {code} means {facts[code]}.")
+        texts.append("\n\n".join(paragraphs))
+    return texts, facts
+
+def make_txt(pages: List[str]) -> bytes:
+    return "\n\n".join(pages).encode("utf-8")
+
+def make_docx(pages: List[str]) -> bytes:
+    document = docx.Document()
+    for number, page in enumerate(pages, start=1):
+        document.add_heading(f"Section {number}", level=1)
+        for paragraph in page.split("\n\n"):
+            document.add_paragraph(paragraph)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages: List[str], line_chars: int = 90) -> bytes:
+    """Minimal multi-page PDF with Helvetica text, one wrapped line per Tj."""
+    objects = ["<</Type /Catalog /Pages 2 0 R>>"]
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<</Type /Pages /Kids [{kids}] /Count {len(pages)}>>")
+    objects.append("<</Type /Font /Subtype /Type1 /BaseFont /Helvetica>>")
+    for text in pages:
+        lines = []
+        for paragraph in text.split("\n\n"):
+            words = paragraph.split()
+            line = ""
+            for word in words:
+                if len(line) + len(word) + 1 > line_chars:
+                    lines.append(line)
+                    line = ""
+                line = f"{line} {word}".strip()
+            lines.extend([line, ""])
+        body = " ".join(f"({_pdf_escape(line)}) Tj T*" for line in lines[:60])
+        stream = f"BT /F1 9 Tf 11 TL 40 800 Td {body} ET"
+        objects.append(
+            "<</Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources <</Font <</F1 3 0 R>>>> /Contents {len(objects) + 2} 0 R>>"
+        )
+        objects.append(f"<</Length {len(stream)}>>\nstream\n{stream}\nendstream")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<</Size {len(objects) + 1} /Root 1 0 R>>\nstartxref\n{xref}\n%%EOF".encode()
+    return out
+
+BUILDERS = {"txt": make_txt, "docx": make_docx, "pdf": make_pdf}
+
+def make_corpus(formats: List[str], documents: int, pages: int, seed: int = 0) -> Tuple[List[Tuple[str, bytes]], Dict[str, str]]:
+    """``documents`` files per format, each ``pages`` pages long, and every planted fact."""
+    files = []
+    facts: Dict[str, str] = {}
+    for fmt in formats:
+        for i in range(documents):
+            texts, doc_facts = make_pages(pages, seed=seed + len(files))
+            files.append((f"manual_{len(files):03d}.{fmt}", BUILDERS[fmt](texts)))
+            facts.update(doc_facts)
+    return files, facts
@@ -0,0 +1,75 @@
+"""Compare embedding backends for speed, memory and agreement with a reference.
+
+    python -m benchmarks.embeddings --backends onnx,ollama --reference huggingface --threads 4
+
+Every backend embeds the same chunks of the synthetic corpus. Agreement is
+the cosine similarity between each chunk's vector from a backend and from
+the reference backend. Memory is the growth of peak RSS while the backend
+is loaded and used, so run the lightest backends first.
+"""
+import argparse
+import sys
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import make_pages
+from benchmarks.run import peak_rss_mb
+from src.utils.embedding_backends import EMBEDDING_BACKENDS, create_embeddings, parity_report
+
+def chunk_texts(count: int, seed: int = 0) -> List[str]:
+    """Paragraph-sized texts from the synthetic corpus."""
+    texts: List[str] = []
+    page = 0
+    while len(texts) < count:
+        pages, _ = make_pages(1, seed=seed + page)
+        texts.extend(pages[0].split("\n\n"))
+        page += 1
+    return texts[:count]
+
+def run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    texts = chunk_texts(args.texts, seed=args.seed)
+    reference = create_embeddings(args.reference, args.model, args.batch_size, args.threads, args.base_url)
+    reference.embed_documents(texts[: args.batch_size])  # Warm up
+
+    results = {}
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        rss_before = peak_rss_mb()
+        candidate = create_embeddings(backend, args.model, args.batch_size, args.threads, args.base_url)
+        candidate.embed_documents(texts[: args.batch_size])
+        report = parity_report(candidate, reference, texts)
+        report["texts_per_s"] = len(texts) / report["candidate_seconds"] if report["candidate_seconds"] else 0.0
+        report["rss_growth_mb"] = peak_rss_mb() - rss_before
+        results[backend] = report
+    return results
+
+def format_results(results: Dict[str, Dict[str, float]], reference: str) -> str:
+    lines = [f"{'backend':<12} {'texts/s':>9} {'speedup':>8} {'mean cos':>9} {'min cos':>8} {'RSS +MB':>8}"]
+    for backend, row in results.items():
+        lines.append(
+            f"{backend:<12} {row['texts_per_s']:>9.1f} {row['speedup']:>7.2f}x {row['mean_cosine']:>9.4f} "
+            f"{row['min_cosine']:>8.4f} {row['rss_growth_mb']:>8.0f}"
+        )
+    lines.append(f"speedup and cosine are relative to {reference}")
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="onnx", help=f"comma-separated: {', '.join(EMBEDDING_BACKENDS)}")
+    parser.add_argument("--reference", default="huggingface")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, help="CPU threads per backend")
+    parser.add_argument("--base-url", default="http://localhost:11434", help="Ollama server for the ollama backend")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="fail if any backend's mean cosine is lower")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print(format_results(results, args.reference))
+    failed = [backend for backend, row in results.items() if row["mean_cosine"] < args.min_cosine]
+    for backend in failed:
+        print(f"PARITY {backend}: mean cosine {results[backend]['mean_cosine']:.4f} < {args.min_cosine}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
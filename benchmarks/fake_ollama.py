@@ -0,0 +1,173 @@
+import hashlib
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set
+
+class FakeOllama:
+    """Local stand-in for the Ollama HTTP API with controllable latency.
+
+    Answers /api/tags, /api/generate and /api/chat (streaming or not) with
+    ``tokens`` copies of ``token``, and /api/embed with bag-of-words
+    vectors. Each request waits ``prompt_latency`` seconds
+    per prompt token (four characters) to mimic prompt evaluation, then
+    ``token_latency`` seconds per generated token. The first request for
+    a model also waits ``load_latency`` seconds to load it; a request
+    without a prompt or messages only loads the model, as in Ollama. Run
+    it as a context manager; ``url`` is the base URL to hand to OllamaClient.
+    """
+
+    def __init__(
+        self,
+        models: Optional[List[str]] = None,
+        tokens: int = 32,
+        token: str = "token ",
+        token_latency: float = 0.005,
+        prompt_latency: float = 0.0,
+        load_latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.models = models or ["gemma3:4b"]
+        self.tokens = tokens
+        self.token = token
+        self.token_latency = token_latency
+        self.prompt_latency = prompt_latency
+        self.load_latency = load_latency
+        self.loaded: Set[str] = set()
+        self._load_lock = threading.Lock()
+        self.requests: List[Dict] = []
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def load(self, model: str) -> float:
+        """Load the model unless it is loaded; return the seconds spent loading."""
+        with self._load_lock:
+            if model in self.loaded:
+                return 0.0
+            time.sleep(self.load_latency)
+            self.loaded.add(model)
+            return self.load_latency
+
+    @staticmethod
+    def embed(text: str, dim: int = 384) -> List[float]:
+        vector = [0.0] * dim
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % dim] += 1.0
+        norm = sum(value * value for value in vector) ** 0.5 or 1.0
+        return [value / norm for value in vector]
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Like Ollama itself; otherwise Nagle + delayed ACKs add ~40 ms per stream
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, format, *args):  # Keep benchmark output clean
+                pass
+
+            def _send_json(self, status: int, body: Dict) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json(200, {"models": [{"name": name} for name in fake.models]})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                fake.requests.append(payload)
+                if self.path == "/api/embed":
+                    texts = payload.get("input", [])
+                    texts = [texts] if isinstance(texts, str) else texts
+                    self._send_json(200, {"model": payload.get("model"), "embeddings": [fake.embed(t) for t in texts]})
+                    return
+                if self.path not in ("/api/generate", "/api/chat"):
+                    self._send_json(404, {"error": "not found"})
+                    return
+                if payload.get("model") not in fake.models:
+                    self._send_json(404, {"error": f"model '{payload.get('model')}' not found"})
+                    return
+
+                load_duration = int(fake.load(payload["model"]) * 1e9)
+                if "prompt" not in payload and "messages" not in payload:
+                    self._send_json(200, {
+                        "model": payload["model"], "done": True, "done_reason": "load", "load_duration": load_duration
+                    })
+                    return
+
+                chat = self.path == "/api/chat"
+                prompt = payload.get("prompt", "") + "".join(
+                    message.get("content", "") for message in payload.get("messages", [])
+                )
+                prompt_tokens = len(prompt) // 4 + 1
+                started = time.perf_counter()
+                time.sleep(prompt_tokens * fake.prompt_latency)
+                prompt_eval = time.perf_counter() - started
+
+                def chunk(text: str, done: bool) -> Dict:
+                    body = {"model": payload["model"], "done": done}
+                    if chat:
+                        body["message"] = {"role": "assistant", "content": text}
+                    else:
+                        body["response"] = text
+                    if done:
+                        body.update({
+                            "load_duration": load_duration,
+                            "prompt_eval_count": prompt_tokens,
+                            "prompt_eval_duration": int(prompt_eval * 1e9),
+                            "eval_count": fake.tokens,
+                            "eval_duration": int(fake.tokens * fake.token_latency * 1e9),
+                        })
+                    return body
+
+                if not payload.get("stream", True):
+                    time.sleep(fake.tokens * fake.token_latency)
+                    self._send_json(200, chunk(fake.token * fake.tokens, True))
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i in range(fake.tokens):
+                    time.sleep(fake.token_latency)
+                    self._write_chunk(chunk(fake.token, False))
+                self._write_chunk(chunk("", True))
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, body: Dict) -> None:
+                data = json.dumps(body).encode("utf-8") + b"\n"
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
@@ -0,0 +1,221 @@
+"""Benchmark the ingestion and QA pipeline against a local fake Ollama server.
+
+    python -m benchmarks.run --formats pdf,docx,txt --documents 2 --pages 20 --output baseline.json
+    python -m benchmarks.run --compare baseline.json --tolerance 0.2
+
+Per-document stages come from QAHandler.ingest progress reports: "extract"
+covers extraction with chunking interleaved, "split" the chunking left
+after the last page, then "embed" and "index". Query stages are "search"
+(hybrid retrieval), "qa" (get_response) and "ttft"/"stream" (first token
+and full answer of stream_response).
+"""
+import argparse
+import hashlib
+import json
+import platform
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from benchmarks.corpus import make_corpus
+from benchmarks.fake_ollama import FakeOllama
+from src.utils import qa_handler as qa
+from src.utils.embedding_names import embedding_id
+from src.utils.index_cache import IndexCache
+from src.utils.qa_handler import QAHandler
+from src.utils.response_cache import ResponseCache
+
+class HashEmbeddings(Embeddings):
+    """Deterministic bag-of-words vectors, for benchmarking without a model download."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+def benchmark_embeddings(args: argparse.Namespace, base_url: str) -> Optional[Embeddings]:
+    """Embeddings for a run: hash vectors, or the real model with a cache of its own.
+
+    The shared embedding cache persists between runs, so a second run would
+    measure cache hits; unless --warm-cache is given, every run starts empty.
+    """
+    if args.fake_embeddings:
+        return HashEmbeddings()
+    if args.warm_cache:
+        return None  # QAHandler's default: the shared model and persistent cache
+    from src.utils.embedding_backends import create_embeddings
+    from src.utils.embedding_cache import CachedEmbeddings, EmbeddingStore
+
+    return CachedEmbeddings(
+        create_embeddings(
+            qa.EMBEDDING_BACKEND, qa.EMBEDDING_MODEL, qa.EMBEDDING_BATCH_SIZE, qa.EMBEDDING_THREADS, base_url
+        ),
+        model_name=embedding_id(qa.EMBEDDING_BACKEND, qa.EMBEDDING_MODEL),
+        store=EmbeddingStore(":memory:"),
+        batch_size=qa.EMBEDDING_BATCH_SIZE,
+    )
+
+def summarize(samples: List[float], items: Optional[int] = None) -> Dict[str, float]:
+    """Percentiles in ms plus throughput (items, or samples, per second of total time)."""
+    values = np.asarray(samples) * 1000
+    total = float(np.sum(samples))
+    return {
+        "count": len(samples),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "throughput_per_s": (items if items is not None else len(samples)) / total if total else 0.0,
+    }
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux but bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run(args: argparse.Namespace) -> Dict:
+    formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    files, facts = make_corpus(formats, args.documents, args.pages, seed=args.seed)
+    questions = [f"What does error code {code} mean?" for code in list(facts)[:args.questions]]
+
+    samples: Dict[str, List[float]] = defaultdict(list)
+    counts: Dict[str, int] = defaultdict(int)
+
+    with FakeOllama(
+        tokens=args.tokens, token_latency=args.token_latency, prompt_latency=args.prompt_latency
+    ) as fake, tempfile.TemporaryDirectory() as cache_dir:
+        handler = QAHandler(
+            base_url=fake.url,
+            embeddings=benchmark_embeddings(args, fake.url),
+            index_cache=IndexCache(cache_dir),
+            response_cache=ResponseCache(max_entries=0),  # Measure generation, not cache hits
+            token_counter=(lambda text: len(text.split()) * 4 // 3 + 1) if args.fake_embeddings else None,
+        )
+
+        for name, data in files:
+            marks = []
+            handler.ingest(data, name, progress=lambda stage, fraction: marks.append((stage, time.perf_counter())))
+            marks.append(("end", time.perf_counter()))
+            starts = {}
+            for stage, at in marks:
+                starts.setdefault(stage, at)
+            ordered = sorted(starts.items(), key=lambda item: item[1])
+            for (stage, start), (_, end) in zip(ordered, ordered[1:]):
+                samples[stage].append(end - start)
+            samples["ingest"].append(ordered[-1][1] - ordered[0][1])
+            counts["pages"] += args.pages
+        counts["chunks"] = sum(len(info.chunk_ids) for info in handler.list_documents())
+
+        for question in questions:
+            start = time.perf_counter()
+            handler._retrieve(question)
+            samples["search"].append(time.perf_counter() - start)
+
+            handler.clear_history()
+            start = time.perf_counter()
+            handler.get_response(question)
+            samples["qa"].append(time.perf_counter() - start)
+
+            handler.clear_history()
+            start = time.perf_counter()
+            first = None
+            for _ in handler.stream_response(question):
+                if first is None:
+                    first = time.perf_counter() - start
+            samples["ttft"].append(first or 0.0)
+            samples["stream"].append(time.perf_counter() - start)
+
+    stages = {stage: summarize(values) for stage, values in samples.items()}
+    if "ingest" in stages:
+        total = sum(samples["ingest"])
+        stages["ingest"]["pages_per_s"] = counts["pages"] / total if total else 0.0
+        stages["ingest"]["chunks_per_s"] = counts["chunks"] / total if total else 0.0
+    return {
+        "config": vars(args) | {"files": len(files), "chunks": counts["chunks"]},
+        "stages": stages,
+        "peak_rss_mb": peak_rss_mb(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def format_results(results: Dict) -> str:
+    lines = [f"{'stage':<8} {'n':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'per s':>10}"]
+    for stage, row in results["stages"].items():
+        lines.append(
+            f"{stage:<8} {row['count']:>5} {row['p50_ms']:>10.2f} {row['p95_ms']:>10.2f} "
+            f"{row['p99_ms']:>10.2f} {row['throughput_per_s']:>10.2f}"
+        )
+    ingest = results["stages"].get("ingest", {})
+    if ingest:
+        lines.append(f"ingest: {ingest['pages_per_s']:.1f} pages/s, {ingest['chunks_per_s']:.1f} chunks/s")
+    lines.append(f"peak RSS: {results['peak_rss_mb']:.0f} MB")
+    return "\n".join(lines)
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Stages whose p50 or p95 got slower than the baseline by more than tolerance."""
+    regressions = []
+    for stage, row in results["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if before[metric] and row[metric] > before[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{stage} {metric}: {before[metric]:.2f} -> {row[metric]:.2f} "
+                    f"(+{100 * (row[metric] / before[metric] - 1):.0f}%)"
+                )
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--formats", default="pdf,docx,txt", help="comma-separated: pdf, docx, txt")
+    parser.add_argument("--documents", type=int, default=2, help="documents per format")
+    parser.add_argument("--pages", type=int, default=20, help="pages per document")
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--tokens", type=int, default=32, help="tokens per fake answer")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="seconds per generated token")
+    parser.add_argument("--prompt-latency", type=float, default=0.0, help="seconds per prompt token")
+    parser.add_argument("--fake-embeddings", action="store_true", help="hash embeddings instead of the real model")
+    parser.add_argument(
+        "--warm-cache", action="store_true", help="reuse the persistent embedding cache instead of an empty one"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before failing")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
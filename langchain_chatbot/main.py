@@ -1,15 +1,33 @@
 # Using document from the link: https://arxiv.org/pdf/2312.10997
+"""Batch question answering over a PDF with a persisted FAISS index.
+
+    python main.py ingest rags.pdf --index-dir index
+    python main.py ask --index-dir index --questions questions.jsonl --output answers.jsonl
+    python main.py ask --index-dir index --question "what are different types of RAG?"
+
+Each input line is {"question": ...} (an "id" field is copied through);
+each output line adds the answer, the pages it drew on and per-stage
+timings in milliseconds, or an "error" if that question failed.
+"""
+import argparse
+import json
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
 
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
-from langchain_ollama import OllamaEmbeddings
-from langchain.chains import RetrievalQA, create_retrieval_chain
-from langchain_community.chat_models import ChatOllama
+from langchain_ollama import ChatOllama, OllamaEmbeddings
+from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
 from langchain.chains.combine_documents import create_stuff_documents_chain
 
+MODEL = "gemma3:12b"
+INDEX_META = "index_meta.json"
+
 system_prompt = (
     """You are a highly reliable assistant specializing in question-answering tasks. Use the provided context to answer the question accurately and concisely. If the answer cannot be determined from the context, respond with 'I don't know.' Limit your response to a maximum of three sentences.
     \n\n {context}"""
@@ -17,32 +35,172 @@ system_prompt = (
 rag_prompt = ChatPromptTemplate(
     [
         ("system", system_prompt),
-        ("human", "{question}"),
+        ("human", "{input}"),
     ]
 )
 
-embeddings = OllamaEmbeddings(model="gemma3:12b")
-llm = ChatOllama(model="gemma3:12b")
 
-def get_qa_chain(pdf_path):
-    loader = PyPDFLoader(pdf_path)
-    documents = loader.load()
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    texts = text_splitter.split_documents(documents)
+def batched(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def build_index(
+    pdf_path: str,
+    index_dir: str,
+    embedding_model: str = MODEL,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100,
+    batch_size: int = 32,
+) -> FAISS:
+    """Split and embed the PDF in batches, then save the index for later runs."""
+    documents = PyPDFLoader(pdf_path).load()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    texts = splitter.split_documents(documents)
+    embeddings = OllamaEmbeddings(model=embedding_model)
+
+    vectorstore: Optional[FAISS] = None
+    for done, batch in enumerate(batched(texts, batch_size), start=1):
+        vectors = embeddings.embed_documents([doc.page_content for doc in batch])
+        pairs = list(zip([doc.page_content for doc in batch], vectors))
+        metadatas = [doc.metadata for doc in batch]
+        if vectorstore is None:
+            vectorstore = FAISS.from_embeddings(pairs, embeddings, metadatas=metadatas)
+        else:
+            vectorstore.add_embeddings(pairs, metadatas=metadatas)
+        print(f"Embedded {min(done * batch_size, len(texts))}/{len(texts)} chunks", file=sys.stderr)
+
+    if vectorstore is None:
+        raise ValueError(f"No text found in {pdf_path}")
+    vectorstore.save_local(index_dir)
+    with open(os.path.join(index_dir, INDEX_META), "w", encoding="utf-8") as f:
+        json.dump({"source": pdf_path, "embedding_model": embedding_model, "chunks": len(texts)}, f)
+    return vectorstore
+
+
+def load_index(index_dir: str) -> FAISS:
+    """Load an index saved by build_index, with the embedding model it was built with."""
+    with open(os.path.join(index_dir, INDEX_META), encoding="utf-8") as f:
+        meta = json.load(f)
+    embeddings = OllamaEmbeddings(model=meta["embedding_model"])
+    # The index was written by build_index, so unpickling its docstore is safe
+    return FAISS.load_local(index_dir, embeddings, allow_dangerous_deserialization=True)
+
+
+def read_questions(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def answer_questions(
+    vectorstore: FAISS,
+    records: List[Dict],
+    model: str = MODEL,
+    k: int = 3,
+    concurrency: int = 4,
+    batch_size: int = 32,
+) -> Iterator[Dict]:
+    """Answer every record's question, yielding results in input order.
+
+    Questions are embedded in batches and searched up front; the LLM
+    calls then run ``concurrency`` at a time.
+    """
+    questions = [record["question"] for record in records]
+    retrieved: List[List[Document]] = []
+    retrieve_ms: List[float] = []
+    for batch in batched(questions, batch_size):
+        start = time.perf_counter()
+        vectors = vectorstore.embeddings.embed_documents(batch)
+        embed_ms = (time.perf_counter() - start) * 1000 / len(batch)
+        for vector in vectors:
+            start = time.perf_counter()
+            retrieved.append(vectorstore.similarity_search_by_vector(vector, k=k))
+            retrieve_ms.append(embed_ms + (time.perf_counter() - start) * 1000)
+
+    chain = create_stuff_documents_chain(llm=ChatOllama(model=model), prompt=rag_prompt)
+
+    def answer(i: int) -> Dict:
+        start = time.perf_counter()
+        try:
+            result = chain.invoke({"input": questions[i], "context": retrieved[i]})
+        except Exception as e:
+            # One failed call must not abort the rest of an offline run
+            print(f"Question {i + 1} failed: {e}", file=sys.stderr)
+            return records[i] | {"error": str(e)}
+        return records[i] | {
+            "answer": result,
+            "pages": sorted({doc.metadata.get("page") for doc in retrieved[i]} - {None}),
+            "timings_ms": {
+                "retrieve": round(retrieve_ms[i], 1),
+                "generate": round((time.perf_counter() - start) * 1000, 1),
+            },
+        }
+
+    # Bounded so a long question file does not flood the Ollama server
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        yield from executor.map(answer, range(len(records)))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="build and save the index for a PDF")
+    ingest.add_argument("pdf", nargs="?", default="rags.pdf")
+    ingest.add_argument("--index-dir", default="index")
+    ingest.add_argument("--embedding-model", default=MODEL)
+    ingest.add_argument("--chunk-size", type=int, default=1000)
+    ingest.add_argument("--chunk-overlap", type=int, default=100)
+    ingest.add_argument("--batch-size", type=int, default=32, help="chunks per embedding request")
+
+    ask = commands.add_parser("ask", help="answer questions from a saved index")
+    ask.add_argument("--index-dir", default="index")
+    ask.add_argument("--questions", help="JSONL file with one {\"question\": ...} per line")
+    ask.add_argument("--question", action="append", default=[], help="a question; may be repeated")
+    ask.add_argument("--output", help="JSONL file for the answers (default: stdout)")
+    ask.add_argument("--model", default=MODEL)
+    ask.add_argument("-k", type=int, default=3, help="chunks retrieved per question")
+    ask.add_argument("--concurrency", type=int, default=4, help="LLM calls in flight at once")
+    ask.add_argument("--batch-size", type=int, default=32, help="questions per embedding request")
+    args = parser.parse_args(argv)
 
-    vectorstore = FAISS.from_documents(texts, embeddings)
+    if args.command == "ingest":
+        start = time.perf_counter()
+        build_index(
+            args.pdf,
+            args.index_dir,
+            embedding_model=args.embedding_model,
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+            batch_size=args.batch_size,
+        )
+        print(f"Saved index to {args.index_dir} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        return 0
 
-    retriever = vectorstore.as_retriever(search_kwargs={"k":3})
-    question_answer_chain = create_stuff_documents_chain(llm=llm, prompt=rag_prompt)
-    rag_chain = create_retrieval_chain(retriever=retriever, question_answer_chain=question_answer_chain)
-    return rag_chain
+    records = read_questions(args.questions) if args.questions else []
+    records += [{"question": question} for question in args.question]
+    if not records:
+        parser.error("ask needs --questions or --question")
 
+    vectorstore = load_index(args.index_dir)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    failed = 0
+    try:
+        results = answer_questions(
+            vectorstore, records, model=args.model, k=args.k, concurrency=args.concurrency, batch_size=args.batch_size
+        )
+        for result in results:
+            failed += "error" in result
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"Answered {len(records) - failed} of {len(records)} questions in {elapsed:.1f}s", file=sys.stderr)
+    return 1 if failed else 0
 
-def main():
-    rag_chain = get_qa_chain("rags.pdf")
-    question = "what are different types of RAG?"
-    result = rag_chain.invoke({"question": question})
-    print(result)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,57 +1,359 @@
+import json
 import os
-import shutil
+import sqlite3
 import tempfile
-from typing import Any, List
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set
 
 from pydantic import BaseModel
 
-from rasa.nlu.utils import write_json_to_file
-from rasa.shared.utils.io import read_json_file
-
 ORIGIN_DB_PATH = "db"
 CONTACTS = "contacts.json"
 
+# One SQLite database holds every session's contacts. WAL lets several
+# action server workers read while one writes; each transaction that
+# modifies contacts takes the write lock up front (BEGIN IMMEDIATE), so a
+# read-modify-write cannot interleave with another worker's.
+DB_FILE = os.environ.get(
+    "CONTACTS_DB_FILE",
+    os.path.join(tempfile.gettempdir(), "calm_starter", "contacts.sqlite3"),
+)
+# Sessions idle for longer than this are deleted; so are the least
+# recently used ones beyond the cap
+SESSION_TTL = float(os.environ.get("CONTACTS_SESSION_TTL", 7 * 24 * 3600))
+MAX_SESSIONS = int(os.environ.get("CONTACTS_MAX_SESSIONS", 10000))
+# How often a process looks for sessions to delete
+GC_INTERVAL = 600.0
+# Reads note a session's last use in memory; a process writes the noted
+# times in one batch at most this often, or with its next write, so reads
+# rarely write (and rarely invalidate other workers' caches)
+TOUCH_INTERVAL = 60.0
+# Sessions whose contacts are kept in memory, least recently used dropped first
+CACHE_SIZE = int(os.environ.get("CONTACTS_CACHE_SIZE", 1024))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    last_seen REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    handle TEXT NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (session_id, handle)
+);
+"""
+INSERT_CONTACT = (
+    "INSERT OR IGNORE INTO contacts (session_id, handle, name) VALUES (?, ?, ?)"
+)
+
 
 class Contact(BaseModel):
     name: str
     handle: str
 
 
-def get_session_db_path(session_id: str) -> str:
-    tempdir = tempfile.gettempdir()
-    project_name = "calm_starter"
-    return os.path.join(tempdir, project_name, session_id)
+class ContactStore:
+    """Contacts per session, indexed by (session_id, handle), with a read cache.
+
+    Sessions share the seed file's contacts read-only until their first
+    change, which copies them into the session (copy-on-write), so bots
+    that only list contacts never write. Sessions unused for ``ttl``
+    seconds, and the least recently used beyond ``max_sessions``, are
+    deleted. The cache is dropped whenever another connection (another
+    worker) commits, which SQLite reports through PRAGMA data_version.
+    """
+
+    def __init__(
+        self,
+        path: str = DB_FILE,
+        seed_file: str = os.path.join(ORIGIN_DB_PATH, CONTACTS),
+        busy_timeout: float = 30.0,
+        ttl: float = SESSION_TTL,
+        max_sessions: int = MAX_SESSIONS,
+        gc_interval: float = GC_INTERVAL,
+        cache_size: int = CACHE_SIZE,
+    ):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.pid = os.getpid()
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.gc_interval = gc_interval
+        self.cache_size = cache_size
+        self._conn = sqlite3.connect(
+            path, timeout=busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._lock = threading.RLock()
+        self._seed = self._load_seed(seed_file)
+        # Only sessions with their own rows are cached; the others read the seed
+        self._cache: "OrderedDict[str, List[Contact]]" = OrderedDict()
+        # Sessions known to have their own rows
+        self._sessions: Set[str] = set()
+        # Last use of sessions not yet written to the database. Not cached
+        # data, so it survives _forget()
+        self._seen: Dict[str, float] = {}
+        self._last_flush = time.time()
+        self._last_gc = 0.0
+        self._data_version = self._read_data_version()
+
+    def _migrate(self) -> None:
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        if "last_seen" not in columns:
+            self._conn.execute(
+                "ALTER TABLE sessions ADD COLUMN last_seen REAL NOT NULL DEFAULT 0"
+            )
+
+    @staticmethod
+    def _load_seed(seed_file: str) -> List[Contact]:
+        if not os.path.exists(seed_file):
+            return []
+        with open(seed_file, encoding="utf-8") as f:
+            return [Contact(**item) for item in json.load(f)]
+
+    def _read_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _sync(self) -> None:
+        # data_version only changes when a different connection commits
+        version = self._read_data_version()
+        if version != self._data_version:
+            self._forget()
+            self._data_version = version
+
+    def _forget(self) -> None:
+        self._cache.clear()
+        self._sessions.clear()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _materialized(self, session_id: str) -> bool:
+        """Whether the session has its own rows, rather than reading the seed."""
+        if session_id in self._sessions:
+            return True
+        row = self._conn.execute(
+            "SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is not None:
+            self._sessions.add(session_id)
+        return row is not None
+
+    def _materialize(self, conn: sqlite3.Connection, session_id: str) -> None:
+        """Copy the seed into the session before its first change."""
+        now = time.time()
+        created = conn.execute(
+            "INSERT OR IGNORE INTO sessions (session_id, last_seen) VALUES (?, ?)",
+            (session_id, now),
+        ).rowcount
+        if created:
+            conn.executemany(
+                INSERT_CONTACT,
+                [(session_id, c.handle, c.name) for c in self._seed],
+            )
+        else:
+            self._seen[session_id] = now
+        self._sessions.add(session_id)
+        # This transaction writes anyway, so record every use noted so far
+        self._flush_seen(conn)
+
+    def _flush_seen(self, conn: sqlite3.Connection) -> None:
+        """Write the noted last-use times, inside a write transaction."""
+        if self._seen:
+            conn.executemany(
+                "UPDATE sessions SET last_seen = MAX(last_seen, ?) WHERE session_id = ?",
+                [(seen, session_id) for session_id, seen in self._seen.items()],
+            )
+            self._seen.clear()
+        self._last_flush = time.time()
+
+    def _touch(self, session_id: str) -> None:
+        """Note that a session with its own rows is still in use."""
+        now = time.time()
+        self._seen[session_id] = now
+        if now - self._last_flush >= TOUCH_INTERVAL:
+            with self._transaction() as conn:
+                self._flush_seen(conn)
 
+    def _cached(self, session_id: str) -> Optional[List[Contact]]:
+        contacts = self._cache.get(session_id)
+        if contacts is not None:
+            self._cache.move_to_end(session_id)
+        return contacts
 
-def prepare_db_file(session_id: str, db: str) -> str:
-    session_db_path = get_session_db_path(session_id)
-    os.makedirs(session_db_path, exist_ok=True)
-    destination_file = os.path.join(session_db_path, db)
-    if not os.path.exists(destination_file):
-        origin_file = os.path.join(ORIGIN_DB_PATH, db)
-        shutil.copy(origin_file, destination_file)
-    return destination_file
+    def _remember(self, session_id: str, contacts: List[Contact]) -> None:
+        self._cache[session_id] = contacts
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
 
+    def get_contacts(self, session_id: str) -> List[Contact]:
+        with self._lock:
+            self._sync()
+            contacts = self._cached(session_id)
+            if contacts is None:
+                if not self._materialized(session_id):
+                    return list(self._seed)
+                rows = self._conn.execute(
+                    "SELECT name, handle FROM contacts WHERE session_id = ? ORDER BY id",
+                    (session_id,),
+                ).fetchall()
+                contacts = [Contact(name=name, handle=handle) for name, handle in rows]
+                self._remember(session_id, contacts)
+            self._touch(session_id)
+            return list(contacts)
 
-def read_db(session_id: str, db: str) -> Any:
-    db_file = prepare_db_file(session_id, db)
-    return read_json_file(db_file)
+    def contact_exists(self, session_id: str, handle: str) -> bool:
+        with self._lock:
+            self._sync()
+            contacts = self._cached(session_id)
+            if contacts is not None:
+                return any(c.handle == handle for c in contacts)
+            if not self._materialized(session_id):
+                return any(c.handle == handle for c in self._seed)
+            row = self._conn.execute(
+                "SELECT 1 FROM contacts WHERE session_id = ? AND handle = ?",
+                (session_id, handle),
+            ).fetchone()
+            return row is not None
 
+    def add_contact(self, session_id: str, contact: Contact) -> bool:
+        """Add the contact unless its handle is taken; True if it was added."""
+        with self._lock:
+            self._sync()
+            with self._transaction() as conn:
+                self._materialize(conn, session_id)
+                added = conn.execute(
+                    INSERT_CONTACT,
+                    (session_id, contact.handle, contact.name),
+                ).rowcount
+            if added and session_id in self._cache:
+                self._cache[session_id].append(contact)
+            self._maybe_collect()
+            return bool(added)
 
-def write_db(session_id: str, db: str, data: Any) -> None:
-    db_file = prepare_db_file(session_id, db)
-    write_json_to_file(db_file, data)
+    def remove_contact(self, session_id: str, handle: str) -> Optional[Contact]:
+        """Remove the contact with this handle; return it, or None if there was none."""
+        with self._lock:
+            self._sync()
+            # Nothing to copy on write if the handle is not there to remove
+            if not self.contact_exists(session_id, handle):
+                return None
+            with self._transaction() as conn:
+                self._materialize(conn, session_id)
+                row = conn.execute(
+                    "SELECT name FROM contacts WHERE session_id = ? AND handle = ?",
+                    (session_id, handle),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "DELETE FROM contacts WHERE session_id = ? AND handle = ?",
+                        (session_id, handle),
+                    )
+            if row is None:
+                return None
+            if session_id in self._cache:
+                self._cache[session_id] = [
+                    c for c in self._cache[session_id] if c.handle != handle
+                ]
+            self._maybe_collect()
+            return Contact(name=row[0], handle=handle)
+
+    def write_contacts(self, session_id: str, contacts: List[Contact]) -> None:
+        with self._lock:
+            self._sync()
+            with self._transaction() as conn:
+                self._materialize(conn, session_id)
+                conn.execute("DELETE FROM contacts WHERE session_id = ?", (session_id,))
+                conn.executemany(
+                    INSERT_CONTACT,
+                    [(session_id, c.handle, c.name) for c in contacts],
+                )
+            self._cache.pop(session_id, None)
+            self._maybe_collect()
+
+    def _maybe_collect(self) -> None:
+        if time.time() - self._last_gc >= self.gc_interval:
+            self.collect_garbage()
+
+    def collect_garbage(self) -> int:
+        """Delete idle sessions and those beyond the cap; return how many were deleted."""
+        with self._lock:
+            now = time.time()
+            self._last_gc = now
+            with self._transaction() as conn:
+                # Sessions in use must not look idle
+                self._flush_seen(conn)
+                expired = conn.execute(
+                    "SELECT session_id FROM sessions WHERE last_seen < ?",
+                    (now - self.ttl,),
+                ).fetchall()
+                excess = conn.execute(
+                    "SELECT session_id FROM sessions WHERE last_seen >= ? "
+                    "ORDER BY last_seen DESC LIMIT -1 OFFSET ?",
+                    (now - self.ttl, self.max_sessions),
+                ).fetchall()
+                doomed = expired + excess
+                conn.executemany("DELETE FROM contacts WHERE session_id = ?", doomed)
+                conn.executemany("DELETE FROM sessions WHERE session_id = ?", doomed)
+            if doomed:
+                self._forget()
+            return len(doomed)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[ContactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ContactStore:
+    global _store
+    with _store_lock:
+        # A connection must not be shared with forked worker processes
+        if _store is None or _store.pid != os.getpid():
+            _store = ContactStore()
+        return _store
 
 
 def get_contacts(session_id: str) -> List[Contact]:
-    return [Contact(**item) for item in read_db(session_id, CONTACTS)]
+    return get_store().get_contacts(session_id)
+
+
+def contact_exists(session_id: str, handle: str) -> bool:
+    return get_store().contact_exists(session_id, handle)
+
 
+def add_contact(session_id: str, contact: Contact) -> bool:
+    return get_store().add_contact(session_id, contact)
 
-def add_contact(session_id: str, contact: Contact) -> None:
-    contacts = get_contacts(session_id)
-    contacts.append(contact)
-    write_db(session_id, CONTACTS, [c.dict() for c in contacts])
+
+def remove_contact(session_id: str, handle: str) -> Optional[Contact]:
+    return get_store().remove_contact(session_id, handle)
 
 
 def write_contacts(session_id: str, contacts: List[Contact]) -> None:
-    write_db(session_id, CONTACTS, [c.dict() for c in contacts])
+    get_store().write_contacts(session_id, contacts)
+
+
+def collect_garbage() -> int:
+    return get_store().collect_garbage()
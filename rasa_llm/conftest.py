@@ -0,0 +1 @@
+# Lets tests import the actions package when pytest is run from the repository root
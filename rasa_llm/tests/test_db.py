@@ -0,0 +1,146 @@
+import json
+import time
+
+import pytest
+
+from actions.db import Contact, ContactStore
+
+SEED = [{"name": "Joe Smith", "handle": "@JoeSmith"}, {"name": "Mary Lu", "handle": "@MaryLu"}]
+
+
+@pytest.fixture
+def seed_file(tmp_path):
+    path = tmp_path / "contacts.json"
+    path.write_text(json.dumps(SEED))
+    return str(path)
+
+
+@pytest.fixture
+def make_store(tmp_path, seed_file):
+    stores = []
+
+    def make(**kwargs):
+        store = ContactStore(str(tmp_path / "contacts.sqlite3"), seed_file=seed_file, **kwargs)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def session_count(store):
+    return store._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def test_add_contact_keeps_handles_unique_per_session(make_store):
+    store = make_store()
+    assert store.add_contact("a", Contact(name="Ann", handle="@ann"))
+    assert not store.add_contact("a", Contact(name="Another Ann", handle="@ann"))
+    # The same handle is free in another session
+    assert store.add_contact("b", Contact(name="Ann", handle="@ann"))
+    handles = [c.handle for c in store.get_contacts("a")]
+    assert handles == ["@JoeSmith", "@MaryLu", "@ann"]
+
+
+def test_remove_contact(make_store):
+    store = make_store()
+    removed = store.remove_contact("a", "@MaryLu")
+    assert removed == Contact(name="Mary Lu", handle="@MaryLu")
+    assert store.remove_contact("a", "@MaryLu") is None
+    assert not store.contact_exists("a", "@MaryLu")
+    assert [c.handle for c in store.get_contacts("a")] == ["@JoeSmith"]
+
+
+def test_write_contacts_replaces_the_session(make_store):
+    store = make_store()
+    store.write_contacts("a", [Contact(name="Bo", handle="@bo")])
+    assert store.get_contacts("a") == [Contact(name="Bo", handle="@bo")]
+    assert len(store.get_contacts("b")) == len(SEED)
+
+
+def test_changes_from_another_connection_invalidate_the_cache(make_store):
+    reader, writer = make_store(), make_store()
+    assert not reader.contact_exists("a", "@cy")
+    reader.get_contacts("a")
+
+    writer.add_contact("a", Contact(name="Cy", handle="@cy"))
+    assert reader.contact_exists("a", "@cy")
+    assert "@cy" in [c.handle for c in reader.get_contacts("a")]
+
+    writer.remove_contact("a", "@cy")
+    assert "@cy" not in [c.handle for c in reader.get_contacts("a")]
+
+
+def test_sessions_read_the_seed_until_their_first_change(make_store):
+    store = make_store()
+    assert [c.handle for c in store.get_contacts("a")] == ["@JoeSmith", "@MaryLu"]
+    assert store.contact_exists("a", "@JoeSmith")
+    # Removing a contact that is not there does not copy the seed either
+    assert store.remove_contact("a", "@nobody") is None
+    assert session_count(store) == 0
+
+    store.add_contact("a", Contact(name="Di", handle="@di"))
+    assert session_count(store) == 1
+    assert [c.handle for c in store.get_contacts("a")] == ["@JoeSmith", "@MaryLu", "@di"]
+    assert [c.handle for c in store.get_contacts("b")] == ["@JoeSmith", "@MaryLu"]
+
+
+def test_read_only_sessions_are_not_cached(make_store):
+    store = make_store(cache_size=2)
+    for i in range(10):
+        store.get_contacts(f"reader-{i}")
+    assert len(store._cache) == 0
+
+    for i in range(5):
+        store.add_contact(f"writer-{i}", Contact(name="Ed", handle="@ed"))
+        store.get_contacts(f"writer-{i}")
+    assert list(store._cache) == ["writer-3", "writer-4"]
+
+
+def test_idle_sessions_expire(make_store):
+    store = make_store(ttl=0.05)
+    store.add_contact("old", Contact(name="Fay", handle="@fay"))
+    time.sleep(0.1)
+    store.add_contact("new", Contact(name="Gus", handle="@gus"))
+
+    assert store.collect_garbage() == 1
+    assert session_count(store) == 1
+    # An expired session starts again from the seed
+    assert [c.handle for c in store.get_contacts("old")] == ["@JoeSmith", "@MaryLu"]
+    assert "@gus" in [c.handle for c in store.get_contacts("new")]
+
+
+def test_least_recently_used_sessions_beyond_the_cap_are_deleted(make_store):
+    store = make_store(max_sessions=2)
+    for session in ("a", "b", "c"):
+        store.add_contact(session, Contact(name="Hal", handle="@hal"))
+        time.sleep(0.01)
+
+    assert store.collect_garbage() == 1
+    assert not store.contact_exists("a", "@hal")
+    assert store.contact_exists("b", "@hal") and store.contact_exists("c", "@hal")
+
+
+def test_reads_do_not_write_across_workers(make_store):
+    first, second = make_store(), make_store()
+    first.add_contact("a", Contact(name="Ivy", handle="@ivy"))
+    writes = []
+    for store in (first, second):
+        store._conn.set_trace_callback(
+            lambda sql: writes.append(sql) if sql.startswith("BEGIN IMMEDIATE") else None
+        )
+
+    for _ in range(20):
+        assert "@ivy" in [c.handle for c in first.get_contacts("a")]
+        assert "@ivy" in [c.handle for c in second.get_contacts("a")]
+    assert writes == []
+
+
+def test_noted_use_keeps_a_session_from_expiring(make_store):
+    store = make_store(ttl=0.05)
+    store.add_contact("a", Contact(name="Jo", handle="@jo"))
+    time.sleep(0.1)
+    store.get_contacts("a")
+    assert store.collect_garbage() == 0
+    assert store.contact_exists("a", "@jo")
@@ -1,12 +1,81 @@
-import streamlit as st
-from src.utils.qa_handler import QAHandler
+import os
+
+from src.utils.startup import startup_timer
+
+with startup_timer.phase("import app modules"):
+    import streamlit as st
+    from src.utils.ingestion import IngestionQueue
+    from src.utils.metrics import registry, start_metrics_server
+    from src.utils.qa_handler import QAHandler
+
+@st.fragment(run_every=1.0)
+def knowledge_base_panel():
+    """Ingestion progress and loaded documents, refreshed while the chat stays usable."""
+    ingestion = st.session_state.ingestion
+    for job in ingestion.jobs():
+        if job.status in ("queued", "running"):
+            col1, col2 = st.columns([4, 1])
+            col1.progress(job.progress, text=f"{job.source}: {job.stage or 'queued'}...")
+            if col2.button("Cancel", key=f"cancel_{job.job_id}"):
+                ingestion.cancel(job.job_id)
+        elif job.status == "failed":
+            st.error(f"{job.source}: {job.error}")
+
+    # Documents in the knowledge base
+    documents = st.session_state.qa_handler.list_documents()
+    if documents:
+        st.subheader("Knowledge Base")
+        for document in documents:
+            col1, col2 = st.columns([4, 1])
+            col1.write(f"📄 {document.source}")
+            stats = st.session_state.qa_handler.chunk_stats.get(document.doc_id)
+            if stats:
+                col1.caption(f"{stats.chunks} chunks, ~{stats.mean_tokens:.0f} tokens each")
+            if col2.button("✖", key=f"remove_{document.doc_id}", help=f"Remove {document.source}"):
+                st.session_state.qa_handler.remove_document(document.doc_id)
+                st.rerun()
+
+MODEL_STATE_LABELS = {
+    "cold": "⚪ Not loaded; the first answer will wait for it to load",
+    "loading": "🟡 Loading...",
+    "warm": "🟢 Loaded",
+}
+
+@st.fragment(run_every=1.0)
+def model_status():
+    """Whether the selected model is loaded on the Ollama server, updated while it loads."""
+    qa_handler = st.session_state.qa_handler
+    state = qa_handler.model_state()
+    if state is None:
+        return
+    col1, col2 = st.columns([4, 1])
+    col1.caption(MODEL_STATE_LABELS.get(state, state))
+    if state == "cold" and col2.button("Load", help="Load the model now"):
+        qa_handler.set_model(qa_handler.model_name)
+
+def debug_panel():
+    """Per-stage timings of the latest requests, to see where a slow answer spent its time."""
+    traces = registry.recent_traces()[:5]
+    if not traces:
+        st.caption("No requests yet.")
+    for trace in traces:
+        st.markdown(f"**{trace.name}** {trace.seconds * 1000:.0f} ms")
+        st.text("\n".join(f"{stage:<10} {seconds * 1000:8.1f} ms" for stage, seconds in trace.spans))
+        if trace.attributes:
+            st.caption(", ".join(f"{key}={value}" for key, value in trace.attributes.items()))
+    st.caption(f"Response cache hit ratio: {st.session_state.qa_handler.response_cache.hit_ratio:.0%}")
 
 def main():
     st.set_page_config(page_title="AI Assistant", page_icon="🤖", layout="wide")
+
+    # Prometheus scrape endpoint, e.g. METRICS_PORT=9464 -> http://localhost:9464/metrics
+    if os.environ.get("METRICS_PORT"):
+        start_metrics_server(int(os.environ["METRICS_PORT"]))
     
     # Initialize session state
     if "qa_handler" not in st.session_state:
-        st.session_state.qa_handler = QAHandler()
+        with startup_timer.phase("create QA handler"):
+            st.session_state.qa_handler = QAHandler()
     if "messages" not in st.session_state:
         st.session_state.messages = []
     if "current_model" not in st.session_state:
@@ -18,7 +87,7 @@ def main():
         
         # Refresh button for models
         if st.button("🔄 Refresh Models"):
-            st.session_state.qa_handler = QAHandler()  # Reinitialize to refresh model list
+            st.session_state.qa_handler.refresh_models()
         
         # Get available models
         available_models = st.session_state.qa_handler.get_available_models()
@@ -37,24 +106,34 @@ def main():
                 st.success(f"Model changed to {selected_model}")
             else:
                 st.error(f"Failed to switch to model {selected_model}")
+        model_status()
+
+        # Start a new conversation; documents stay loaded
+        if st.button("🧹 Clear Chat"):
+            st.session_state.messages = []
+            st.session_state.qa_handler.clear_history()
         
         # Document upload
         st.title("Document Upload")
         uploaded_file = st.file_uploader("Upload a document", type=["txt", "pdf", "docx"])
         
-        if uploaded_file is not None:
-            # Save the uploaded file temporarily
-            with open("temp_upload", "wb") as f:
-                f.write(uploaded_file.getbuffer())
-            
-            # Process the document
-            with st.spinner("Processing document..."):
-                result = st.session_state.qa_handler.process_document("temp_upload")
-                if result.startswith("Error"):
-                    st.error(result)
-                else:
-                    st.success("Document processed successfully!")
-                    st.info(f"Document contains {len(result.split())} words")
+        if "processed_uploads" not in st.session_state:
+            st.session_state.processed_uploads = set()
+        if "ingestion" not in st.session_state:
+            st.session_state.ingestion = IngestionQueue(st.session_state.qa_handler)
+
+        # Queue each upload once, not on every rerun of the script
+        if uploaded_file is not None and uploaded_file.file_id not in st.session_state.processed_uploads:
+            st.session_state.processed_uploads.add(uploaded_file.file_id)
+            st.session_state.ingestion.submit(uploaded_file.getvalue(), uploaded_file.name)
+
+        knowledge_base_panel()
+
+        with st.expander("⏱ Startup timing"):
+            st.text(startup_timer.format_report())
+
+        if st.checkbox("Show debug metrics"):
+            debug_panel()
 
     # Main chat interface
     st.title("AI Assistant 🤖")
@@ -71,12 +150,13 @@ def main():
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # Get response
+        # Stream response tokens as they arrive
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = st.session_state.qa_handler.get_response(prompt)
-                st.markdown(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
+            response = st.write_stream(st.session_state.qa_handler.stream_response(prompt))
+            st.session_state.messages.append({"role": "assistant", "content": response})
+
+    # Streamlit re-runs this script on every interaction; only the first run is recorded
+    startup_timer.mark("first render")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,88 +1,258 @@
+import codecs
 import io
-import os
-from typing import Union
+import multiprocessing
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
 
 import PyPDF2
 import docx
 
+from src.utils.metrics import registry
+
+PDF_TYPE = "application/pdf"
+TEXT_TYPE = "text/plain"
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# How many leading bytes to inspect when sniffing content
+SNIFF_BYTES = 4096
+
+@dataclass
+class DetectedFile:
+    """Result of file type detection, carrying anything already opened along the way."""
+    mime_type: str
+    encoding: str = "utf-8"
+    reader: Optional[Any] = None
+
+@dataclass
+class Section:
+    """A piece of extracted text with the document structure it came from."""
+    text: str
+    page: Optional[int] = None
+    heading: Optional[str] = None
+    is_heading: bool = False  # The section is the heading line itself
+
+# Markdown-style headings in plain text files
+_TEXT_HEADING = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$")
+
+# The PDF each extraction worker process parsed once at startup
+_worker_reader: Optional[PyPDF2.PdfReader] = None
+
+def _init_pdf_worker(data: bytes) -> None:
+    """Parse the PDF once per worker process, instead of once per page range."""
+    global _worker_reader
+    _worker_reader = PyPDF2.PdfReader(io.BytesIO(data))
+
+def _extract_pdf_pages(start: int, end: int) -> List[str]:
+    """Extract the text of pages [start, end) of the worker's PDF. Runs in worker processes."""
+    return [_worker_reader.pages[i].extract_text() + "\n" for i in range(start, end)]
+
 class DocumentProcessor:
-    def __init__(self):
-        self.supported_types = {
-            "application/pdf": self._process_pdf,
-            "text/plain": self._process_txt,
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document": self._process_docx
+    def __init__(self, pdf_workers: Optional[int] = None, parallel_min_pages: int = 32):
+        # PDFs with at least parallel_min_pages pages are extracted across
+        # pdf_workers processes; None or 1 keeps extraction in-process.
+        self.pdf_workers = pdf_workers
+        self.parallel_min_pages = parallel_min_pages
+        self.supported_types: Dict[str, Callable[[io.BytesIO, DetectedFile], Iterator[str]]] = {
+            PDF_TYPE: self._iter_pdf,
+            TEXT_TYPE: self._iter_txt,
+            DOCX_TYPE: self._iter_docx
         }
-    
+        self.section_types: Dict[str, Callable[[io.BytesIO, DetectedFile], Iterator[Section]]] = {
+            PDF_TYPE: self._pdf_sections,
+            TEXT_TYPE: self._txt_sections,
+            DOCX_TYPE: self._docx_sections
+        }
+
     def process_document(self, file: Union[io.BytesIO, str]) -> str:
         """Process uploaded document and return text content"""
+        return "".join(self.iter_document(file))
+
+    def iter_document(self, file: Union[io.BytesIO, str]) -> Iterator[str]:
+        """Yield the text of a document page by page (PDF) or paragraph by paragraph (DOCX)"""
+        return registry.timed_iter("extract", self._iterate(file, self.supported_types))
+
+    def iter_sections(self, file: Union[io.BytesIO, str]) -> Iterator[Section]:
+        """Yield the document as sections tagged with their page (PDF) or heading (DOCX, text)"""
+        return registry.timed_iter("extract", self._iterate(file, self.section_types))
+
+    def _iterate(self, file: Union[io.BytesIO, str], handlers: Dict[str, Callable]) -> Iterator[Any]:
+        """Run the handler for the detected file type, falling back to plain text"""
         if isinstance(file, str):
             with open(file, 'rb') as f:
                 file = io.BytesIO(f.read())
-        
-        file_type = self._get_file_type(file)
-        if file_type not in self.supported_types:
-            raise ValueError(f"Unsupported file type: {file_type}")
-        
+
+        detected = self._detect_file(file)
+        if detected.mime_type not in handlers:
+            raise ValueError(f"Unsupported file type: {detected.mime_type}")
+
+        started = False
         try:
-            return self.supported_types[file_type](file)
+            for item in handlers[detected.mime_type](file, detected):
+                started = True
+                yield item
         except Exception as e:
-            # If processing fails, try as text
+            if started:
+                raise ValueError(f"Failed to process file: {str(e)}")
+            # If processing fails before producing any text, try as text
             file.seek(0)
             try:
-                return self._process_txt(file)
+                yield from handlers[TEXT_TYPE](file, DetectedFile(TEXT_TYPE))
             except:
                 raise ValueError(f"Failed to process file: {str(e)}")
-    
+
     def _get_file_type(self, file: io.BytesIO) -> str:
         """Get file type from file object"""
+        return self._detect_file(file).mime_type
+
+    def _detect_file(self, file: io.BytesIO) -> DetectedFile:
+        """Detect the file type from its name, or else by sniffing its leading bytes"""
         # Check if file has a name attribute (from file upload)
-        if hasattr(file, 'name'):
-            if file.name.endswith('.pdf'):
-                return "application/pdf"
-            elif file.name.endswith('.txt'):
-                return "text/plain"
-            elif file.name.endswith('.docx'):
-                return "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        
-        # If no name attribute, try to determine type from content
+        name = getattr(file, 'name', None)
+        if isinstance(name, str):
+            if name.endswith('.pdf'):
+                return DetectedFile(PDF_TYPE)
+            elif name.endswith('.txt'):
+                return DetectedFile(TEXT_TYPE)
+            elif name.endswith('.docx'):
+                return DetectedFile(DOCX_TYPE)
+
+        # If no usable name, look at the magic bytes rather than parsing the file
+        file.seek(0)
+        head = file.read(SNIFF_BYTES)
+        file.seek(0)  # Reset file pointer
+
+        if b"%PDF-" in head[:1024]:  # PDF allows leading junk before the header
+            try:
+                # The reader is needed for extraction anyway, so open it once here
+                return DetectedFile(PDF_TYPE, reader=PyPDF2.PdfReader(file))
+            except Exception:
+                file.seek(0)
+                return DetectedFile(TEXT_TYPE)
+
+        if head.startswith(b"PK\x03\x04"):
+            return DetectedFile(self._sniff_zip(file))
+
+        return DetectedFile(TEXT_TYPE, encoding=self._sniff_text_encoding(head))
+
+    def _sniff_zip(self, file: io.BytesIO) -> str:
+        """Tell a DOCX apart from other ZIP containers using the central directory only"""
         try:
-            # Try to read as PDF
-            PyPDF2.PdfReader(file)
+            with zipfile.ZipFile(file) as archive:
+                names = set(archive.namelist())
+        except zipfile.BadZipFile:
+            names = set()
+        finally:
             file.seek(0)  # Reset file pointer
-            return "application/pdf"
-        except:
-            try:
-                # Try to read as DOCX
-                docx.Document(file)
-                file.seek(0)  # Reset file pointer
-                return "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-            except:
-                # Assume it's a text file
-                file.seek(0)  # Reset file pointer
-                return "text/plain"
-    
+        if "word/document.xml" in names:
+            return DOCX_TYPE
+        return "application/zip"
+
+    def _sniff_text_encoding(self, head: bytes) -> str:
+        """Pick the text encoding from a byte order mark, defaulting to UTF-8"""
+        if head.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        if head.startswith(codecs.BOM_UTF16_LE) or head.startswith(codecs.BOM_UTF16_BE):
+            return "utf-16"
+        return "utf-8"
+
+    def _iter_pdf(self, file: io.BytesIO, detected: Optional[DetectedFile] = None) -> Iterator[str]:
+        """Yield the text of each PDF page, extracting pages in parallel for large files"""
+        pdf_reader = detected.reader if detected and detected.reader else PyPDF2.PdfReader(file)
+        num_pages = len(pdf_reader.pages)
+        workers = min(self.pdf_workers or 1, num_pages)
+
+        if workers <= 1 or num_pages < self.parallel_min_pages:
+            for page in pdf_reader.pages:
+                yield page.extract_text() + "\n"
+            return
+
+        # Each worker receives the PDF once, then contiguous page ranges;
+        # map() yields them back in order. Workers are spawned, not forked:
+        # forking a process with threads (Streamlit, torch, tokenizers) can
+        # deadlock the child.
+        batch = -(-num_pages // (workers * 4))  # Several batches per worker for load balancing
+        starts = list(range(0, num_pages, batch))
+        ends = [min(start + batch, num_pages) for start in starts]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_pdf_worker,
+            initargs=(file.getvalue(),),
+        ) as executor:
+            for pages in executor.map(_extract_pdf_pages, starts, ends):
+                yield from pages
+
+    def _iter_txt(self, file: io.BytesIO, detected: Optional[DetectedFile] = None) -> Iterator[str]:
+        """Yield the lines of a text file"""
+        encoding = detected.encoding if detected else 'utf-8'
+        text = io.TextIOWrapper(file, encoding=encoding, newline='')
+        try:
+            line = ""
+            for line in text:
+                yield line
+            if not line.endswith('\n'):
+                yield '\n'
+        finally:
+            text.detach()  # Leave the underlying file open for callers
+
+    def _iter_docx(self, file: io.BytesIO, detected: Optional[DetectedFile] = None) -> Iterator[str]:
+        """Yield the text of each DOCX paragraph"""
+        doc = docx.Document(file)
+        for paragraph in doc.paragraphs:
+            yield paragraph.text + "\n"
+
+    def _pdf_sections(self, file: io.BytesIO, detected: Optional[DetectedFile] = None) -> Iterator[Section]:
+        """One section per PDF page"""
+        for number, text in enumerate(self._iter_pdf(file, detected), start=1):
+            yield Section(text, page=number)
+
+    def _txt_sections(self, file: io.BytesIO, detected: Optional[DetectedFile] = None) -> Iterator[Section]:
+        """One section per paragraph (blank-line separated) under the latest markdown heading"""
+        heading = None
+        paragraph = []
+        for line in self._iter_txt(file, detected):
+            match = _TEXT_HEADING.match(line)
+            if match or not line.strip():
+                if paragraph:
+                    yield Section("".join(paragraph), heading=heading)
+                    paragraph = []
+                if match:
+                    heading = match.group(1)
+                    yield Section(line, heading=heading, is_heading=True)
+                continue
+            paragraph.append(line)
+        if paragraph:
+            yield Section("".join(paragraph), heading=heading)
+
+    def _docx_sections(self, file: io.BytesIO, detected: Optional[DetectedFile] = None) -> Iterator[Section]:
+        """One section per DOCX paragraph, tagged with the heading it falls under"""
+        doc = docx.Document(file)
+        heading = None
+        for paragraph in doc.paragraphs:
+            style = paragraph.style.name if paragraph.style is not None else ""
+            if (style == "Title" or style.startswith("Heading")) and paragraph.text.strip():
+                heading = paragraph.text.strip()
+                yield Section(paragraph.text + "\n", heading=heading, is_heading=True)
+                continue
+            if paragraph.text.strip():
+                yield Section(paragraph.text + "\n", heading=heading)
+
     def _process_pdf(self, file: io.BytesIO) -> str:
         """Process PDF file and return text content"""
-        pdf_reader = PyPDF2.PdfReader(file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-    
+        return "".join(self._iter_pdf(file))
+
     def _process_txt(self, file: io.BytesIO) -> str:
         """Process text file and return content"""
-        content = file.read().decode('utf-8')
-        return content if content.endswith('\n') else content + '\n'
-    
+        return "".join(self._iter_txt(file))
+
     def _process_docx(self, file: io.BytesIO) -> str:
         """Process DOCX file and return text content"""
         try:
-            doc = docx.Document(file)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
+            return "".join(self._iter_docx(file))
         except:
             # If DOCX processing fails, try as text
             file.seek(0)
-            return self._process_txt(file) 
\ No newline at end of file
+            return self._process_txt(file)
@@ -0,0 +1,198 @@
+import json
+import time
+import typing
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from src.models.ollama_client import (
+    DEFAULT_MODEL,
+    TIMEOUT_ERROR,
+    KeepAlive,
+    build_chat_payload,
+    build_generate_payload,
+    model_not_available_error,
+    parse_models,
+)
+from src.utils.metrics import record_ollama_request, registry
+
+class AsyncOllamaClient:
+    """asyncio-native counterpart of OllamaClient for running many calls concurrently."""
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        pool_size: int = 10,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 120.0,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.base_url = base_url
+        self.client = client or httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+        self.available_models: Optional[List[str]] = None  # Fetched on first use
+        self.current_model = DEFAULT_MODEL
+
+    async def _fetch_available_models(self) -> List[str]:
+        """Fetch available models from Ollama API."""
+        try:
+            response = await self.client.get("/api/tags")
+            if response.status_code == 200:
+                return parse_models(response.json())
+            return [DEFAULT_MODEL]  # Fallback to default model
+        except Exception:
+            return [DEFAULT_MODEL]  # Fallback to default model
+
+    async def get_available_models(self) -> List[str]:
+        """Get list of available models, fetching it on first call."""
+        if self.available_models is None:
+            self.available_models = await self._fetch_available_models()
+        return self.available_models
+
+    async def is_model_available(self, model_name: str) -> bool:
+        """Check if a model is available locally."""
+        return model_name in await self.get_available_models()
+
+    async def set_model(self, model_name: str) -> bool:
+        """Set the current model to use."""
+        if await self.is_model_available(model_name):
+            self.current_model = model_name
+            return True
+        return False
+
+    async def _post(self, path: str, payload: Dict[str, typing.Any], model: str) -> Dict[str, typing.Any]:
+        """POST a non-streaming request and parse the single response."""
+        started = time.perf_counter()
+        result = await self._post_once(path, payload, model)
+        record_ollama_request(path, time.perf_counter() - started, result)
+        return result
+
+    async def _post_once(self, path: str, payload: Dict[str, typing.Any], model: str) -> Dict[str, typing.Any]:
+        try:
+            response = await self.client.post(path, json=payload)
+            if response.status_code == 200:
+                return response.json()
+            elif response.status_code == 404:
+                return model_not_available_error(model)
+            else:
+                return {"error": f"Ollama call failed with status code {response.status_code}"}
+        except httpx.TimeoutException:
+            return {"error": TIMEOUT_ERROR}
+        except Exception as e:
+            return {"error": f"Error calling Ollama API: {str(e)}"}
+
+    async def _stream(
+        self, path: str, payload: Dict[str, typing.Any], model: str
+    ) -> AsyncIterator[Dict[str, typing.Any]]:
+        """POST a streaming request and yield each NDJSON chunk as it arrives."""
+        started = time.perf_counter()
+        last: Dict[str, typing.Any] = {}
+        async for chunk in self._stream_once(path, payload, model):
+            if not last:
+                registry.observe("ollama_time_to_first_token_seconds", time.perf_counter() - started, endpoint=path)
+            last = chunk
+            yield chunk
+        record_ollama_request(path, time.perf_counter() - started, last)
+
+    async def _stream_once(
+        self, path: str, payload: Dict[str, typing.Any], model: str
+    ) -> AsyncIterator[Dict[str, typing.Any]]:
+        try:
+            async with self.client.stream("POST", path, json=payload) as response:
+                if response.status_code == 404:
+                    yield model_not_available_error(model)
+                    return
+                if response.status_code != 200:
+                    yield {"error": f"Ollama call failed with status code {response.status_code}"}
+                    return
+
+                async for line in response.aiter_lines():
+                    if not line.strip():  # Skip keep-alive newlines
+                        continue
+                    try:
+                        chunk = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield {"error": f"Failed to parse response: {str(e)}"}
+                        return
+                    yield chunk
+                    if chunk.get("done") or "error" in chunk:
+                        return
+        except httpx.TimeoutException:
+            yield {"error": TIMEOUT_ERROR}
+        except Exception as e:
+            yield {"error": f"Error calling Ollama API: {str(e)}"}
+
+    async def chat(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        context: Optional[List[Dict[str, str]]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        keep_alive: Optional[KeepAlive] = None,
+    ) -> Dict[str, typing.Any]:
+        """Send a chat message, preceded by earlier ``history`` messages, to the Ollama API."""
+        model = model or self.current_model
+        if not await self.is_model_available(model):
+            return model_not_available_error(model)
+        payload = build_chat_payload(prompt, model, system, context, history=history, keep_alive=keep_alive)
+        return await self._post("/api/chat", payload, model)
+
+    async def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        context: Optional[List[Dict[str, str]]] = None,
+        keep_alive: Optional[KeepAlive] = None,
+    ) -> Dict[str, typing.Any]:
+        """Generate text using the Ollama API."""
+        model = model or self.current_model
+        if not await self.is_model_available(model):
+            return model_not_available_error(model)
+        payload = build_generate_payload(prompt, model, system, context, keep_alive=keep_alive)
+        return await self._post("/api/generate", payload, model)
+
+    async def stream_chat(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        context: Optional[List[Dict[str, str]]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        keep_alive: Optional[KeepAlive] = None,
+    ) -> AsyncIterator[Dict[str, typing.Any]]:
+        """Stream a chat message to the Ollama API, yielding chunks as they are generated."""
+        model = model or self.current_model
+        if not await self.is_model_available(model):
+            yield model_not_available_error(model)
+            return
+        payload = build_chat_payload(
+            prompt, model, system, context, stream=True, history=history, keep_alive=keep_alive
+        )
+        async for chunk in self._stream("/api/chat", payload, model):
+            yield chunk
+
+    async def stream_generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        context: Optional[List[Dict[str, str]]] = None,
+        keep_alive: Optional[KeepAlive] = None,
+    ) -> AsyncIterator[Dict[str, typing.Any]]:
+        """Stream generated text from the Ollama API, yielding chunks as they are generated."""
+        model = model or self.current_model
+        if not await self.is_model_available(model):
+            yield model_not_available_error(model)
+            return
+        payload = build_generate_payload(prompt, model, system, context, stream=True, keep_alive=keep_alive)
+        async for chunk in self._stream("/api/generate", payload, model):
+            yield chunk
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        await self.client.aclose()
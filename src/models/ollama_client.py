@@ -1,25 +1,157 @@
 import json
+import threading
+import time
 import typing
-from typing import Dict, List, Optional
+import uuid
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterator, List, Optional
 
 import requests
 
+from src.models.scheduler import INTERACTIVE, OllamaScheduler, SchedulerBusy, request_key
+from src.models.transport import OllamaTransport, Timeout
+from src.models.warmup import KeepAlive, ModelWarmer
+from src.utils.metrics import record_ollama_request, registry
+
+DEFAULT_MODEL = "gemma3:4b"
+TIMEOUT_ERROR = "Ollama API did not respond in time. Please check that the Ollama server is healthy."
+
+def model_not_available_error(model: str) -> Dict[str, str]:
+    """Error returned when a model has not been pulled locally."""
+    return {
+        "error": f"Model '{model}' is not available locally. Please run 'ollama pull {model}' to download it."
+    }
+
+def build_chat_payload(
+    prompt: str,
+    model: str,
+    system: Optional[str] = None,
+    context: Optional[List[Dict[str, str]]] = None,
+    stream: bool = False,
+    history: Optional[List[Dict[str, str]]] = None,
+    keep_alive: Optional[KeepAlive] = None,
+) -> Dict[str, typing.Any]:
+    """Build the request body for /api/chat; ``history`` messages precede the prompt."""
+    payload = {
+        "model": model,
+        "messages": list(history or []) + [{"role": "user", "content": prompt}],
+        "stream": stream
+    }
+
+    if system:
+        payload["system"] = system
+
+    if context:
+        payload["context"] = context
+
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+
+    return payload
+
+def build_generate_payload(
+    prompt: str,
+    model: str,
+    system: Optional[str] = None,
+    context: Optional[List[Dict[str, str]]] = None,
+    stream: bool = False,
+    keep_alive: Optional[KeepAlive] = None,
+) -> Dict[str, typing.Any]:
+    """Build the request body for /api/generate."""
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": stream
+    }
+
+    if system:
+        payload["system"] = system
+
+    if context:
+        payload["context"] = context
+
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+
+    return payload
+
+def parse_models(data: Dict[str, typing.Any]) -> List[str]:
+    """Extract model names from an /api/tags response body."""
+    return [model["name"] for model in data.get("models", [])]
+
+def fetch_models(transport: OllamaTransport) -> List[str]:
+    """Fetch available models from Ollama API."""
+    try:
+        response = transport.get("/api/tags")
+        if response.status_code == 200:
+            return parse_models(response.json())
+        return [DEFAULT_MODEL]  # Fallback to default model
+    except Exception:
+        return [DEFAULT_MODEL]  # Fallback to default model
+
+class ModelCatalog:
+    """Thread-safe list of locally available models that can be shared between clients."""
+
+    def __init__(self, fetch: Callable[[], List[str]]):
+        self._fetch = fetch
+        self._models: Optional[List[str]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def models(self) -> List[str]:
+        """The cached model list, fetched on first access."""
+        with self._lock:
+            if self._models is None:
+                self._models = self._fetch()
+            return self._models
+
+    @models.setter
+    def models(self, models: List[str]) -> None:
+        with self._lock:
+            self._models = list(models)
+
+    def refresh(self) -> List[str]:
+        """Fetch the model list again, e.g. after `ollama pull`."""
+        models = self._fetch()
+        with self._lock:
+            self._models = models
+        return models
+
 class OllamaClient:
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        transport: Optional[OllamaTransport] = None,
+        catalog: Optional[ModelCatalog] = None,
+        scheduler: Optional[OllamaScheduler] = None,
+        session_id: Optional[str] = None,
+        warmer: Optional[ModelWarmer] = None,
+    ):
         self.base_url = base_url
-        self.available_models = self._fetch_available_models()
-        self.current_model = "gemma3:4b"  # Default model
+        self.transport = transport or OllamaTransport(base_url)
+        self.catalog = catalog or ModelCatalog(self._fetch_available_models)
+        self.current_model = DEFAULT_MODEL
+        # Requests go through the scheduler, if given, as this session's
+        self.scheduler = scheduler
+        self.session_id = session_id or uuid.uuid4().hex
+        # Preloads selected models and keeps the ones in use loaded
+        self.warmer = warmer
+
+    @property
+    def available_models(self) -> List[str]:
+        return self.catalog.models
+
+    @available_models.setter
+    def available_models(self, models: List[str]) -> None:
+        self.catalog.models = models
 
     def _fetch_available_models(self) -> List[str]:
         """Fetch available models from Ollama API."""
-        try:
-            response = requests.get(f"{self.base_url}/api/tags")
-            if response.status_code == 200:
-                models = response.json().get("models", [])
-                return [model["name"] for model in models]
-            return ["gemma3:4b"]  # Fallback to default model
-        except Exception:
-            return ["gemma3:4b"]  # Fallback to default model
+        return fetch_models(self.transport)
+
+    def refresh_models(self) -> List[str]:
+        """Re-fetch the list of available models."""
+        return self.catalog.refresh()
 
     def is_model_available(self, model_name: str) -> bool:
         """Check if a model is available locally."""
@@ -39,7 +171,7 @@ class OllamaClient:
                 for line in lines:
                     if line.strip():  # Skip empty lines
                         parsed_responses.append(json.loads(line))
-                
+
                 # If we have multiple responses, return the last one
                 if parsed_responses:
                     return parsed_responses[-1]
@@ -47,97 +179,216 @@ class OllamaClient:
             except json.JSONDecodeError:
                 return {"error": f"Failed to parse response: {str(e)}"}
 
-    def chat(
+    def _slot(self, model: str, priority: int):
+        """Concurrency slot for a request; a no-op without a scheduler."""
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(model, self.session_id, priority)
+
+    def _post(
         self,
-        prompt: str,
-        model: Optional[str] = None,
-        system: Optional[str] = None,
-        context: Optional[List[Dict[str, str]]] = None,
+        path: str,
+        payload: Dict[str, typing.Any],
+        model: str,
+        timeout: Optional[Timeout] = None,
+        priority: int = INTERACTIVE,
     ) -> Dict[str, typing.Any]:
-        """Send a chat message to the Ollama API."""
-        if model is None:
-            model = self.current_model
+        """POST a non-streaming request and parse the single response."""
+        def send() -> Dict[str, typing.Any]:
+            with self._slot(model, priority):
+                return self._send(path, payload, model, timeout)
 
-        if not self.is_model_available(model):
-            return {
-                "error": f"Model '{model}' is not available locally. Please run 'ollama pull {model}' to download it."
-            }
-
-        url = f"{self.base_url}/api/chat"
-        payload = {
-            "model": model,
-            "messages": [{"role": "user", "content": prompt}],
-            "stream": False  # Ensure we get a single response
-        }
+        try:
+            if self.scheduler is None:
+                return send()
+            return self.scheduler.coalesce(request_key(path, payload), send)
+        except SchedulerBusy as e:
+            return {"error": str(e)}
 
-        if system:
-            payload["system"] = system
+    def _send(
+        self, path: str, payload: Dict[str, typing.Any], model: str, timeout: Optional[Timeout] = None
+    ) -> Dict[str, typing.Any]:
+        started = time.perf_counter()
+        result = self._post_once(path, payload, model, timeout)
+        record_ollama_request(path, time.perf_counter() - started, result)
+        self._touch(model, result)
+        return result
 
-        if context:
-            payload["context"] = context
+    def _touch(self, model: str, result: Dict[str, typing.Any]) -> None:
+        if self.warmer is not None:
+            self.warmer.touch(model, loaded="error" not in result)
 
+    def _post_once(
+        self, path: str, payload: Dict[str, typing.Any], model: str, timeout: Optional[Timeout] = None
+    ) -> Dict[str, typing.Any]:
         try:
-            response = requests.post(url, json=payload)
+            response = self.transport.post(path, json=payload, timeout=timeout)
             if response.status_code == 200:
                 return self._parse_response(response)
             elif response.status_code == 404:
-                return {
-                    "error": f"Model '{model}' is not available locally. Please run 'ollama pull {model}' to download it."
-                }
+                return model_not_available_error(model)
             else:
                 return {"error": f"Ollama call failed with status code {response.status_code}"}
+        except requests.Timeout:
+            return {"error": TIMEOUT_ERROR}
         except Exception as e:
             return {"error": f"Error calling Ollama API: {str(e)}"}
 
+    def chat(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        context: Optional[List[Dict[str, str]]] = None,
+        timeout: Optional[Timeout] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        keep_alive: Optional[KeepAlive] = None,
+        priority: int = INTERACTIVE,
+    ) -> Dict[str, typing.Any]:
+        """Send a chat message, preceded by earlier ``history`` messages, to the Ollama API."""
+        if model is None:
+            model = self.current_model
+
+        if not self.is_model_available(model):
+            return model_not_available_error(model)
+
+        payload = build_chat_payload(prompt, model, system, context, history=history, keep_alive=keep_alive)
+        return self._post("/api/chat", payload, model, timeout, priority)
+
     def generate(
         self,
         prompt: str,
         model: Optional[str] = None,
         system: Optional[str] = None,
         context: Optional[List[Dict[str, str]]] = None,
+        timeout: Optional[Timeout] = None,
+        keep_alive: Optional[KeepAlive] = None,
+        priority: int = INTERACTIVE,
     ) -> Dict[str, typing.Any]:
         """Generate text using the Ollama API."""
         if model is None:
             model = self.current_model
 
         if not self.is_model_available(model):
-            return {
-                "error": f"Model '{model}' is not available locally. Please run 'ollama pull {model}' to download it."
-            }
-
-        url = f"{self.base_url}/api/generate"
-        payload = {
-            "model": model,
-            "prompt": prompt,
-            "stream": False  # Ensure we get a single response
-        }
+            return model_not_available_error(model)
 
-        if system:
-            payload["system"] = system
+        payload = build_generate_payload(prompt, model, system, context, keep_alive=keep_alive)
+        return self._post("/api/generate", payload, model, timeout, priority)
 
-        if context:
-            payload["context"] = context
+    def _stream(
+        self,
+        path: str,
+        payload: Dict[str, typing.Any],
+        model: str,
+        timeout: Optional[Timeout] = None,
+        priority: int = INTERACTIVE,
+    ) -> Iterator[Dict[str, typing.Any]]:
+        """POST a streaming request and yield each NDJSON chunk as it arrives."""
+        try:
+            # The slot is held until the stream ends or is closed
+            with self._slot(model, priority):
+                started = time.perf_counter()
+                last: Dict[str, typing.Any] = {}
+                for chunk in self._stream_once(path, payload, model, timeout):
+                    if not last:
+                        registry.observe(
+                            "ollama_time_to_first_token_seconds", time.perf_counter() - started, endpoint=path
+                        )
+                    last = chunk
+                    yield chunk
+                record_ollama_request(path, time.perf_counter() - started, last)
+                self._touch(model, last)
+        except SchedulerBusy as e:
+            yield {"error": str(e)}
 
+    def _stream_once(
+        self, path: str, payload: Dict[str, typing.Any], model: str, timeout: Optional[Timeout] = None
+    ) -> Iterator[Dict[str, typing.Any]]:
         try:
-            response = requests.post(url, json=payload)
-            if response.status_code == 200:
-                return self._parse_response(response)
-            elif response.status_code == 404:
-                return {
-                    "error": f"Model '{model}' is not available locally. Please run 'ollama pull {model}' to download it."
-                }
-            else:
-                return {"error": f"Ollama call failed with status code {response.status_code}"}
+            with self.transport.post(path, json=payload, stream=True, timeout=timeout) as response:
+                if response.status_code == 404:
+                    yield model_not_available_error(model)
+                    return
+                if response.status_code != 200:
+                    yield {"error": f"Ollama call failed with status code {response.status_code}"}
+                    return
+
+                for line in response.iter_lines():
+                    if not line:  # Skip keep-alive newlines
+                        continue
+                    try:
+                        chunk = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield {"error": f"Failed to parse response: {str(e)}"}
+                        return
+                    yield chunk
+                    if chunk.get("done") or "error" in chunk:
+                        return
+        except requests.Timeout:
+            yield {"error": TIMEOUT_ERROR}
         except Exception as e:
-            return {"error": f"Error calling Ollama API: {str(e)}"}
+            yield {"error": f"Error calling Ollama API: {str(e)}"}
+
+    def stream_chat(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        context: Optional[List[Dict[str, str]]] = None,
+        timeout: Optional[Timeout] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        keep_alive: Optional[KeepAlive] = None,
+        priority: int = INTERACTIVE,
+    ) -> Iterator[Dict[str, typing.Any]]:
+        """Stream a chat message to the Ollama API, yielding chunks as they are generated."""
+        if model is None:
+            model = self.current_model
+
+        if not self.is_model_available(model):
+            yield model_not_available_error(model)
+            return
+
+        payload = build_chat_payload(
+            prompt, model, system, context, stream=True, history=history, keep_alive=keep_alive
+        )
+        yield from self._stream("/api/chat", payload, model, timeout, priority)
+
+    def stream_generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        context: Optional[List[Dict[str, str]]] = None,
+        timeout: Optional[Timeout] = None,
+        keep_alive: Optional[KeepAlive] = None,
+        priority: int = INTERACTIVE,
+    ) -> Iterator[Dict[str, typing.Any]]:
+        """Stream generated text from the Ollama API, yielding chunks as they are generated."""
+        if model is None:
+            model = self.current_model
+
+        if not self.is_model_available(model):
+            yield model_not_available_error(model)
+            return
+
+        payload = build_generate_payload(prompt, model, system, context, stream=True, keep_alive=keep_alive)
+        yield from self._stream("/api/generate", payload, model, timeout, priority)
 
     def get_available_models(self) -> List[str]:
         """Get list of available models."""
         return self.available_models
 
     def set_model(self, model_name: str) -> bool:
-        """Set the current model to use."""
+        """Set the current model to use and start loading it, if there is a warmer."""
         if model_name in self.available_models:
             self.current_model = model_name
+            if self.warmer is not None:
+                self.warmer.warm(model_name)
             return True
-        return False 
\ No newline at end of file
+        return False
+
+    def model_state(self, model: Optional[str] = None) -> Optional[str]:
+        """Load state of a model (cold, loading or warm); None without a warmer."""
+        if self.warmer is None:
+            return None
+        return self.warmer.status(model or self.current_model).state
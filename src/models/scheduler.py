@@ -0,0 +1,188 @@
+import hashlib
+import json
+import threading
+import time
+import typing
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+from src.utils.metrics import registry
+
+# Lower values are served first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+BUSY_ERROR = "Ollama is busy with other requests. Please try again in a moment."
+
+T = TypeVar("T")
+
+class SchedulerBusy(Exception):
+    """The request was not admitted: the queue is full or the wait timed out."""
+
+def request_key(path: str, payload: Dict[str, typing.Any]) -> str:
+    """Identity of a request for coalescing; identical prompts get identical keys."""
+    body = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{path}\n{body}".encode("utf-8")).hexdigest()
+
+@dataclass
+class _Waiter:
+    session: str
+    priority: int
+    granted: threading.Event = field(default_factory=threading.Event)
+
+class _ModelQueue:
+    """Waiters for one model: by priority, then round-robin across sessions."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.running = 0
+        self.waiting: Dict[int, "OrderedDict[str, Deque[_Waiter]]"] = {}
+        self.depth = 0
+
+    def push(self, waiter: _Waiter) -> None:
+        sessions = self.waiting.setdefault(waiter.priority, OrderedDict())
+        sessions.setdefault(waiter.session, deque()).append(waiter)
+        self.depth += 1
+
+    def pop(self) -> Optional[_Waiter]:
+        for priority in sorted(self.waiting):
+            sessions = self.waiting[priority]
+            if not sessions:
+                continue
+            session, queue = next(iter(sessions.items()))
+            waiter = queue.popleft()
+            # The session goes to the back, so one busy session cannot starve the others
+            del sessions[session]
+            if queue:
+                sessions[session] = queue
+            self.depth -= 1
+            return waiter
+        return None
+
+    def remove(self, waiter: _Waiter) -> None:
+        queue = self.waiting.get(waiter.priority, {}).get(waiter.session)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self.waiting[waiter.priority][waiter.session]
+            self.depth -= 1
+
+class OllamaScheduler:
+    """Client-side admission control shared by every OllamaClient of a server.
+
+    At most ``max_concurrency`` requests per model (``per_model`` overrides
+    it for individual models) run at once; the rest wait in a queue that
+    serves interactive requests before background ones and rotates between
+    sessions. Requests are refused with SchedulerBusy once ``max_queue``
+    are waiting for a model, or after waiting ``queue_timeout`` seconds.
+    Identical non-streaming requests in flight at the same time are sent
+    once and share the response.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 2,
+        per_model: Optional[Dict[str, int]] = None,
+        max_queue: int = 32,
+        queue_timeout: float = 60.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_model = dict(per_model or {})
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        registry.gauge("ollama_queue_depth", self.queue_depth)
+        registry.gauge("ollama_running_requests", self.running)
+
+    def _queue(self, model: str) -> _ModelQueue:
+        if model not in self._queues:
+            self._queues[model] = _ModelQueue(self.per_model.get(model, self.max_concurrency))
+        return self._queues[model]
+
+    def _total(self, attribute: str, model: Optional[str]) -> int:
+        with self._lock:
+            if model is None:
+                queues = list(self._queues.values())
+            else:
+                queues = [self._queues[model]] if model in self._queues else []
+            return sum(getattr(queue, attribute) for queue in queues)
+
+    def queue_depth(self, model: Optional[str] = None) -> int:
+        """Requests waiting for a slot, for one model or all of them."""
+        return self._total("depth", model)
+
+    def running(self, model: Optional[str] = None) -> int:
+        """Requests currently holding a slot, for one model or all of them."""
+        return self._total("running", model)
+
+    @contextmanager
+    def slot(self, model: str, session: str = "default", priority: int = INTERACTIVE) -> Iterator[None]:
+        """Hold one of the model's concurrency slots for the duration of the block."""
+        self._acquire(model, session, priority)
+        try:
+            yield
+        finally:
+            self._release(model)
+
+    def _acquire(self, model: str, session: str, priority: int) -> None:
+        labels = {"model": model, "priority": PRIORITY_NAMES.get(priority, str(priority))}
+        start = time.perf_counter()
+        with self._lock:
+            queue = self._queue(model)
+            if queue.running < queue.limit and not queue.depth:
+                queue.running += 1
+                registry.observe("ollama_queue_wait_seconds", 0.0, **labels)
+                return
+            if queue.depth >= self.max_queue:
+                registry.inc("ollama_rejected_total", reason="queue full", **labels)
+                raise SchedulerBusy(BUSY_ERROR)
+            waiter = _Waiter(session, priority)
+            queue.push(waiter)
+
+        if not waiter.granted.wait(self.queue_timeout):
+            with self._lock:
+                # The slot may have been handed over just as the wait timed out
+                if not waiter.granted.is_set():
+                    queue.remove(waiter)
+                    registry.inc("ollama_rejected_total", reason="timeout", **labels)
+                    raise SchedulerBusy(BUSY_ERROR)
+        registry.observe("ollama_queue_wait_seconds", time.perf_counter() - start, **labels)
+
+    def _release(self, model: str) -> None:
+        with self._lock:
+            queue = self._queues[model]
+            waiter = queue.pop()
+            if waiter is None:
+                queue.running -= 1
+            else:
+                # Hand the slot straight to the next waiter
+                waiter.granted.set()
+
+    def coalesce(self, key: str, send: Callable[[], T]) -> T:
+        """Run send(), unless an identical request is in flight; then share its result."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+
+        if not leader:
+            registry.inc("ollama_coalesced_total")
+            return future.result()
+
+        try:
+            result = send()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
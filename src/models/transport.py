@@ -0,0 +1,56 @@
+import typing
+from typing import Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+Timeout = Union[float, Tuple[float, float]]
+
+class OllamaTransport:
+    """Pooled keep-alive HTTP transport shared by every call of an OllamaClient."""
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        pool_size: int = 10,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 120.0,
+        max_retries: int = 2,
+        backoff_factor: float = 0.25,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+
+        # Retry connection errors and 5xx responses with exponential backoff.
+        # POST is included because Ollama generation requests are idempotent.
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _resolve_timeout(self, timeout: Optional[Timeout]) -> Timeout:
+        return self.timeout if timeout is None else timeout
+
+    def get(self, path: str, timeout: Optional[Timeout] = None, **kwargs: typing.Any) -> requests.Response:
+        """Send a GET request to the Ollama server."""
+        return self.session.get(f"{self.base_url}{path}", timeout=self._resolve_timeout(timeout), **kwargs)
+
+    def post(self, path: str, timeout: Optional[Timeout] = None, **kwargs: typing.Any) -> requests.Response:
+        """Send a POST request to the Ollama server."""
+        return self.session.post(f"{self.base_url}{path}", timeout=self._resolve_timeout(timeout), **kwargs)
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
@@ -0,0 +1,192 @@
+import re
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple, Union
+
+from src.models.transport import OllamaTransport
+from src.utils.metrics import registry
+
+# How long Ollama keeps a model (and its KV cache) loaded after a request,
+# e.g. "30m", a number of seconds, or -1 to keep it loaded indefinitely
+KeepAlive = Union[str, float]
+
+# Load states reported per model
+COLD = "cold"
+LOADING = "loading"
+WARM = "warm"
+
+# Ollama unloads an idle model after this long unless told otherwise
+DEFAULT_SERVER_KEEP_ALIVE = 300.0
+_DURATION = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*([smh]?)\s*$")
+_UNITS = {"": 1.0, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+def keep_alive_seconds(keep_alive: Optional[KeepAlive]) -> float:
+    """Seconds a keep_alive value keeps a model loaded; negative values mean forever."""
+    if keep_alive is None:
+        return DEFAULT_SERVER_KEEP_ALIVE
+    if isinstance(keep_alive, str):
+        match = _DURATION.match(keep_alive)
+        if not match:
+            raise ValueError(f"Unsupported keep_alive: {keep_alive!r}")
+        seconds = float(match.group(1)) * _UNITS[match.group(2)]
+    else:
+        seconds = float(keep_alive)
+    return float("inf") if seconds < 0 else seconds
+
+@dataclass
+class ModelState:
+    state: str = COLD
+    # When a request last used the model, and when the server last heard of it
+    last_used: float = 0.0
+    last_contact: float = 0.0
+    load_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+class ModelWarmer:
+    """Keeps the models sessions have selected loaded on the Ollama server.
+
+    ``warm`` preloads a model in the background, with an empty request
+    that makes Ollama load it without generating anything, so the first
+    question does not wait for the load. While a model is in use (a
+    request within ``idle_timeout`` seconds) it is pinged every
+    ``interval`` seconds, so pauses longer than ``keep_alive`` do not
+    unload it. Models not heard of for ``keep_alive`` are reported cold,
+    since the server will have unloaded them.
+    """
+
+    def __init__(
+        self,
+        transport: OllamaTransport,
+        keep_alive: KeepAlive = "30m",
+        interval: float = 240.0,
+        idle_timeout: float = 3600.0,
+        load_timeout: float = 600.0,
+    ):
+        self.transport = transport
+        self.keep_alive = keep_alive
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self.load_timeout = load_timeout
+        self._states: Dict[str, ModelState] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _state(self, model: str) -> ModelState:
+        if model not in self._states:
+            self._states[model] = ModelState()
+        return self._states[model]
+
+    def _expire(self, state: ModelState, now: float) -> None:
+        if state.state == WARM and now - state.last_contact >= keep_alive_seconds(self.keep_alive):
+            state.state = COLD
+
+    def status(self, model: str) -> ModelState:
+        """A snapshot of the model's load state."""
+        with self._lock:
+            state = self._state(model)
+            self._expire(state, time.time())
+            return replace(state)
+
+    def warm(self, model: str) -> bool:
+        """Start loading the model in the background; False if it is already loaded or loading."""
+        with self._lock:
+            state = self._state(model)
+            now = time.time()
+            self._expire(state, now)
+            # Selecting a model counts as using it, so it is kept loaded from now on
+            state.last_used = now
+            if state.state != COLD:
+                return False
+            state.state = LOADING
+            state.error = None
+        self._start()
+        threading.Thread(target=self._load, args=(model,), daemon=True, name=f"warm-{model}").start()
+        return True
+
+    def touch(self, model: str, loaded: bool = True) -> None:
+        """Record a request for the model; ``loaded`` once the server has answered it."""
+        with self._lock:
+            state = self._state(model)
+            now = time.time()
+            state.last_used = now
+            if loaded:
+                state.last_contact = now
+                if state.state == COLD:
+                    state.state = WARM
+        self._start()
+
+    def _ping(self, model: str) -> Optional[Tuple[str, str]]:
+        """Ask the server to load the model and keep it; a (kind, message) pair on failure."""
+        payload = {"model": model, "keep_alive": self.keep_alive}
+        try:
+            response = self.transport.post("/api/generate", json=payload, timeout=self.load_timeout)
+        except Exception as e:
+            return type(e).__name__, f"Error calling Ollama API: {str(e)}"
+        if response.status_code == 404:
+            return "not available", f"Model '{model}' is not available locally."
+        if response.status_code != 200:
+            return f"status {response.status_code}", f"Ollama call failed with status code {response.status_code}"
+        return None
+
+    def _load(self, model: str) -> None:
+        started = time.perf_counter()
+        error = self._ping(model)
+        seconds = time.perf_counter() - started
+        with self._lock:
+            state = self._state(model)
+            if error is None:
+                state.state = WARM
+                state.last_contact = time.time()
+                state.load_seconds = seconds
+            else:
+                state.state = COLD
+                state.error = error[1]
+        if error is None:
+            registry.observe("ollama_model_load_seconds", seconds, model=model)
+        else:
+            registry.inc("ollama_warmup_errors_total", model=model, error=error[0])
+
+    def _due(self) -> List[str]:
+        """Models in use whose keep-alive should be renewed now."""
+        now = time.time()
+        with self._lock:
+            return [
+                model
+                for model, state in self._states.items()
+                if state.state == WARM
+                and now - state.last_used < self.idle_timeout
+                and now - state.last_contact >= self.interval
+            ]
+
+    def keep_alive_once(self) -> List[str]:
+        """Ping every model that is due; return the models pinged."""
+        due = self._due()
+        for model in due:
+            error = self._ping(model)
+            with self._lock:
+                state = self._state(model)
+                if error is None:
+                    state.last_contact = time.time()
+                else:
+                    state.state = COLD
+                    state.error = error[1]
+            registry.inc("ollama_keepalive_pings_total", model=model, outcome="ok" if error is None else "error")
+        return due
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None or self._stop.is_set():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name="ollama-keepalive")
+        self._thread.start()
+
+    def _run(self) -> None:
+        # Check a few times per interval, so a model is pinged close to when it is due
+        while not self._stop.wait(max(self.interval / 4, 0.01)):
+            self.keep_alive_once()
+
+    def close(self) -> None:
+        """Stop the keep-alive thread; loads already started still finish."""
+        self._stop.set()
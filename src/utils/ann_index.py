@@ -0,0 +1,150 @@
+import math
+import time
+from typing import Dict, List, Optional, Sequence
+
+import faiss
+import numpy as np
+
+# faiss index_factory strings; {nlist} and {m} are filled in from the corpus
+BACKENDS: Dict[str, str] = {
+    "flat": "Flat",
+    "sq_fp16": "SQfp16",
+    "sq8": "SQ8",
+    "hnsw": "HNSW32",
+    "ivf_flat": "IVF{nlist},Flat",
+    "ivf_sq8": "IVF{nlist},SQ8",
+    "ivf_pq": "IVF{nlist},PQ{m}x8",
+}
+# Below these sizes a backend cannot be trained well and flat is used instead
+MIN_VECTORS: Dict[str, int] = {
+    "ivf_flat": 2_000,
+    "ivf_sq8": 2_000,
+    "ivf_pq": 10_000,
+}
+# Corpus sizes at which "auto" switches backend. Flat search over 20k
+# 384-d vectors takes a few ms; beyond that IVF keeps latency flat, with
+# int8 and then product-quantized storage bounding memory.
+AUTO_THRESHOLDS = [(20_000, "flat"), (200_000, "ivf_sq8")]
+AUTO_LARGE_BACKEND = "ivf_pq"
+
+def choose_backend(n_vectors: int) -> str:
+    """Backend "auto" resolves to for a corpus of n_vectors."""
+    for limit, backend in AUTO_THRESHOLDS:
+        if n_vectors < limit:
+            return backend
+    return AUTO_LARGE_BACKEND
+
+def effective_backend(backend: str, n_vectors: int) -> str:
+    """Resolve "auto" and fall back to flat when there is too little data to train."""
+    if backend == "auto":
+        backend = choose_backend(n_vectors)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown index backend '{backend}'. Choose from: auto, {', '.join(BACKENDS)}")
+    if n_vectors < MIN_VECTORS.get(backend, 0):
+        return "flat"
+    return backend
+
+def _nlist(n_vectors: int) -> int:
+    # ~4*sqrt(n) inverted lists, with at least 39 training points per list
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+def _factory_string(backend: str, n_vectors: int, dim: int) -> str:
+    nlist = _nlist(n_vectors)
+    # 8-bit sub-quantizers over (ideally) 8 dimensions each: 48 bytes per
+    # 384-d vector instead of 1536. Recall drops noticeably; check the
+    # benchmark_backends report before choosing it over ivf_sq8.
+    m = next(m for m in (dim // 8, dim // 4, dim // 2, dim) if m and dim % m == 0)
+    return BACKENDS[backend].format(nlist=nlist, m=m)
+
+def build_ann_index(
+    vectors: np.ndarray,
+    backend: str = "auto",
+    train_size: int = 50_000,
+    nprobe: int = 16,
+    ef_search: int = 64,
+    seed: int = 0,
+) -> faiss.Index:
+    """Build an index over vectors, training it on a random sample when needed.
+
+    Vectors keep their row position as their id, matching the id order the
+    LangChain FAISS wrapper expects.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n_vectors, dim = vectors.shape
+    backend = effective_backend(backend, n_vectors)
+    index = faiss.index_factory(dim, _factory_string(backend, n_vectors, dim), faiss.METRIC_L2)
+
+    if not index.is_trained:
+        # faiss wants at least 39 training points per inverted list
+        sample_size = max(train_size, 39 * _nlist(n_vectors))
+        sample = vectors
+        if n_vectors > sample_size:
+            rows = np.random.default_rng(seed).choice(n_vectors, sample_size, replace=False)
+            sample = vectors[np.sort(rows)]
+        index.train(sample)
+
+    index.add(vectors)
+    set_search_params(index, nprobe=nprobe, ef_search=ef_search)
+    return index
+
+def set_search_params(index: faiss.Index, nprobe: int = 16, ef_search: int = 64) -> None:
+    """Apply the query-time recall/latency knobs of whichever index type this is."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = nprobe
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+
+def index_bytes(index: faiss.Index) -> int:
+    """Serialized size of an index, a close proxy for its memory footprint."""
+    return int(faiss.serialize_index(index).nbytes)
+
+def benchmark_backends(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    backends: Optional[Sequence[str]] = None,
+    k: int = 10,
+    **build_kwargs,
+) -> List[Dict[str, float]]:
+    """Recall@k against exact search, per-query latency and size for each backend."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    k = min(k, len(vectors))
+    exact = build_ann_index(vectors, "flat")
+    _, truth = exact.search(queries, k)
+
+    rows = []
+    for backend in backends or list(BACKENDS):
+        start = time.perf_counter()
+        index = exact if backend == "flat" else build_ann_index(vectors, backend, **build_kwargs)
+        build_seconds = time.perf_counter() - start
+
+        latencies = []
+        found = []
+        for query in queries:
+            start = time.perf_counter()
+            _, ids = index.search(query[None, :], k)
+            latencies.append(time.perf_counter() - start)
+            found.append(ids[0])
+
+        hits = sum(len(set(ids) & set(expected)) for ids, expected in zip(found, truth))
+        rows.append({
+            "backend": backend,
+            "resolved": effective_backend(backend, len(vectors)),
+            "recall": hits / (k * len(queries)),
+            "mean_ms": 1000 * float(np.mean(latencies)),
+            "p95_ms": 1000 * float(np.percentile(latencies, 95)),
+            "build_s": build_seconds,
+            "megabytes": index_bytes(index) / 1e6,
+        })
+    return rows
+
+def format_report(rows: List[Dict[str, float]]) -> str:
+    """Render benchmark_backends rows as a text table."""
+    lines = [f"{'backend':<10} {'used':<10} {'recall':>7} {'mean ms':>8} {'p95 ms':>8} {'build s':>8} {'MB':>8}"]
+    for row in rows:
+        lines.append(
+            f"{row['backend']:<10} {row['resolved']:<10} {row['recall']:>7.3f} {row['mean_ms']:>8.3f} "
+            f"{row['p95_ms']:>8.3f} {row['build_s']:>8.2f} {row['megabytes']:>8.1f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,90 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+# Words plus identifiers such as "E42", "XR-200" or "v1.2.3"
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase terms; compound identifiers are also indexed by their parts."""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token)
+        parts = re.split(r"[-_./]", token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+    return tokens
+
+class BM25Index:
+    """Inverted index scoring chunks with Okapi BM25.
+
+    Complements dense retrieval on exact matches (part numbers, error codes)
+    that embeddings tend to blur. Chunks can be added and removed
+    incrementally, mirroring the FAISS store they sit beside.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.lengths: Dict[str, int] = {}
+        self._terms: Dict[str, List[str]] = {}  # Chunk id -> its distinct terms, for removal
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def add(self, chunk_id: str, text: str) -> None:
+        """Index a chunk, replacing any previous text stored under the same id."""
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self._remove(chunk_id)
+            for term, frequency in terms.items():
+                self.postings[term][chunk_id] = frequency
+            length = sum(terms.values())
+            self.lengths[chunk_id] = length
+            self._terms[chunk_id] = list(terms)
+            self._total_length += length
+
+    def remove(self, chunk_ids: Iterable[str]) -> None:
+        with self._lock:
+            for chunk_id in chunk_ids:
+                self._remove(chunk_id)
+
+    def _remove(self, chunk_id: str) -> None:
+        length = self.lengths.pop(chunk_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._terms.pop(chunk_id):
+            del self.postings[term][chunk_id]
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.postings.clear()
+            self.lengths.clear()
+            self._terms.clear()
+            self._total_length = 0
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """The k best (chunk id, score) pairs, highest score first."""
+        with self._lock:
+            if not self.lengths:
+                return []
+            count = len(self.lengths)
+            average_length = self._total_length / count
+            scores: Dict[str, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[chunk_id] / average_length)
+                    scores[chunk_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
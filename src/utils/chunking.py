@@ -0,0 +1,201 @@
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.document_processor.processor import Section
+
+TokenCounter = Callable[[str], int]
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\w+")
+
+@dataclass
+class Chunk:
+    text: str
+    tokens: int
+    page: Optional[int] = None
+    heading: Optional[str] = None
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Structure to store with the chunk in the vector store."""
+        return {key: value for key, value in (("page", self.page), ("heading", self.heading)) if value is not None}
+
+@dataclass
+class ChunkStats:
+    chunks: int = 0
+    sections: int = 0
+    duplicates: int = 0
+    total_tokens: int = 0
+    min_tokens: int = 0
+    max_tokens: int = 0
+
+    @property
+    def mean_tokens(self) -> float:
+        return self.total_tokens / self.chunks if self.chunks else 0.0
+
+    def add(self, chunk: Chunk) -> None:
+        self.min_tokens = min(self.min_tokens, chunk.tokens) if self.chunks else chunk.tokens
+        self.max_tokens = max(self.max_tokens, chunk.tokens)
+        self.chunks += 1
+        self.total_tokens += chunk.tokens
+
+def simhash(text: str, bits: int = 64) -> int:
+    """Locality-sensitive hash of a text's word 3-shingles; similar texts differ in few bits."""
+    words = _WORD.findall(text.lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+    weights = [0] * bits
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(bits):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(bits) if weights[bit] > 0)
+
+class NearDuplicateFilter:
+    """Remembers simhashes and flags texts within ``max_distance`` bits of one already seen.
+
+    The 64-bit hash is split into ``max_distance + 1`` bands; by the
+    pigeonhole principle a near duplicate matches at least one band
+    exactly, so only hashes sharing a band are compared.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self._band_bits = 64 // (max_distance + 1)
+        self._bands: Dict[Tuple[int, int], List[int]] = {}
+
+    def _keys(self, value: int) -> List[Tuple[int, int]]:
+        mask = (1 << self._band_bits) - 1
+        return [(band, value >> (band * self._band_bits) & mask) for band in range(self.max_distance + 1)]
+
+    def seen(self, text: str) -> bool:
+        """True if a near-identical text was seen before; otherwise remember this one."""
+        value = simhash(text)
+        keys = self._keys(value)
+        for key in keys:
+            for other in self._bands.get(key, ()):
+                if bin(value ^ other).count("1") <= self.max_distance:
+                    return True
+        for key in keys:
+            self._bands.setdefault(key, []).append(value)
+        return False
+
+class StructuredChunker:
+    """Packs extracted sections into chunks measured in embedding-model tokens.
+
+    Chunks never cross a heading, and cross a page only while still smaller
+    than ``min_tokens``. Text is packed by paragraph, falling back to
+    sentences and then words for pieces longer than ``max_tokens``, so
+    chunks end on natural boundaries. ``overlap_tokens`` repeats that many
+    tokens of trailing sentences at the start of the next chunk. Chunks
+    under a heading start with it, so the heading is embedded with them.
+    Near-identical chunks (repeated headers, boilerplate) are dropped.
+    """
+
+    def __init__(
+        self,
+        count_tokens: TokenCounter,
+        max_tokens: int = 256,
+        min_tokens: int = 32,
+        overlap_tokens: int = 0,
+        dedupe_distance: Optional[int] = 3,
+    ):
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.overlap_tokens = overlap_tokens
+        self.dedupe_distance = dedupe_distance
+
+    def _pieces(self, text: str, budget: int) -> Iterator[Tuple[str, int]]:
+        """Split text into (piece, tokens) pairs of at most budget tokens each."""
+        for paragraph in _PARAGRAPH_BREAK.split(text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            tokens = self.count_tokens(paragraph)
+            if tokens <= budget:
+                yield paragraph, tokens
+                continue
+            for sentence in _SENTENCE_END.split(paragraph):
+                tokens = self.count_tokens(sentence)
+                if tokens <= budget:
+                    yield sentence, tokens
+                    continue
+                yield from self._word_windows(sentence, budget)
+
+    def _word_windows(self, text: str, budget: int) -> Iterator[Tuple[str, int]]:
+        window: List[str] = []
+        for word in text.split():
+            candidate = " ".join(window + [word])
+            if window and self.count_tokens(candidate) > budget:
+                piece = " ".join(window)
+                yield piece, self.count_tokens(piece)
+                window = []
+            window.append(word)
+        if window:
+            piece = " ".join(window)
+            yield piece, self.count_tokens(piece)
+
+    def chunk(self, sections: Iterable[Section], stats: Optional[ChunkStats] = None) -> Iterator[Chunk]:
+        """Yield chunks as sections stream in; ``stats`` is updated as they go."""
+        stats = stats if stats is not None else ChunkStats()
+        duplicates = NearDuplicateFilter(self.dedupe_distance) if self.dedupe_distance is not None else None
+
+        pieces: List[Tuple[str, int]] = []
+        size = 0
+        carried_count = 0  # Leading pieces repeated from the previous chunk
+        page: Optional[int] = None
+        heading: Optional[str] = None
+
+        def flush() -> Iterator[Chunk]:
+            nonlocal pieces, size, carried_count
+            if not pieces:
+                return
+            body = " ".join(piece for piece, _ in pieces)
+            text = f"{heading}\n{body}" if heading else body
+            chunk = Chunk(text=text, tokens=size + self._heading_tokens(heading), page=page, heading=heading)
+            if duplicates is not None and duplicates.seen(body):
+                stats.duplicates += 1
+            else:
+                stats.add(chunk)
+                yield chunk
+            # Carry trailing pieces into the next chunk as overlap
+            carried: List[Tuple[str, int]] = []
+            carried_size = 0
+            for piece, tokens in reversed(pieces):
+                if carried_size + tokens > self.overlap_tokens:
+                    break
+                carried.insert(0, (piece, tokens))
+                carried_size += tokens
+            pieces, size, carried_count = carried, carried_size, len(carried)
+
+        for section in sections:
+            stats.sections += 1
+            if section.is_heading:
+                continue
+            new_heading = section.heading != heading
+            new_page = section.page != page and size >= self.min_tokens
+            if pieces and (new_heading or new_page):
+                yield from flush()
+                pieces, size, carried_count = [], 0, 0  # No overlap across structural boundaries
+            if not pieces:
+                page, heading = section.page, section.heading
+
+            budget = self.max_tokens - self._heading_tokens(heading)
+            for piece, tokens in self._pieces(section.text, budget):
+                if pieces and size + tokens > budget:
+                    if len(pieces) == carried_count:
+                        # Only overlap so far and no room: drop it rather than emit it twice
+                        pieces, size, carried_count = [], 0, 0
+                    else:
+                        yield from flush()
+                    page = section.page
+                pieces.append((piece, tokens))
+                size += tokens
+
+        yield from flush()
+
+    def _heading_tokens(self, heading: Optional[str]) -> int:
+        return self.count_tokens(heading) + 1 if heading else 0
@@ -0,0 +1,183 @@
+import os
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.models.transport import OllamaTransport
+from src.utils.embedding_names import DEFAULT_BACKEND, embedding_id, hub_repo  # noqa: F401 (re-exported)
+
+# Sentence-transformers repos ship an ONNX export of the model here
+DEFAULT_ONNX_FILE = "onnx/model.onnx"
+# all-MiniLM-L6-v2 was trained on up to 256 tokens
+MAX_SEQ_LENGTH = 256
+# Ollama's names for the same models
+OLLAMA_MODEL_NAMES = {"all-MiniLM-L6-v2": "all-minilm"}
+
+def length_buckets(lengths: Sequence[int], batch_size: int) -> List[List[int]]:
+    """Indices grouped into batches of similar length, so little padding is needed."""
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+class OnnxEmbeddings(Embeddings):
+    """A sentence-transformers model run by ONNX Runtime on CPU.
+
+    The model's ONNX export is downloaded from the Hub and, with
+    ``quantize``, converted once to int8 weights under ``cache_dir``.
+    Texts are batched by token length and each batch is padded only to
+    its longest text. Embeddings are mean-pooled and L2-normalized, like
+    the sentence-transformers pipeline of all-MiniLM-L6-v2.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 32,
+        threads: Optional[int] = None,
+        quantize: bool = True,
+        onnx_file: str = DEFAULT_ONNX_FILE,
+        cache_dir: str = ".cache/onnx",
+        max_length: int = MAX_SEQ_LENGTH,
+    ):
+        try:
+            import onnxruntime as ort
+            from huggingface_hub import hf_hub_download
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise ImportError(
+                "The onnx embedding backend needs onnxruntime and onnx: pip install onnxruntime onnx"
+            ) from e
+
+        repo = hub_repo(model_name)
+        path = hf_hub_download(repo, onnx_file)
+        if quantize:
+            path = self._quantize(path, os.path.join(cache_dir, repo.replace("/", "--") + ".int8.onnx"))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.inter_op_num_threads = 1
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(repo)
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+    @staticmethod
+    def _quantize(source: str, target: str) -> str:
+        if not os.path.exists(target):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Written aside and renamed, so a concurrent process never loads half a model
+            partial = f"{target}.{os.getpid()}.partial"
+            quantize_dynamic(source, partial, weight_type=QuantType.QInt8)
+            os.replace(partial, target)
+        return target
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        for batch in length_buckets([len(ids) for ids in encoded["input_ids"]], self.batch_size):
+            padded = self.tokenizer.pad(
+                {key: [encoded[key][i] for i in batch] for key in encoded.keys()},
+                padding="longest",
+                return_tensors="np",
+            )
+            feeds = {name: padded[name].astype(np.int64) for name in self.input_names if name in padded}
+            if "token_type_ids" in self.input_names and "token_type_ids" not in feeds:
+                feeds["token_type_ids"] = np.zeros_like(feeds["input_ids"])
+            hidden = self.session.run(None, feeds)[0]
+
+            mask = padded["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            for i, vector in zip(batch, pooled):
+                vectors[i] = vector
+        return np.asarray(vectors, dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+class OllamaEmbeddings(Embeddings):
+    """Embeddings from an Ollama server's /api/embed endpoint."""
+
+    def __init__(
+        self,
+        model_name: str,
+        base_url: str = "http://localhost:11434",
+        batch_size: int = 32,
+        transport: Optional[OllamaTransport] = None,
+    ):
+        self.model_name = OLLAMA_MODEL_NAMES.get(model_name, model_name)
+        self.batch_size = batch_size
+        self.transport = transport or OllamaTransport(base_url)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self.transport.post(
+                "/api/embed", json={"model": self.model_name, "input": texts[start:start + self.batch_size]}
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"Ollama embedding call failed with status code {response.status_code}")
+            vectors.extend(response.json()["embeddings"])
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+def _load_huggingface(model_name: str, batch_size: int, threads: Optional[int], base_url: str) -> Embeddings:
+    # Imported here: sentence-transformers pulls in torch, which takes seconds
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    if threads:
+        import torch
+
+        torch.set_num_threads(threads)
+    return HuggingFaceEmbeddings(model_name=model_name, encode_kwargs={"batch_size": batch_size})
+
+EMBEDDING_BACKENDS: Dict[str, Callable[[str, int, Optional[int], str], Embeddings]] = {
+    "huggingface": _load_huggingface,
+    "onnx": lambda model_name, batch_size, threads, base_url: OnnxEmbeddings(model_name, batch_size, threads),
+    "ollama": lambda model_name, batch_size, threads, base_url: OllamaEmbeddings(model_name, base_url, batch_size),
+}
+
+def create_embeddings(
+    backend: str,
+    model_name: str,
+    batch_size: int = 32,
+    threads: Optional[int] = None,
+    base_url: str = "http://localhost:11434",
+) -> Embeddings:
+    """An embedding model on the named backend; ``threads`` caps CPU threads where the backend allows."""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend} (choose from {', '.join(EMBEDDING_BACKENDS)})")
+    return EMBEDDING_BACKENDS[backend](model_name, batch_size, threads, base_url)
+
+def parity_report(candidate: Embeddings, reference: Embeddings, texts: List[str]) -> Dict[str, float]:
+    """How closely candidate's vectors agree with reference's, and how much faster it is."""
+    start = time.perf_counter()
+    reference_vectors = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    reference_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    candidate_vectors = np.asarray(candidate.embed_documents(texts), dtype=np.float32)
+    candidate_seconds = time.perf_counter() - start
+
+    norms = np.linalg.norm(candidate_vectors, axis=1) * np.linalg.norm(reference_vectors, axis=1)
+    cosines = (candidate_vectors * reference_vectors).sum(axis=1) / np.clip(norms, 1e-12, None)
+    return {
+        "texts": len(texts),
+        "mean_cosine": float(cosines.mean()),
+        "min_cosine": float(cosines.min()),
+        "reference_seconds": reference_seconds,
+        "candidate_seconds": candidate_seconds,
+        "speedup": reference_seconds / candidate_seconds if candidate_seconds else 0.0,
+    }
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+class EmbeddingStore:
+    """SQLite-backed store of float32 vectors keyed by content hash."""
+
+    # SQLite limits the number of bound parameters per statement
+    _MAX_QUERY_PARAMS = 500
+
+    def __init__(self, path: str = ".cache/embeddings.sqlite"):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return the stored vectors for whichever keys are present."""
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(keys), self._MAX_QUERY_PARAMS):
+                batch = keys[start:start + self._MAX_QUERY_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Store vectors, overwriting any existing entries."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()],
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class CachedEmbeddings(Embeddings):
+    """Content-addressed cache around an Embeddings model.
+
+    Lookups go to an in-memory LRU first, then the persistent store; only
+    texts missing from both are sent to the wrapped model, de-duplicated and
+    in batches of ``batch_size``.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        store: Optional[EmbeddingStore] = None,
+        max_memory_items: int = 10000,
+        batch_size: int = 32,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.store = store if store is not None else EmbeddingStore()
+        self.max_memory_items = max_memory_items
+        self.batch_size = batch_size
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text: str, kind: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def _lookup_memory(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+        return found
+
+    def _embed(self, texts: List[str], kind: str) -> List[List[float]]:
+        keys = [self._key(text, kind) for text in texts]
+        unique_keys = list(dict.fromkeys(keys))
+
+        vectors = self._lookup_memory(unique_keys)
+        missing = [key for key in unique_keys if key not in vectors]
+        if missing:
+            stored = self.store.get_many(missing)
+            for key, vector in stored.items():
+                self._remember(key, vector)
+            vectors.update(stored)
+
+        # Compute whatever is still missing, once per distinct text
+        text_by_key = dict(zip(keys, texts))
+        to_compute = [key for key in unique_keys if key not in vectors]
+        for start in range(0, len(to_compute), self.batch_size):
+            batch_keys = to_compute[start:start + self.batch_size]
+            batch_texts = [text_by_key[key] for key in batch_keys]
+            if kind == "query":
+                computed = [self.embeddings.embed_query(text) for text in batch_texts]
+            else:
+                computed = self.embeddings.embed_documents(batch_texts)
+            new_vectors = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(batch_keys, computed)}
+            self.store.put_many(new_vectors)
+            for key, vector in new_vectors.items():
+                self._remember(key, vector)
+            vectors.update(new_vectors)
+
+        with self._lock:
+            self.misses += len(to_compute)
+            self.hits += len(texts) - len(to_compute)
+
+        return [vectors[key].tolist() for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed document chunks, reusing cached vectors where possible."""
+        return self._embed(texts, "document")
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query, reusing a cached vector where possible."""
+        return self._embed([text], "query")[0]
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,15 @@
+# Names only, so the handler can build cache keys without importing the
+# embedding backends (numpy, LangChain) before a document is ingested.
+DEFAULT_BACKEND = "huggingface"
+
+def hub_repo(model_name: str) -> str:
+    """Hugging Face repo of a model; sentence-transformers models are published under that organisation."""
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+def embedding_id(backend: str, model_name: str) -> str:
+    """Identity of the vectors a backend produces, for cache keys.
+
+    Backends round differently (int8 weights), so their vectors are cached
+    apart; the default backend keeps the bare model name of older caches.
+    """
+    return model_name if backend == DEFAULT_BACKEND else f"{backend}:{model_name}"
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import typing
+from typing import Callable, Dict, List, Optional, Tuple
+
+META_FILE = "meta.json"
+
+class IndexCache:
+    """On-disk cache of built vector indexes, keyed by document content and build settings.
+
+    Each entry is a directory written atomically (built in a temp dir, then
+    renamed into place). Entries are evicted least-recently-used first once
+    the cache grows past ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: str = ".cache/indexes", max_bytes: int = 1024 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(data: bytes, **settings: typing.Any) -> str:
+        """Hash raw document bytes together with the settings that shaped the index."""
+        digest = hashlib.sha256(data)
+        digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the directory of a cached index, or None on a miss."""
+        path = self._entry_path(key)
+        if not os.path.exists(os.path.join(path, META_FILE)):
+            return None
+        os.utime(path)  # Mark as recently used for LRU eviction
+        return path
+
+    def metadata(self, path: str) -> Dict[str, typing.Any]:
+        """Metadata stored with the entry at path by ``put``."""
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+
+    def put(self, key: str, save: Callable[[str], None], **metadata: typing.Any) -> str:
+        """Write a new entry by calling ``save`` with a directory to populate."""
+        path = self._entry_path(key)
+        tmp_path = tempfile.mkdtemp(prefix=f".{key[:12]}-", dir=self.cache_dir)
+        try:
+            save(tmp_path)
+            with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+                json.dump({"key": key, **metadata}, f)
+
+            with self._lock:
+                if os.path.exists(path):
+                    # Another writer got there first; keep its entry
+                    shutil.rmtree(tmp_path, ignore_errors=True)
+                else:
+                    os.rename(tmp_path, path)
+                self._evict(keep=key)
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        return path
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """List (last_used, size_bytes, key) for every complete entry."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = self._entry_path(name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(root, file))
+                for root, _, files in os.walk(path)
+                for file in files
+            )
+            entries.append((os.path.getmtime(path), size, name))
+        return entries
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
+            total -= size
+
+    def size_bytes(self) -> int:
+        """Total size of all cached entries."""
+        return sum(size for _, size, _ in self._entries())
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        with self._lock:
+            for _, _, key in self._entries():
+                shutil.rmtree(self._entry_path(key), ignore_errors=True)
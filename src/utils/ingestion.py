@@ -0,0 +1,118 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Stages reported by QAHandler.ingest, in order
+STAGES = ("extract", "split", "embed", "index")
+
+class IngestionCancelled(Exception):
+    """Raised inside a running job once it has been cancelled."""
+
+@dataclass
+class IngestionJob:
+    job_id: str
+    source: str
+    status: str = "queued"  # queued, running, done, failed or cancelled
+    stage: Optional[str] = None
+    progress: float = 0.0  # Overall progress across all stages, 0.0 to 1.0
+    words: Optional[int] = None
+    doc_id: Optional[str] = None  # Knowledge base id of the ingested document
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    _cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+class IngestionQueue:
+    """Runs document ingestion on background workers so the UI stays responsive.
+
+    Jobs are identified by a hash of the document bytes, so submitting the
+    same file again returns the existing job instead of ingesting it twice,
+    unless the document has since been removed from the knowledge base.
+    """
+
+    def __init__(self, qa_handler, max_workers: int = 1):
+        self.qa_handler = qa_handler
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestion")
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, data: bytes, source: str) -> IngestionJob:
+        """Queue a document for ingestion, or return the job already handling it."""
+        job_id = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            existing = self._jobs.get(job_id)
+            if existing is not None and self._current(existing):
+                return existing
+
+            job = IngestionJob(job_id=job_id, source=source)
+            self._jobs[job_id] = job
+            job._future = self._executor.submit(self._run, job, data)
+            return job
+
+    def _current(self, job: IngestionJob) -> bool:
+        """Whether the job's document is, or will be, in the knowledge base."""
+        if not job.finished:
+            return True
+        if job.status != "done":
+            return False
+        return any(doc.doc_id == job.doc_id for doc in self.qa_handler.list_documents())
+
+    def status(self, job_id: str) -> Optional[IngestionJob]:
+        """Look up a job by id."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[IngestionJob]:
+        """All known jobs, oldest first."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.submitted_at)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job. Returns False if it had already finished."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            job._cancel_event.set()
+            if job._future is not None and job._future.cancel():
+                # Never started, so the worker will not update it
+                self._finish(job, "cancelled")
+            return True
+
+    def _finish(self, job: IngestionJob, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+
+    def _run(self, job: IngestionJob, data: bytes) -> None:
+        def report(stage: str, fraction: float) -> None:
+            if job._cancel_event.is_set():
+                raise IngestionCancelled()
+            job.stage = stage
+            job.progress = (STAGES.index(stage) + min(max(fraction, 0.0), 1.0)) / len(STAGES)
+
+        job.status = "running"
+        try:
+            content = self.qa_handler.ingest(data, job.source, progress=report)
+            job.words = len(content.split())
+            job.doc_id = self.qa_handler.document_id(data)
+            job.progress = 1.0
+            self._finish(job, "done")
+        except IngestionCancelled:
+            self._finish(job, "cancelled")
+        except Exception as e:
+            self._finish(job, "failed", f"Error processing document: {str(e)}")
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Cancel outstanding jobs and stop the workers."""
+        for job in self.jobs():
+            self.cancel(job.job_id)
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,294 @@
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Protocol, Sequence
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.utils.ann_index import benchmark_backends, build_ann_index, effective_backend
+from src.utils.bm25 import BM25Index
+
+# Backends whose stored vectors can be read back exactly (or as float16);
+# the others are rebuilt from re-embedded chunk texts
+_RECONSTRUCTIBLE = {"flat", "sq_fp16", "hnsw"}
+# Retrain a trained index once the corpus has grown this much since training
+_RETRAIN_GROWTH = 4
+
+class Reranker(Protocol):
+    def rerank(self, query: str, docs: List[Document], top_k: int = 3) -> List[Document]: ...
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Document]], k: int = 60) -> List[Document]:
+    """Merge ranked lists by summing 1 / (k + rank) for each chunk id."""
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            scores[doc.id] = scores.get(doc.id, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(doc.id, doc)
+    return [docs[doc_id] for doc_id in sorted(scores, key=scores.get, reverse=True)]
+
+@dataclass
+class DocumentInfo:
+    doc_id: str
+    source: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+class KnowledgeBase:
+    """A single FAISS store holding chunks from many documents.
+
+    Documents are added by appending their vectors to the existing index and
+    removed by deleting their chunk ids, so neither operation rebuilds the
+    vectors of other documents. Every chunk carries its ``doc_id`` in its
+    metadata so search results can be traced back to the file they came from.
+    A BM25 keyword index over the same chunks is kept alongside the vectors
+    for hybrid search.
+
+    ``index_backend`` selects the vector index used once the corpus is large
+    enough to train it (see ``ann_index.BACKENDS``); "auto" picks one by
+    corpus size. Documents are always embedded into a flat per-document
+    index first and then appended. Removal deletes a document's vectors in
+    place, without re-embedding or retraining; only HNSW, whose graph cannot
+    drop nodes, is rebuilt from its remaining vectors. A store left below a
+    backend's training size keeps that backend until ``optimize``.
+    """
+
+    def __init__(self, embeddings: Embeddings, index_backend: str = "auto", **ann_params):
+        self.embeddings = embeddings
+        self.index_backend = index_backend
+        self.ann_params = ann_params
+        self.backend = "flat"  # Backend the store currently uses
+        self._trained_size = 0
+        self.store: Optional[FAISS] = None
+        self.documents: Dict[str, DocumentInfo] = {}
+        self.keyword_index = BM25Index()
+        self._lock = threading.RLock()
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.documents
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the current set of documents, independent of upload order."""
+        with self._lock:
+            return hashlib.sha256("\n".join(sorted(self.documents)).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def build_index(
+        doc_id: str,
+        chunks: List[str],
+        embeddings: Embeddings,
+        batch_size: int = 64,
+        progress: Optional[Callable[[float], None]] = None,
+        metadatas: Optional[List[Dict]] = None,
+    ) -> FAISS:
+        """Embed a single document's chunks into a standalone index ready to be added.
+
+        Chunks are embedded ``batch_size`` at a time and ``progress`` is called
+        with the fraction embedded after each batch. ``metadatas`` adds
+        per-chunk fields such as the page a chunk came from.
+        """
+        if not chunks:
+            raise ValueError("Document does not contain any text")
+
+        vectors = []
+        for start in range(0, len(chunks), batch_size):
+            vectors.extend(embeddings.embed_documents(chunks[start:start + batch_size]))
+            if progress is not None:
+                progress(len(vectors) / len(chunks))
+
+        extra = metadatas or [{} for _ in chunks]
+        metadatas = [{**extra[i], "doc_id": doc_id, "chunk": i} for i in range(len(chunks))]
+        ids = [f"{doc_id}:{i}" for i in range(len(chunks))]
+        return FAISS.from_embeddings(list(zip(chunks, vectors)), embeddings, metadatas=metadatas, ids=ids)
+
+    def add_index(self, doc_id: str, source: str, index: FAISS) -> DocumentInfo:
+        """Add a document whose chunks are already embedded in ``index``."""
+        with self._lock:
+            if doc_id in self.documents:
+                return self.documents[doc_id]
+
+            chunk_ids = list(index.index_to_docstore_id.values())
+            for chunk_id in chunk_ids:
+                chunk = index.docstore.search(chunk_id)
+                chunk.metadata["doc_id"] = doc_id
+                self.keyword_index.add(chunk_id, chunk.page_content)
+
+            if self.store is None:
+                self.store = index
+            elif self.backend == "flat":
+                self.store.merge_from(index)
+            else:
+                self._append(index)
+
+            info = DocumentInfo(doc_id=doc_id, source=source, chunk_ids=chunk_ids)
+            self.documents[doc_id] = info
+            self._maybe_rebuild()
+            return info
+
+    def _append(self, index: FAISS) -> None:
+        """Add a flat per-document index's vectors to a trained store index."""
+        # IVF ids have gaps where documents were removed; new ones go after the last
+        offset = max(self.store.index_to_docstore_id, default=-1) + 1
+        vectors = index.index.reconstruct_n(0, index.index.ntotal)
+        if self.backend.startswith("ivf"):
+            self.store.index.add_with_ids(vectors, np.arange(offset, offset + len(vectors), dtype=np.int64))
+        else:
+            self.store.index.add(vectors)
+        for position, chunk_id in index.index_to_docstore_id.items():
+            self.store.index_to_docstore_id[offset + position] = chunk_id
+        self.store.docstore.add({
+            chunk_id: index.docstore.search(chunk_id) for chunk_id in index.index_to_docstore_id.values()
+        })
+
+    def _maybe_rebuild(self) -> None:
+        """Switch to the configured backend, or retrain it, as the corpus grows."""
+        count = self.store.index.ntotal
+        target = effective_backend(self.index_backend, count)
+        grown = self._trained_size and count >= _RETRAIN_GROWTH * self._trained_size
+        if target != self.backend or grown:
+            self._rebuild(target, self._stored_vectors())
+
+    def _chunk_ids(self) -> List[str]:
+        return [chunk_id for _, chunk_id in sorted(self.store.index_to_docstore_id.items())]
+
+    def _stored_vectors(self) -> np.ndarray:
+        """Vectors of every chunk in store order."""
+        if self.backend in _RECONSTRUCTIBLE:
+            return self.store.index.reconstruct_n(0, self.store.index.ntotal)
+        texts = [self.store.docstore.search(chunk_id).page_content for chunk_id in self._chunk_ids()]
+        return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+    def _rebuild(self, backend: str, vectors: np.ndarray, chunk_ids: Optional[List[str]] = None) -> None:
+        """Replace the store's index with one of the given backend over vectors."""
+        chunk_ids = chunk_ids if chunk_ids is not None else self._chunk_ids()
+        backend = effective_backend(backend, len(chunk_ids))
+        self.store.index = build_ann_index(vectors, backend, **self.ann_params)
+        self.store.index_to_docstore_id = dict(enumerate(chunk_ids))
+        self.backend = backend
+        # Only inverted lists degrade as vectors are added after training
+        self._trained_size = len(chunk_ids) if backend.startswith("ivf") else 0
+
+    def optimize(self, backend: Optional[str] = None) -> str:
+        """Rebuild the vector index now, optionally switching backend; returns the one used."""
+        with self._lock:
+            if backend is not None:
+                self.index_backend = backend
+            if self.store is not None:
+                self._rebuild(self.index_backend, self._stored_vectors())
+            return self.backend
+
+    def index_report(self, queries: List[str], backends: Optional[List[str]] = None, k: int = 10) -> List[Dict]:
+        """Recall against exact search, latency and size of each backend on this corpus."""
+        with self._lock:
+            if self.store is None:
+                return []
+            vectors = self._stored_vectors()
+        query_vectors = np.asarray(self.embeddings.embed_documents(queries), dtype=np.float32)
+        return benchmark_backends(vectors, query_vectors, backends, k=k, **self.ann_params)
+
+    def add_texts(self, doc_id: str, source: str, chunks: List[str]) -> DocumentInfo:
+        """Embed and add a document's chunks."""
+        return self.add_index(doc_id, source, self.build_index(doc_id, chunks, self.embeddings))
+
+    def remove_document(self, doc_id: str) -> bool:
+        """Remove a document's chunks from the index. Returns False if it was not present."""
+        with self._lock:
+            info = self.documents.pop(doc_id, None)
+            if info is None:
+                return False
+            self.keyword_index.remove(info.chunk_ids)
+            if not self.documents:
+                self.store = None
+                self.backend = "flat"
+                self._trained_size = 0
+            elif self.backend.startswith("ivf"):
+                self._remove_from_ivf(info.chunk_ids)
+            elif self.backend == "hnsw":
+                # Rebuilt from the stored vectors, so nothing is re-embedded
+                removed = set(info.chunk_ids)
+                vectors = self._stored_vectors()
+                all_ids = self._chunk_ids()
+                keep = [i for i, chunk_id in enumerate(all_ids) if chunk_id not in removed]
+                self.store.docstore.delete(info.chunk_ids)
+                self._rebuild(self.backend, vectors[keep], [all_ids[i] for i in keep])
+            else:
+                # Flat and scalar-quantized indexes drop the rows and renumber the rest
+                self.store.delete(info.chunk_ids)
+            return True
+
+    def _remove_from_ivf(self, chunk_ids: List[str]) -> None:
+        """Delete chunks from the inverted lists; other ids, and the training, are kept."""
+        removed = set(chunk_ids)
+        positions = [
+            position for position, chunk_id in self.store.index_to_docstore_id.items() if chunk_id in removed
+        ]
+        self.store.index.remove_ids(np.asarray(positions, dtype=np.int64))
+        for position in positions:
+            del self.store.index_to_docstore_id[position]
+        self.store.docstore.delete(chunk_ids)
+
+    def clear(self) -> None:
+        """Drop every document."""
+        with self._lock:
+            self.store = None
+            self.documents.clear()
+            self.keyword_index.clear()
+            self.backend = "flat"
+            self._trained_size = 0
+
+    def similarity_search(self, query: str, k: int = 3) -> List[Document]:
+        """Return the k chunks most similar to the query across all documents."""
+        with self._lock:
+            if self.store is None:
+                return []
+            return self.store.similarity_search(query, k=k)
+
+    def keyword_search(self, query: str, k: int = 3) -> List[Document]:
+        """Return the k chunks with the best BM25 score for the query."""
+        with self._lock:
+            if self.store is None:
+                return []
+            docs = []
+            for chunk_id, _ in self.keyword_index.search(query, k=k):
+                doc = self.store.docstore.search(chunk_id)
+                doc.id = chunk_id
+                docs.append(doc)
+            return docs
+
+    def hybrid_search(
+        self,
+        query: str,
+        k: int = 3,
+        dense_k: int = 20,
+        keyword_k: int = 20,
+        rrf_k: int = 60,
+        reranker: Optional[Reranker] = None,
+        rerank_k: int = 10,
+    ) -> List[Document]:
+        """Return the k best chunks from dense and BM25 retrieval combined.
+
+        The top ``dense_k`` vector and ``keyword_k`` BM25 results are merged
+        with reciprocal rank fusion. With a ``reranker``, the ``rerank_k``
+        best fused chunks are re-scored by it before taking the top k.
+        """
+        with self._lock:
+            if self.store is None:
+                return []
+            dense = self.store.similarity_search(query, k=dense_k)
+            keyword = self.keyword_search(query, k=keyword_k)
+
+        fused = reciprocal_rank_fusion([dense, keyword], k=rrf_k)
+        if reranker is not None:
+            return reranker.rerank(query, fused[:rerank_k], top_k=k)
+        return fused[:k]
+
+    def source_of(self, doc: Document) -> Optional[str]:
+        """Name of the file a retrieved chunk came from."""
+        info = self.documents.get(doc.metadata.get("doc_id"))
+        return info.source if info else None
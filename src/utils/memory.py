@@ -0,0 +1,179 @@
+import hashlib
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+
+from src.utils.metrics import registry
+
+Message = Dict[str, str]
+# Folds turns into the running summary: (previous summary, turns) -> new summary
+Summarizer = Callable[[str, List[Message]], str]
+
+# Words that point back at earlier turns ("what about its price?", "tell me more")
+FOLLOW_UP_WORDS = {
+    "it", "its", "this", "that", "these", "those", "they", "them", "their", "he", "she", "him", "her", "his",
+    "above", "previous", "earlier", "former", "latter", "same", "more", "else", "also", "again", "another",
+}
+FOLLOW_UP_OPENERS = ("and ", "but ", "what about", "how about", "why not", "so ")
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return len(text) // 4 + 1
+
+def is_follow_up(question: str) -> bool:
+    """Whether a question seems to depend on earlier turns to be understood."""
+    text = question.strip().lower()
+    if text.startswith(FOLLOW_UP_OPENERS):
+        return True
+    return not FOLLOW_UP_WORDS.isdisjoint(re.findall(r"[a-z]+", text))
+
+class ConversationMemory:
+    """Per-session chat history kept within a token budget.
+
+    Recent turns are kept verbatim. When they exceed ``max_tokens``, the
+    oldest turns are folded into a running summary until the verbatim turns
+    fit in ``compact_to`` of the budget. Compacting in one larger step
+    instead of dropping a turn per message keeps the message prefix sent to
+    Ollama unchanged for several turns, so the server can reuse its KV cache
+    for it while the model stays loaded. Without a ``summarize`` callable the
+    oldest turns are simply dropped.
+
+    With ``background``, summaries are written by a separate thread so the
+    message that went over budget does not wait for one; the oldest turns
+    stay in the history until their summary replaces them.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 1500,
+        summary_tokens: int = 300,
+        compact_to: float = 0.5,
+        keep_recent: int = 2,
+        summarize: Optional[Summarizer] = None,
+        background: bool = False,
+    ):
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.compact_to = compact_to
+        self.keep_recent = keep_recent
+        self.summarize = summarize
+        self.background = background
+        self.summary = ""
+        self.turns: List[Message] = []
+        self._lock = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
+        # Bumped by clear(), so a summary of a forgotten conversation is discarded
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    @property
+    def token_count(self) -> int:
+        """Estimated tokens of the summary plus the verbatim turns."""
+        with self._lock:
+            return self._token_count()
+
+    def _token_count(self) -> int:
+        turns = sum(estimate_tokens(turn["content"]) for turn in self.turns)
+        return turns + (estimate_tokens(self.summary) if self.summary else 0)
+
+    def add(self, role: str, content: str) -> None:
+        """Record a message and compact the history if it is over budget."""
+        with self._lock:
+            self.turns.append({"role": role, "content": content})
+            if self._token_count() > self.max_tokens and self._compaction is None:
+                self._compact()
+
+    def add_exchange(self, user: str, assistant: str) -> None:
+        """Record a user message and the reply to it."""
+        self.add("user", user)
+        self.add("assistant", assistant)
+
+    def _fold_count(self) -> int:
+        """How many of the oldest turns to fold so the rest fit in ``compact_to`` of the budget."""
+        target = int(self.max_tokens * self.compact_to)
+        tokens = self._token_count()
+        count = 0
+        while len(self.turns) - count > self.keep_recent and tokens > target:
+            tokens -= estimate_tokens(self.turns[count]["content"])
+            count += 1
+        return count
+
+    def _compact(self) -> None:
+        count = self._fold_count()
+        if not count:
+            return
+        folded = self.turns[:count]
+        if self.summarize is not None and self.background:
+            self._compaction = threading.Thread(
+                target=self._compact_in_background, args=(self.summary, folded, self._generation), daemon=True
+            )
+            self._compaction.start()
+            return
+
+        del self.turns[:count]
+        if self.summarize is not None:
+            self._set_summary(self._summarize(self.summary, folded))
+
+    def _summarize(self, summary: str, folded: List[Message]) -> Optional[str]:
+        try:
+            return self.summarize(summary, folded)
+        except Exception as e:
+            # The turns stay folded away; the summary just misses them
+            registry.inc("assistant_errors_total", stage="summarize", error=type(e).__name__)
+            return None
+
+    def _set_summary(self, summary: Optional[str]) -> None:
+        if summary is not None:
+            # Truncate runaway summaries so they cannot eat the whole budget
+            self.summary = summary.strip()[:self.summary_tokens * 4]
+
+    def _compact_in_background(self, summary: str, folded: List[Message], generation: int) -> None:
+        new_summary = self._summarize(summary, folded)
+        with self._lock:
+            self._compaction = None
+            if generation != self._generation:
+                return
+            # Turns are only appended meanwhile, so the folded ones are still the oldest
+            del self.turns[:len(folded)]
+            self._set_summary(new_summary)
+            if self._token_count() > self.max_tokens:
+                self._compact()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Wait for a background compaction, e.g. before inspecting the history in tests."""
+        while True:
+            with self._lock:
+                compaction = self._compaction
+            if compaction is None:
+                return
+            compaction.join(timeout)
+            if compaction.is_alive():
+                return
+
+    def messages(self) -> List[Message]:
+        """History to send before the next user message, summary first."""
+        with self._lock:
+            history = [dict(turn) for turn in self.turns]
+            if self.summary:
+                history.insert(0, {"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"})
+            return history
+
+    def transcript(self) -> str:
+        """History as plain text, for prompts sent to /api/generate."""
+        return "\n".join(f"{message['role'].capitalize()}: {message['content']}" for message in self.messages())
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the current history; empty when there is none."""
+        transcript = self.transcript()
+        if not transcript:
+            return ""
+        return hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.summary = ""
+            self.turns.clear()
+            self._generation += 1
@@ -0,0 +1,259 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+T = TypeVar("T")
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+@dataclass
+class _Histogram:
+    buckets: Tuple[float, ...]
+    counts: List[int]
+    total: float = 0.0
+    count: int = 0
+
+@dataclass
+class Trace:
+    """Stages of one request (an answer or an ingestion), for the debug panel."""
+    name: str
+    started_at: float = field(default_factory=time.time)
+    spans: List[Tuple[str, float]] = field(default_factory=list)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    seconds: float = 0.0  # Wall time; spans may nest, so they need not add up to it
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+
+class MetricsRegistry:
+    """Process-wide counters, histograms and gauges, rendered in Prometheus text format."""
+
+    def __init__(self, max_traces: int = 50):
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._help: Dict[str, str] = {}
+        self._traces: Deque[Trace] = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, amount: float = 1.0, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets, [0] * len(buckets))
+            for i, bound in enumerate(histogram.buckets):
+                if value <= bound:
+                    histogram.counts[i] += 1
+            histogram.total += value
+            histogram.count += 1
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        """Register a gauge whose value is read at scrape time (e.g. a cache hit ratio)."""
+        with self._lock:
+            self._gauges[name] = read
+
+    def counter_value(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0.0)
+
+    def histogram_stats(self, name: str, **labels: Any) -> Tuple[int, float]:
+        """(count, sum) of a histogram series."""
+        with self._lock:
+            histogram = self._histograms.get(name, {}).get(_labels(labels))
+            return (histogram.count, histogram.total) if histogram else (0, 0.0)
+
+    @contextmanager
+    def span(self, stage: str, **labels: Any) -> Iterator[None]:
+        """Time a pipeline stage into assistant_stage_seconds and the current trace."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, time.perf_counter() - start, **labels)
+
+    def record_stage(self, stage: str, seconds: float, **labels: Any) -> None:
+        self.observe("assistant_stage_seconds", seconds, stage=stage, **labels)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append((stage, seconds))
+
+    def timed_iter(self, stage: str, items: Iterator[T], **labels: Any) -> Iterator[T]:
+        """Yield from items, timing only the work done producing them, not the consumer's."""
+        spent = 0.0
+        iterator = iter(items)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    spent += time.perf_counter() - start
+                    return
+                spent += time.perf_counter() - start
+                yield item
+        finally:
+            self.record_stage(stage, spent, **labels)
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Trace]:
+        """Collect the spans recorded inside this block into one Trace."""
+        trace = Trace(name, attributes=dict(attributes))
+        token = _current_trace.set(trace)
+        start = time.perf_counter()
+        try:
+            yield trace
+        finally:
+            trace.seconds = time.perf_counter() - start
+            _current_trace.reset(token)
+            with self._lock:
+                self._traces.append(trace)
+
+    def annotate(self, **attributes: Any) -> None:
+        """Attach attributes (token counts, cache hits) to the current trace, if any."""
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.attributes.update(attributes)
+
+    def recent_traces(self) -> List[Trace]:
+        """Most recent traces, newest first."""
+        with self._lock:
+            return list(reversed(self._traces))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: _Histogram(h.buckets, list(h.counts), h.total, h.count) for key, h in series.items()}
+                for name, series in self._histograms.items()
+            }
+            gauges = dict(self._gauges)
+
+        for name in sorted(counters):
+            self._header(lines, name, "counter")
+            for key, value in counters[name].items():
+                lines.append(f"{name}{_format_labels(key)} {value:g}")
+        for name in sorted(histograms):
+            self._header(lines, name, "histogram")
+            for key, histogram in histograms[name].items():
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {histogram.total:g}")
+                lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        for name in sorted(gauges):
+            try:
+                value = float(gauges[name]())
+            except Exception:
+                continue
+            self._header(lines, name, "gauge")
+            lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str) -> None:
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._gauges.clear()
+            self._traces.clear()
+
+registry = MetricsRegistry()
+registry.describe("assistant_stage_seconds", "Time spent in each pipeline stage.")
+registry.describe("ollama_request_seconds", "Wall time of Ollama API requests.")
+registry.describe("ollama_time_to_first_token_seconds", "Time until the first streamed chunk arrived.")
+registry.describe("ollama_eval_seconds", "Generation time reported by Ollama (eval_duration).")
+registry.describe("ollama_prompt_eval_seconds", "Prompt processing time reported by Ollama (prompt_eval_duration).")
+registry.describe("ollama_load_seconds", "Model load time reported by Ollama (load_duration).")
+registry.describe("ollama_tokens_total", "Prompt and generated tokens reported by Ollama.")
+registry.describe("ollama_errors_total", "Failed Ollama requests.")
+
+def record_ollama_request(endpoint: str, seconds: float, body: Dict[str, Any]) -> None:
+    """Record one finished Ollama request: wall time, then Ollama's timings or the error."""
+    registry.observe("ollama_request_seconds", seconds, endpoint=endpoint)
+    if "error" in body:
+        registry.inc("ollama_errors_total", endpoint=endpoint)
+    else:
+        record_ollama_response(endpoint, body)
+
+def record_ollama_response(endpoint: str, body: Dict[str, Any]) -> None:
+    """Capture Ollama's own timings and token counts from a final (done) response."""
+    model = body.get("model", "")
+    for field_name, metric in (
+        ("eval_duration", "ollama_eval_seconds"),
+        ("prompt_eval_duration", "ollama_prompt_eval_seconds"),
+        ("load_duration", "ollama_load_seconds"),
+    ):
+        if field_name in body:
+            registry.observe(metric, body[field_name] / 1e9, endpoint=endpoint, model=model)
+    prompt_tokens = body.get("prompt_eval_count", 0)
+    generated_tokens = body.get("eval_count", 0)
+    if prompt_tokens:
+        registry.inc("ollama_tokens_total", prompt_tokens, endpoint=endpoint, model=model, kind="prompt")
+    if generated_tokens:
+        registry.inc("ollama_tokens_total", generated_tokens, endpoint=endpoint, model=model, kind="generated")
+    registry.annotate(
+        prompt_tokens=prompt_tokens,
+        generated_tokens=generated_tokens,
+        prompt_eval_ms=round(body.get("prompt_eval_duration", 0) / 1e6, 1),
+        eval_ms=round(body.get("eval_duration", 0) / 1e6, 1),
+    )
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        data = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port: int = 9464, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread; later calls return the running server."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+        return _server
@@ -0,0 +1,82 @@
+import re
+from typing import Callable, List, Optional, Sequence, Set
+
+from src.utils.bm25 import tokenize
+from src.utils.memory import estimate_tokens
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+# Overlaps shorter than this are more likely coincidence than chunk overlap
+MIN_OVERLAP_CHARS = 20
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+
+def strip_overlap(previous: str, text: str, min_chars: int = MIN_OVERLAP_CHARS) -> str:
+    """Drop the start of text that repeats the end of previous (overlapping chunks)."""
+    longest = min(len(previous), len(text))
+    for size in range(longest, min_chars - 1, -1):
+        if previous.endswith(text[:size]):
+            return text[size:].lstrip()
+    return text
+
+class PromptBuilder:
+    """Assembles the document QA prompt within a token budget.
+
+    The instructions are sent once, as the system prompt, so the prompt
+    holds only the conversation, the context and the question. Retrieved
+    chunks are added best first: text overlapping the previous chunk and
+    sentences already included are dropped, and with ``extract_sentences``
+    only the sentences sharing terms with the question are kept. Chunks
+    stop being added once ``max_context_tokens`` is reached, the last one
+    cut at a sentence boundary.
+    """
+
+    def __init__(
+        self,
+        max_context_tokens: int = 768,
+        extract_sentences: bool = False,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ):
+        self.max_context_tokens = max_context_tokens
+        self.extract_sentences = extract_sentences
+        self.count_tokens = count_tokens
+
+    def _relevant_sentences(self, sentences: List[str], terms: Set[str]) -> List[str]:
+        relevant = [sentence for sentence in sentences if terms & set(tokenize(sentence))]
+        # Keep something from every retrieved chunk, even without a term match
+        return relevant or sentences[:1]
+
+    def compress(self, question: str, chunks: Sequence[str]) -> List[str]:
+        """The parts of the chunks that go into the prompt, within budget."""
+        terms = set(tokenize(question))
+        seen: Set[str] = set()
+        context: List[str] = []
+        used = 0
+        previous = ""
+
+        for chunk in chunks:
+            text = strip_overlap(previous, chunk) if previous else chunk
+            previous = chunk
+            sentences = [sentence for sentence in split_sentences(text) if sentence not in seen]
+            if self.extract_sentences and terms:
+                sentences = self._relevant_sentences(sentences, terms)
+
+            kept = []
+            for sentence in sentences:
+                tokens = self.count_tokens(sentence)
+                if used + tokens > self.max_context_tokens:
+                    break
+                kept.append(sentence)
+                seen.add(sentence)
+                used += tokens
+            if kept:
+                context.append(" ".join(kept))
+            if used >= self.max_context_tokens or len(kept) < len(sentences):
+                break
+        return context
+
+    def build(self, question: str, chunks: Sequence[str], history: Optional[str] = None) -> str:
+        """The QA prompt; the instructions belong in the system prompt."""
+        context = "\n\n".join(self.compress(question, chunks))
+        conversation = f"Conversation so far:\n{history}\n\n" if history else ""
+        return f"{conversation}Context:\n{context}\n\nQuestion: {question}\n\nAnswer:"
@@ -1,117 +1,569 @@
-from typing import Dict, List, Optional
+import asyncio
+import io
+import os
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple
 
-from langchain_community.vectorstores import FAISS
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_ollama import OllamaLLM
-from langchain_huggingface import HuggingFaceEmbeddings
-import requests
-
-from src.document_processor.processor import DocumentProcessor
 from src.models.ollama_client import OllamaClient
+from src.models.scheduler import BACKGROUND
+from src.utils import resources
+from src.utils.embedding_names import embedding_id
+from src.utils.index_cache import IndexCache
+from src.utils.memory import ConversationMemory, Message, is_follow_up
+from src.utils.metrics import registry
+from src.utils.prompting import PromptBuilder
+from src.utils.response_cache import ResponseCache
+from src.utils.startup import startup_timer
+
+# The LangChain / FAISS / sentence-transformers stack takes seconds to
+# import, so it is only loaded once a document is ingested; sessions that
+# only chitchat never pay for it.
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import Embeddings
+
+    from src.document_processor.processor import DocumentProcessor, Section
+    from src.utils.chunking import ChunkStats, StructuredChunker
+    from src.utils.knowledge_base import DocumentInfo, KnowledgeBase
+
+QA_SYSTEM_PROMPT = "You are a helpful assistant that answers questions based ONLY on the provided context. If the answer cannot be found in the context, respond with 'I cannot answer this question based on the provided document.'"
+CHITCHAT_SYSTEM_PROMPT = "You are a friendly and helpful AI assistant. Keep your responses concise and engaging. For questions about specific information, politely explain that you don't have access to that information."
+NO_DOCUMENT_MESSAGE = "Please upload a document first to ask questions about it."
+CANNOT_ANSWER_MESSAGE = "I cannot answer this question based on the provided document. Please try asking about something else in the document."
+# A refusal says so in its opening; streamed answers are held back until
+# this many characters show whether they are one
+REFUSAL_WINDOW = 100
+NO_RELEVANT_CONTEXT_MESSAGE = "I couldn't find any relevant information in the document to answer your question. Please try asking about something else in the document."
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = 32
+# Embedding backend, see src.utils.embedding_backends.EMBEDDING_BACKENDS:
+# "huggingface" (PyTorch), "onnx" (ONNX Runtime, int8) or "ollama"; with
+# EMBEDDING_THREADS capping the CPU threads it uses
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "huggingface")
+EMBEDDING_THREADS = int(os.environ["EMBEDDING_THREADS"]) if os.environ.get("EMBEDDING_THREADS") else None
+# Chunk lengths are measured in embedding-model tokens; the embedding model
+# truncates its input at 256 tokens, so longer chunks would be cut off
+CHUNK_MAX_TOKENS = 256
+CHUNK_MIN_TOKENS = 32
+CHUNK_OVERLAP_TOKENS = 0
+CONTENT_FILE = "content.txt"
+# Cosine similarity above which a differently worded question reuses a
+# cached answer; None limits the response cache to exact (normalised) matches.
+SEMANTIC_CACHE_THRESHOLD: Optional[float] = None
+# Retrieval: the top DENSE_K vector and KEYWORD_K BM25 chunks are fused;
+# with a RERANKER_MODEL (a sentence-transformers cross-encoder) the best
+# RERANK_K fused chunks are re-scored on CPU. RETRIEVAL_K reach the prompt.
+RETRIEVAL_K = 3
+DENSE_K = 20
+KEYWORD_K = 20
+RERANK_K = 10
+RERANKER_MODEL: Optional[str] = None
+# Vector index backend, see src.utils.ann_index.BACKENDS; "auto" stays flat
+# (exact) for small corpora and moves to IVF with quantized vectors as it grows
+INDEX_BACKEND = "auto"
+# Keep the model and its KV cache loaded between turns so the unchanged
+# history prefix is not processed again on every follow-up
+KEEP_ALIVE = "30m"
+MEMORY_MAX_TOKENS = 1500
+# Budget for retrieved text in the QA prompt; prompt evaluation dominates
+# latency on CPU-only Ollama hosts. EXTRACT_SENTENCES keeps only sentences
+# sharing terms with the question.
+PROMPT_CONTEXT_TOKENS = 768
+EXTRACT_SENTENCES = False
+SUMMARY_PROMPT = """Update the summary of a conversation with the new messages below. Keep names, facts and open questions; answer with the summary only, in at most five sentences.
+
+Current summary: {summary}
+
+New messages:
+{messages}
+
+Updated summary:"""
+
+ProgressCallback = Callable[[str, float], None]
+
+def _embed_query(text: str, base_url: str) -> List[float]:
+    """Embed a query with the shared model, loading it on first use."""
+    return resources.get_embeddings(
+        EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE, EMBEDDING_BACKEND, EMBEDDING_THREADS, base_url=base_url
+    ).embed_query(text)
 
 class QAHandler:
-    def __init__(self):
-        self.ollama_client = OllamaClient()
-        self.document_processor = DocumentProcessor()
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        ollama_client: Optional[OllamaClient] = None,
+        embeddings: Optional["Embeddings"] = None,
+        index_cache: Optional[IndexCache] = None,
+        response_cache: Optional[ResponseCache] = None,
+        token_counter: Optional[Callable[[str], int]] = None,
+    ):
+        # Heavy, stateless resources are shared across handlers (sessions);
+        # only the conversation state below is per handler. Anything that
+        # needs the document stack is created on first use.
+        self.ollama_client = ollama_client or OllamaClient(
+            base_url,
+            transport=resources.get_transport(base_url),
+            catalog=resources.get_model_catalog(base_url),
+            scheduler=resources.get_scheduler(base_url),
+            warmer=resources.get_warmer(base_url, KEEP_ALIVE),
+        )
         self.current_context = ""
         self.model_name = "gemma3:4b"
-        self.document_store = None
-        self.llm = OllamaLLM(model=self.model_name)
-        self.embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
+        self._embeddings = embeddings
+        self._token_counter = token_counter
+        self.index_cache = index_cache or resources.get_index_cache()
+        if response_cache is None:
+            server = self.ollama_client.base_url
+            response_cache = resources.get_response_cache(
+                lambda text: _embed_query(text, server), SEMANTIC_CACHE_THRESHOLD, key=server
+            )
+        self.response_cache = response_cache
+        registry.gauge("assistant_response_cache_hit_ratio", lambda cache=response_cache: cache.hit_ratio)
+        self._document_processor: Optional["DocumentProcessor"] = None
+        self._chunker: Optional["StructuredChunker"] = None
+        self.chunk_stats: Dict[str, "ChunkStats"] = {}
+        self._knowledge_base: Optional["KnowledgeBase"] = None
+        self._llm = None
+        # Summaries are written off the request path, so an answer never waits for one
+        self.memory = ConversationMemory(
+            max_tokens=MEMORY_MAX_TOKENS, summarize=self._summarize_history, background=True
         )
+        self.prompt_builder = PromptBuilder(PROMPT_CONTEXT_TOKENS, extract_sentences=EXTRACT_SENTENCES)
+
+    @property
+    def embeddings(self) -> "Embeddings":
+        """Embedding model, loaded on first document ingestion or search."""
+        if self._embeddings is None:
+            with startup_timer.phase("load embedding model"):
+                self._embeddings = resources.get_embeddings(
+                    EMBEDDING_MODEL,
+                    EMBEDDING_BATCH_SIZE,
+                    EMBEDDING_BACKEND,
+                    EMBEDDING_THREADS,
+                    base_url=self.ollama_client.base_url,
+                )
+            registry.gauge("assistant_embedding_cache_hit_ratio", lambda cache=self._embeddings: cache.hit_ratio)
+        return self._embeddings
+
+    @property
+    def document_processor(self) -> "DocumentProcessor":
+        if self._document_processor is None:
+            from src.document_processor.processor import DocumentProcessor
+
+            self._document_processor = DocumentProcessor(pdf_workers=os.cpu_count())
+        return self._document_processor
+
+    @property
+    def chunker(self) -> "StructuredChunker":
+        if self._chunker is None:
+            from src.utils.chunking import StructuredChunker
+
+            if self._token_counter is None:
+                with startup_timer.phase("load tokenizer"):
+                    self._token_counter = resources.get_token_counter(EMBEDDING_MODEL)
+            self._chunker = StructuredChunker(
+                self._token_counter,
+                max_tokens=CHUNK_MAX_TOKENS,
+                min_tokens=CHUNK_MIN_TOKENS,
+                overlap_tokens=CHUNK_OVERLAP_TOKENS,
+            )
+        return self._chunker
+
+    @property
+    def knowledge_base(self) -> "KnowledgeBase":
+        if self._knowledge_base is None:
+            with startup_timer.phase("import vector store"):
+                from src.utils.knowledge_base import KnowledgeBase
+
+            self._knowledge_base = KnowledgeBase(self.embeddings, index_backend=INDEX_BACKEND)
+        return self._knowledge_base
+
+    @property
+    def llm(self):
+        """LangChain LLM wrapper for the current model."""
+        if self._llm is None or self._llm.model != self.model_name:
+            from langchain_ollama import OllamaLLM
+
+            self._llm = OllamaLLM(model=self.model_name)
+        return self._llm
+
+    @property
+    def document_store(self) -> Optional["FAISS"]:
+        """The combined vector store over every loaded document."""
+        if self._knowledge_base is None:
+            return None
+        return self._knowledge_base.store
     
     def get_available_models(self) -> List[str]:
         """Get list of available models from Ollama."""
         return self.ollama_client.get_available_models()
 
+    def refresh_models(self) -> List[str]:
+        """Re-fetch the model list from Ollama without rebuilding the handler."""
+        return self.ollama_client.refresh_models()
+
     def set_model(self, model_name: str) -> bool:
-        """Set the current model to use."""
+        """Set the current model to use; it starts loading in the background."""
         if self.ollama_client.set_model(model_name):
             self.model_name = model_name
-            self.llm = OllamaLLM(model=model_name)
             return True
         return False
 
-    def process_document(self, file_path: str) -> str:
-        """Process a document and return its content."""
+    def model_state(self) -> Optional[str]:
+        """Whether the current model is cold, loading or warm on the server."""
+        return self.ollama_client.model_state()
+
+    def _summarize_history(self, summary: str, turns: List[Message]) -> str:
+        """Fold turns that no longer fit the memory budget into its summary."""
+        messages = "\n".join(f"{turn['role'].capitalize()}: {turn['content']}" for turn in turns)
+        prompt = SUMMARY_PROMPT.format(summary=summary or "(none)", messages=messages)
+        # Summaries can wait; they yield to answers other sessions are waiting for
+        response = self.ollama_client.generate(prompt=prompt, keep_alive=KEEP_ALIVE, priority=BACKGROUND)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response.get("response", "")
+
+    def clear_history(self) -> None:
+        """Forget the conversation so far."""
+        self.memory.clear()
+
+    def _index_cache_key(self, data: bytes) -> str:
+        """Cache key for a document: its bytes plus everything that affects the index."""
+        return IndexCache.make_key(
+            data,
+            embedding_model=embedding_id(EMBEDDING_BACKEND, EMBEDDING_MODEL),
+            chunker="structured",
+            chunk_max_tokens=CHUNK_MAX_TOKENS,
+            chunk_min_tokens=CHUNK_MIN_TOKENS,
+            chunk_overlap_tokens=CHUNK_OVERLAP_TOKENS,
+        )
+
+    def _load_cached_index(self, path: str) -> "FAISS":
+        """Load a cached single-document FAISS index."""
+        from langchain_community.vectorstores import FAISS
+
+        return FAISS.load_local(path, self.embeddings, allow_dangerous_deserialization=True)
+
+    def _read_cached_content(self, path: str) -> str:
+        """Read the document text stored alongside a cached index."""
+        with open(os.path.join(path, CONTENT_FILE), encoding="utf-8") as f:
+            return f.read()
+
+    def process_document(self, file_path: str, source: Optional[str] = None) -> str:
+        """Process a document, add it to the knowledge base and return its content."""
         try:
-            # Process the document and get its content
-            content = self.document_processor.process_document(file_path)
-            self.current_context = content
-            
-            # Split the content into chunks
-            chunks = self.text_splitter.split_text(content)
-            
-            # Create vector store from chunks
-            self.document_store = FAISS.from_texts(chunks, self.embeddings)
-            
-            return content
+            with open(file_path, "rb") as f:
+                data = f.read()
+            return self.ingest(data, source or os.path.basename(file_path))
         except Exception as e:
             return f"Error processing document: {str(e)}"
 
+    def ingest(self, data: bytes, source: str, progress: Optional[ProgressCallback] = None) -> str:
+        """Add raw document bytes to the knowledge base and return the document text.
+
+        ``progress`` is called with a stage name (extract, split, embed, index)
+        and the fraction of that stage completed; exceptions it raises abort
+        the ingestion. Errors are raised rather than returned as strings.
+        """
+        with registry.trace("ingest", source=source):
+            return self._ingest(data, source, progress)
+
+    def _ingest(self, data: bytes, source: str, progress: Optional[ProgressCallback]) -> str:
+        report = progress or (lambda stage, fraction: None)
+
+        # Documents are identified by their content, so re-uploads are no-ops
+        doc_id = self._index_cache_key(data)
+        cached_path = self.index_cache.get(doc_id)
+        registry.inc("assistant_cache_requests_total", cache="index", result="miss" if cached_path is None else "hit")
+
+        if cached_path is not None:
+            # Reuse a previously built index for identical content and settings
+            report("index", 0.0)
+            content = self._read_cached_content(cached_path)
+            stats = self.index_cache.metadata(cached_path).get("chunk_stats")
+            if stats:
+                from src.utils.chunking import ChunkStats
+
+                self.chunk_stats[doc_id] = ChunkStats(**stats)
+            if doc_id not in self.knowledge_base:
+                self.knowledge_base.add_index(doc_id, source, self._load_cached_index(cached_path))
+            self.current_context = content
+            report("index", 1.0)
+            return content
+
+        # Chunk the document along its pages and headings as they are extracted
+        segments = []
+
+        def collect_sections() -> Iterator["Section"]:
+            report("extract", 0.0)
+            for section in self.document_processor.iter_sections(io.BytesIO(data)):
+                segments.append(section.text)
+                yield section
+            report("split", 0.0)
+
+        from src.utils.chunking import ChunkStats
+
+        stats = ChunkStats()
+        # Extraction is interleaved with chunking, so its "extract" span nests in this one
+        with registry.span("chunk"):
+            chunks = list(self.chunker.chunk(collect_sections(), stats))
+        registry.inc("assistant_chunks_total", len(chunks))
+        registry.annotate(chunks=len(chunks), tokens=stats.total_tokens, duplicates=stats.duplicates)
+        report("split", 1.0)
+        content = "".join(segments)
+        self.current_context = content
+        if doc_id in self.knowledge_base:
+            return content
+        self.chunk_stats[doc_id] = stats
+
+        # Embed the chunks and cache the per-document index before merging it
+        with registry.span("embed"):
+            index = self.knowledge_base.build_index(
+                doc_id,
+                [chunk.text for chunk in chunks],
+                self.embeddings,
+                progress=lambda fraction: report("embed", fraction),
+                metadatas=[chunk.metadata for chunk in chunks],
+            )
+
+        report("index", 0.0)
+
+        def save(path: str) -> None:
+            index.save_local(path)
+            with open(os.path.join(path, CONTENT_FILE), "w", encoding="utf-8") as f:
+                f.write(content)
+
+        with registry.span("index"):
+            try:
+                self.index_cache.put(doc_id, save, chunks=len(chunks), chunk_stats=asdict(stats))
+            except OSError as e:
+                registry.inc("assistant_errors_total", stage="index cache", error=type(e).__name__)
+
+            self.knowledge_base.add_index(doc_id, source, index)
+        report("index", 1.0)
+
+        return content
+
+    def document_id(self, data: bytes) -> str:
+        """The id a document with these bytes has in the knowledge base."""
+        return self._index_cache_key(data)
+
+    def list_documents(self) -> List["DocumentInfo"]:
+        """Documents currently searchable, in the order they were added."""
+        if self._knowledge_base is None:
+            return []
+        return list(self._knowledge_base.documents.values())
+
+    def remove_document(self, doc_id: str) -> bool:
+        """Remove a document from the knowledge base."""
+        if self._knowledge_base is None:
+            return False
+        self.chunk_stats.pop(doc_id, None)
+        return self._knowledge_base.remove_document(doc_id)
+
+    def _retrieve(self, question: str) -> List["Document"]:
+        """Find the chunks most relevant to the question across all documents."""
+        reranker = resources.get_reranker(RERANKER_MODEL) if RERANKER_MODEL else None
+        with registry.span("retrieve"):
+            return self.knowledge_base.hybrid_search(
+                question,
+                k=RETRIEVAL_K,
+                dense_k=DENSE_K,
+                keyword_k=KEYWORD_K,
+                reranker=reranker,
+                rerank_k=RERANK_K,
+            )
+
+    def _build_qa_prompt(self, question: str, docs: List["Document"], follow_up: bool = False) -> str:
+        """Build the QA prompt from the retrieved chunks, and the conversation so far for follow-ups."""
+        # The history goes before the chunks, which change with every question,
+        # so consecutive prompts share as long a prefix as possible. The
+        # instructions are only sent as the system prompt.
+        with registry.span("prompt"):
+            return self.prompt_builder.build(
+                question, [doc.page_content for doc in docs], history=self.memory.transcript() if follow_up else None
+            )
+
+    def _format_sources(self, docs: List["Document"]) -> str:
+        """Citation line listing the files (and pages) the retrieved chunks came from."""
+        pages: Dict[str, List[int]] = {}
+        for doc in docs:
+            source = self.knowledge_base.source_of(doc)
+            if not source:
+                continue
+            cited = pages.setdefault(source, [])
+            page = doc.metadata.get("page")
+            if page is not None and page not in cited:
+                cited.append(page)
+
+        sources = [
+            f"{source} (p. {', '.join(str(page) for page in sorted(cited))})" if cited else source
+            for source, cited in pages.items()
+        ]
+        return f"\n\nSources: {', '.join(sources)}" if sources else ""
+
+    @staticmethod
+    def _is_refusal(text: str) -> bool:
+        """Whether the model opened by saying the documents do not answer the question."""
+        opening = text[:REFUSAL_WINDOW].lower()
+        return "cannot answer" in opening or "not in the document" in opening
+
+    def _finish_answer(self, question: str, text: str, sources: str, model: str, fingerprint: str) -> str:
+        """The answer for generated text, recorded in the conversation; only real answers are cached.
+
+        Refusals are replaced by CANNOT_ANSWER_MESSAGE; other answers get
+        their sources appended. Streaming and non-streaming answers go
+        through here, so both paths cache and remember the same text.
+        """
+        if self._is_refusal(text):
+            answer = CANNOT_ANSWER_MESSAGE
+        else:
+            answer = text + sources
+            self.response_cache.put(model, fingerprint, question, answer)
+        self.memory.add_exchange(question, answer)
+        return answer
+
+    def _cache_scope(self, question: str) -> Tuple[str, str, bool]:
+        """Model and document set an answer is valid for, and whether the question is a follow-up.
+
+        Standalone questions are answered from the documents alone, so their
+        answers are shared by every conversation. Follow-ups are answered
+        with the history and only reused within the same conversation.
+        """
+        fingerprint = self.knowledge_base.fingerprint
+        follow_up = bool(self.memory.fingerprint) and is_follow_up(question)
+        if follow_up:
+            fingerprint = f"{fingerprint}:{self.memory.fingerprint}"
+        return self.ollama_client.current_model, fingerprint, follow_up
+
     def answer_question(self, question: str) -> str:
         """Answer a question based on the current context."""
         if not self.document_store:
-            return "Please upload a document first to ask questions about it."
+            return NO_DOCUMENT_MESSAGE
 
         try:
-            # Search for relevant documents
-            docs = self.document_store.similarity_search(question, k=3)
+            model, fingerprint, follow_up = self._cache_scope(question)
+            cached = self.response_cache.get(model, fingerprint, question)
+            registry.annotate(response_cache="miss" if cached is None else "hit")
+            if cached is not None:
+                self.memory.add_exchange(question, cached)
+                return cached
+
+            docs = self._retrieve(question)
             if not docs:
-                return "I couldn't find any relevant information in the document to answer your question. Please try asking about something else in the document."
+                return NO_RELEVANT_CONTEXT_MESSAGE
 
-            # Combine the relevant chunks into context
-            context = "\n\n".join([doc.page_content for doc in docs])
+            prompt = self._build_qa_prompt(question, docs, follow_up)
+            with registry.span("generate"):
+                response = self.ollama_client.generate(prompt=prompt, system=QA_SYSTEM_PROMPT, keep_alive=KEEP_ALIVE)
 
-            # Prepare the prompt with context
-            prompt = f"""You are a helpful assistant that answers questions based ONLY on the provided context. 
-If the answer cannot be found in the context, respond with "I cannot answer this question based on the provided document."
+            if "error" in response:
+                return response["error"]
+            text = response.get("response", "Sorry, I couldn't generate a response.")
+            return self._finish_answer(question, text, self._format_sources(docs), model, fingerprint)
+        except Exception as e:
+            registry.inc("assistant_errors_total", stage="answer")
+            return f"Error generating response: {str(e)}"
 
-Context: {context}
+    def stream_answer(self, question: str) -> Iterator[str]:
+        """Stream an answer to a question based on the current context."""
+        if not self.document_store:
+            yield NO_DOCUMENT_MESSAGE
+            return
 
-Question: {question}
+        try:
+            model, fingerprint, follow_up = self._cache_scope(question)
+            cached = self.response_cache.get(model, fingerprint, question)
+            registry.annotate(response_cache="miss" if cached is None else "hit")
+            if cached is not None:
+                self.memory.add_exchange(question, cached)
+                yield cached
+                return
 
-Answer:"""
+            docs = self._retrieve(question)
+            if not docs:
+                yield NO_RELEVANT_CONTEXT_MESSAGE
+                return
 
-            response = self.ollama_client.generate(
-                prompt=prompt,
-                system="You are a helpful assistant that answers questions based ONLY on the provided context. If the answer cannot be found in the context, respond with 'I cannot answer this question based on the provided document.'"
+            prompt = self._build_qa_prompt(question, docs, follow_up)
+            answer = []
+            # The opening is held back until it shows whether this is a refusal,
+            # which is replaced by CANNOT_ANSWER_MESSAGE as in get_response
+            length = streamed = 0
+            chunks = registry.timed_iter(
+                "generate",
+                self.ollama_client.stream_generate(prompt=prompt, system=QA_SYSTEM_PROMPT, keep_alive=KEEP_ALIVE),
             )
+            for chunk in chunks:
+                if "error" in chunk:
+                    yield chunk["error"]
+                    return
+                piece = chunk.get("response", "")
+                if not piece:
+                    continue
+                answer.append(piece)
+                length += len(piece)
+                if streamed:
+                    streamed += len(piece)
+                    yield piece
+                elif length >= REFUSAL_WINDOW and not self._is_refusal("".join(answer)):
+                    streamed = length
+                    yield "".join(answer)
 
-            if "error" in response:
-                return response["error"]
-            
-            answer = response.get("response", "Sorry, I couldn't generate a response.")
-            
-            # Check if the answer indicates no information was found
-            if "cannot answer" in answer.lower() or "not in the document" in answer.lower():
-                return "I cannot answer this question based on the provided document. Please try asking about something else in the document."
-            
-            return answer
+            text = "".join(answer)
+            final = self._finish_answer(question, text, self._format_sources(docs), model, fingerprint)
+            # Whatever was not streamed: a short answer or the refusal message, then the sources
+            yield final[streamed:]
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            registry.inc("assistant_errors_total", stage="answer")
+            yield f"Error generating response: {str(e)}"
 
     def chitchat(self, message: str) -> str:
         """Handle casual conversation."""
         try:
-            response = self.ollama_client.chat(
-                prompt=message,
-                system="You are a friendly and helpful AI assistant. Keep your responses concise and engaging. For questions about specific information, politely explain that you don't have access to that information."
-            )
+            with registry.span("generate"):
+                response = self.ollama_client.chat(
+                    prompt=message, system=CHITCHAT_SYSTEM_PROMPT, history=self.memory.messages(), keep_alive=KEEP_ALIVE
+                )
 
             if "error" in response:
                 return response["error"]
             
-            return response.get("message", {}).get("content", "Sorry, I couldn't generate a response.")
+            reply = response.get("message", {}).get("content", "Sorry, I couldn't generate a response.")
+            self.memory.add_exchange(message, reply)
+            return reply
         except Exception as e:
+            registry.inc("assistant_errors_total", stage="chitchat")
             return f"Error in chitchat: {str(e)}"
+
+    def stream_chitchat(self, message: str) -> Iterator[str]:
+        """Stream a casual conversation reply."""
+        try:
+            chunks = registry.timed_iter(
+                "generate",
+                self.ollama_client.stream_chat(
+                    prompt=message, system=CHITCHAT_SYSTEM_PROMPT, history=self.memory.messages(), keep_alive=KEEP_ALIVE
+                ),
+            )
+            reply = []
+            for chunk in chunks:
+                if "error" in chunk:
+                    yield chunk["error"]
+                    return
+                reply.append(chunk.get("message", {}).get("content", ""))
+                yield reply[-1]
+            self.memory.add_exchange(message, "".join(reply))
+        except Exception as e:
+            registry.inc("assistant_errors_total", stage="chitchat")
+            yield f"Error in chitchat: {str(e)}"
     
     def get_response(self, query: str) -> str:
         """Get response based on query type and available context."""
+        with registry.trace("answer"):
+            return self._get_response(query)
+
+    def _get_response(self, query: str) -> str:
         # If we have a document store, try to answer from it first
         if self.document_store is not None:
             try:
@@ -126,14 +578,98 @@ Answer:"""
                 
                 return answer
             except Exception as e:
+                registry.inc("assistant_errors_total", stage="document qa")
                 print(f"Error in document QA: {e}")
                 return self.chitchat(query)
         
         # If no document store, handle as chitchat
         return self.chitchat(query)
+
+    def stream_response(self, query: str) -> Iterator[str]:
+        """Stream the response token by token, routing like get_response."""
+        with registry.trace("answer"):
+            if self.document_store is not None:
+                yield from self.stream_answer(query)
+            else:
+                yield from self.stream_chitchat(query)
     
+    async def aanswer_question(self, question: str) -> str:
+        """Async variant of answer_question; retrieval and generation run in worker threads."""
+        if not self.document_store:
+            return NO_DOCUMENT_MESSAGE
+
+        try:
+            model, fingerprint, follow_up = self._cache_scope(question)
+            cached = await asyncio.to_thread(self.response_cache.get, model, fingerprint, question)
+            registry.annotate(response_cache="miss" if cached is None else "hit")
+            if cached is not None:
+                await asyncio.to_thread(self.memory.add_exchange, question, cached)
+                return cached
+
+            docs = await asyncio.to_thread(self._retrieve, question)
+            if not docs:
+                return NO_RELEVANT_CONTEXT_MESSAGE
+
+            prompt = self._build_qa_prompt(question, docs, follow_up)
+            # Through the shared client, so the request is scheduled, retried and
+            # keeps the model warm like any other; a worker thread waits for it
+            with registry.span("generate"):
+                response = await asyncio.to_thread(
+                    self.ollama_client.generate, prompt=prompt, system=QA_SYSTEM_PROMPT, keep_alive=KEEP_ALIVE
+                )
+
+            if "error" in response:
+                return response["error"]
+            text = response.get("response", "Sorry, I couldn't generate a response.")
+            return await asyncio.to_thread(
+                self._finish_answer, question, text, self._format_sources(docs), model, fingerprint
+            )
+        except Exception as e:
+            registry.inc("assistant_errors_total", stage="answer")
+            return f"Error generating response: {str(e)}"
+
+    async def achitchat(self, message: str) -> str:
+        """Async variant of chitchat."""
+        try:
+            with registry.span("generate"):
+                response = await asyncio.to_thread(
+                    self.ollama_client.chat,
+                    prompt=message,
+                    system=CHITCHAT_SYSTEM_PROMPT,
+                    history=self.memory.messages(),
+                    keep_alive=KEEP_ALIVE,
+                )
+
+            if "error" in response:
+                return response["error"]
+
+            reply = response.get("message", {}).get("content", "Sorry, I couldn't generate a response.")
+            # Compaction may call the model to summarize, so keep it off the event loop
+            await asyncio.to_thread(self.memory.add_exchange, message, reply)
+            return reply
+        except Exception as e:
+            registry.inc("assistant_errors_total", stage="chitchat")
+            return f"Error in chitchat: {str(e)}"
+
+    async def aget_response(self, query: str) -> str:
+        """Async variant of get_response, so many sessions can share one event loop."""
+        with registry.trace("answer"):
+            return await self._aget_response(query)
+
+    async def _aget_response(self, query: str) -> str:
+        if self.document_store is not None:
+            try:
+                return await self.aanswer_question(query)
+            except Exception as e:
+                registry.inc("assistant_errors_total", stage="document qa")
+                print(f"Error in document QA: {e}")
+                return await self.achitchat(query)
+
+        return await self.achitchat(query)
+
     def update_model(self, model_name: str):
         """Update the model being used"""
         self.model_name = model_name
-        self.llm = OllamaLLM(model=model_name)
-        self.document_store = None 
\ No newline at end of file
+        if self._knowledge_base is not None:
+            self._knowledge_base.clear()
+        self.chunk_stats.clear() 
\ No newline at end of file
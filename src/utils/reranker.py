@@ -0,0 +1,24 @@
+from typing import List
+
+from langchain_core.documents import Document
+
+DEFAULT_RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+class CrossEncoderReranker:
+    """Re-scores retrieved chunks with a small cross-encoder that runs on CPU."""
+
+    def __init__(self, model_name: str = DEFAULT_RERANKER_MODEL, batch_size: int = 16):
+        # Imported here: sentence-transformers pulls in torch
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = CrossEncoder(model_name, device="cpu")
+
+    def rerank(self, query: str, docs: List[Document], top_k: int = 3) -> List[Document]:
+        """The top_k docs ordered by cross-encoder relevance to the query."""
+        if not docs:
+            return []
+        scores = self.model.predict([(query, doc.page_content) for doc in docs], batch_size=self.batch_size)
+        ranked = sorted(zip(scores, range(len(docs))), key=lambda item: item[0], reverse=True)
+        return [docs[i] for _, i in ranked[:top_k]]
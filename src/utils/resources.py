@@ -0,0 +1,126 @@
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Optional
+
+from src.models.ollama_client import ModelCatalog, fetch_models
+from src.models.scheduler import OllamaScheduler
+from src.models.transport import OllamaTransport
+from src.models.warmup import KeepAlive, ModelWarmer
+from src.utils.embedding_names import DEFAULT_BACKEND, embedding_id, hub_repo
+from src.utils.index_cache import IndexCache
+from src.utils.response_cache import ResponseCache
+
+if TYPE_CHECKING:
+    from src.utils.embedding_cache import CachedEmbeddings
+    from src.utils.reranker import CrossEncoderReranker
+
+# Process-wide resources shared by every QAHandler (i.e. every Streamlit
+# session), so opening another browser tab does not load another copy of
+# the embedding model or open another connection pool.
+_resources: Dict[Hashable, Any] = {}
+_creation_locks: Dict[Hashable, threading.Lock] = {}
+_lock = threading.Lock()
+
+def _shared(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """Return the resource stored under key, creating it at most once."""
+    with _lock:
+        if key in _resources:
+            return _resources[key]
+        creation_lock = _creation_locks.setdefault(key, threading.Lock())
+
+    # Build outside the global lock so a slow model load does not block
+    # unrelated resources; concurrent callers for the same key wait here.
+    with creation_lock:
+        with _lock:
+            if key in _resources:
+                return _resources[key]
+        resource = factory()
+        with _lock:
+            _resources[key] = resource
+        return resource
+
+def get_transport(base_url: str) -> OllamaTransport:
+    """Shared connection pool for an Ollama server."""
+    return _shared(("transport", base_url), lambda: OllamaTransport(base_url))
+
+def get_model_catalog(base_url: str) -> ModelCatalog:
+    """Shared list of models installed on an Ollama server."""
+    transport = get_transport(base_url)
+    return _shared(("catalog", base_url), lambda: ModelCatalog(lambda: fetch_models(transport)))
+
+def get_scheduler(base_url: str) -> OllamaScheduler:
+    """Shared request scheduler for an Ollama server, so sessions queue fairly client-side."""
+    # Admit as many requests per model as the server runs in parallel
+    parallel = int(os.environ.get("OLLAMA_NUM_PARALLEL", "2"))
+    return _shared(("scheduler", base_url), lambda: OllamaScheduler(max_concurrency=parallel))
+
+def get_warmer(base_url: str, keep_alive: KeepAlive) -> ModelWarmer:
+    """Shared model warmer for an Ollama server, so each model is preloaded and pinged once."""
+    transport = get_transport(base_url)
+    return _shared(("warmer", base_url, keep_alive), lambda: ModelWarmer(transport, keep_alive=keep_alive))
+
+def _load_embeddings(
+    model_name: str, batch_size: int, backend: str, threads: Optional[int], base_url: str
+) -> "CachedEmbeddings":
+    from src.utils.embedding_backends import create_embeddings
+    from src.utils.embedding_cache import CachedEmbeddings
+
+    return CachedEmbeddings(
+        create_embeddings(backend, model_name, batch_size, threads, base_url),
+        model_name=embedding_id(backend, model_name),
+        batch_size=batch_size,
+    )
+
+def get_embeddings(
+    model_name: str,
+    batch_size: int,
+    backend: str = DEFAULT_BACKEND,
+    threads: Optional[int] = None,
+    base_url: str = "http://localhost:11434",
+) -> "CachedEmbeddings":
+    """Shared embedding model on the given backend, wrapped in the embedding cache."""
+    return _shared(
+        ("embeddings", model_name, batch_size, backend, threads, base_url),
+        lambda: _load_embeddings(model_name, batch_size, backend, threads, base_url),
+    )
+
+def _load_token_counter(model_name: str) -> Callable[[str], int]:
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(hub_repo(model_name))
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False, verbose=False))
+
+def get_token_counter(model_name: str) -> Callable[[str], int]:
+    """Shared function counting text length in an embedding model's tokens."""
+    return _shared(("token_counter", model_name), lambda: _load_token_counter(model_name))
+
+def _load_reranker(model_name: str) -> "CrossEncoderReranker":
+    from src.utils.reranker import CrossEncoderReranker
+
+    return CrossEncoderReranker(model_name)
+
+def get_reranker(model_name: str) -> "CrossEncoderReranker":
+    """Shared cross-encoder used to rerank retrieved chunks."""
+    return _shared(("reranker", model_name), lambda: _load_reranker(model_name))
+
+def get_index_cache() -> IndexCache:
+    """Shared on-disk index cache."""
+    return _shared("index_cache", IndexCache)
+
+def get_response_cache(
+    embed: Callable[[str], List[float]], semantic_threshold: Optional[float] = None, key: Hashable = None
+) -> ResponseCache:
+    """Shared answer cache; sessions asking about the same documents share hits.
+
+    ``key`` separates caches whose ``embed`` differs, e.g. per Ollama server.
+    """
+    return _shared(
+        ("response_cache", semantic_threshold, key),
+        lambda: ResponseCache(semantic_threshold=semantic_threshold, embed=embed),
+    )
+
+def clear() -> None:
+    """Drop every shared resource."""
+    with _lock:
+        _resources.clear()
+        _creation_locks.clear()
@@ -0,0 +1,134 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+@dataclass
+class _Entry:
+    answer: str
+    created_at: float
+    vector: Optional[np.ndarray] = None
+
+class ResponseCache:
+    """LRU/TTL cache of answers keyed on (model, document-set fingerprint, question).
+
+    Questions are normalised (case, whitespace, trailing punctuation) before
+    the exact lookup. When ``semantic_threshold`` and ``embed`` are given, a
+    miss falls back to the cached question in the same (model, fingerprint)
+    scope whose embedding has the highest cosine similarity, if that
+    similarity reaches the threshold.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: Optional[float] = 3600,
+        semantic_threshold: Optional[float] = None,
+        embed: Optional[Callable[[str], List[float]]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self.embed = embed
+        self._entries: "OrderedDict[Tuple[str, str, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        """Canonical form of a question for exact matching."""
+        question = re.sub(r"\s+", " ", question.strip().lower())
+        return question.rstrip("?!. ")
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.semantic_threshold is not None and self.embed is not None
+
+    def _vector(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embed(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return self.ttl_seconds is not None and now - entry.created_at > self.ttl_seconds
+
+    def get(self, model: str, fingerprint: str, question: str) -> Optional[str]:
+        """Return a cached answer, or None on a miss."""
+        key = (model, fingerprint, self.normalize(question))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.answer
+
+        if self.semantic_enabled:
+            answer = self._semantic_get(model, fingerprint, self._vector(question), now)
+            if answer is not None:
+                return answer
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _semantic_get(self, model: str, fingerprint: str, vector: np.ndarray, now: float) -> Optional[str]:
+        with self._lock:
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if key[0] == model and key[1] == fingerprint
+                and entry.vector is not None and not self._expired(entry, now)
+            ]
+            if not candidates:
+                return None
+
+            similarities = np.stack([entry.vector for _, entry in candidates]) @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.semantic_threshold:
+                return None
+
+            key, entry = candidates[best]
+            self._entries.move_to_end(key)
+            self.semantic_hits += 1
+            return entry.answer
+
+    def put(self, model: str, fingerprint: str, question: str, answer: str) -> None:
+        """Cache an answer, evicting the least recently used entry when full."""
+        vector = self._vector(question) if self.semantic_enabled else None
+        key = (model, fingerprint, self.normalize(question))
+        with self._lock:
+            self._entries[key] = _Entry(answer=answer, created_at=time.time(), vector=vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.semantic_hits + self.misses
+        return (self.hits + self.semantic_hits) / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Counters for monitoring."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+        }
@@ -0,0 +1,41 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+class StartupTimer:
+    """Records how long each startup phase took, including lazily loaded ones."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block and record it under name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Store a phase duration; later runs of the same phase are ignored."""
+        with self._lock:
+            self.phases.setdefault(name, seconds)
+
+    def mark(self, name: str) -> None:
+        """Record the time elapsed since the timer was created, e.g. first render."""
+        self.record(name, time.perf_counter() - self.started_at)
+
+    def report(self) -> Dict[str, float]:
+        """Phase name to duration in seconds, in the order the phases finished."""
+        with self._lock:
+            return dict(self.phases)
+
+    def format_report(self) -> str:
+        return "\n".join(f"{name}: {seconds * 1000:.0f} ms" for name, seconds in self.report().items())
+
+# Created when the app first imports this module, i.e. close to process start
+startup_timer = StartupTimer()
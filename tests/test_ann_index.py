@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from src.utils.ann_index import benchmark_backends, build_ann_index, choose_backend, effective_backend, format_report
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, 32)).astype(np.float32)
+    return centers[rng.integers(0, 20, 3000)] + 0.2 * rng.normal(size=(3000, 32)).astype(np.float32)
+
+def test_auto_backend_grows_with_corpus():
+    assert choose_backend(1_000) == "flat"
+    assert choose_backend(50_000) == "ivf_sq8"
+    assert choose_backend(1_000_000) == "ivf_pq"
+
+def test_untrainable_sizes_fall_back_to_flat():
+    assert effective_backend("ivf_pq", 500) == "flat"
+    assert effective_backend("hnsw", 10) == "hnsw"
+    with pytest.raises(ValueError):
+        effective_backend("lsh", 10)
+
+@pytest.mark.parametrize("backend", ["sq_fp16", "sq8", "hnsw", "ivf_flat", "ivf_sq8"])
+def test_backends_find_nearest_neighbours(vectors, backend):
+    index = build_ann_index(vectors, backend, nprobe=8)
+    assert index.ntotal == len(vectors)
+    _, ids = index.search(vectors[:20], 1)
+    # Each vector is its own nearest neighbour; ids are row positions
+    assert (ids[:, 0] == np.arange(20)).mean() >= 0.9
+
+def test_benchmark_reports_recall_against_flat(vectors):
+    rows = benchmark_backends(vectors, vectors[:10], ["flat", "ivf_flat"], k=5)
+    assert rows[0]["recall"] == 1.0
+    assert 0.5 <= rows[1]["recall"] <= 1.0
+    assert rows[1]["resolved"] == "ivf_flat"
+    assert "ivf_flat" in format_report(rows)
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import httpx
+
+from src.models.async_ollama_client import AsyncOllamaClient
+
+def make_client(handler):
+    transport = httpx.MockTransport(handler)
+    client = AsyncOllamaClient(client=httpx.AsyncClient(transport=transport, base_url="http://ollama"))
+    return client
+
+def test_fetches_models_lazily():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"models": [{"name": "llama2"}, {"name": "mistral"}]})
+
+    client = make_client(handler)
+    assert client.available_models is None
+
+    models = asyncio.run(client.get_available_models())
+    assert models == ["llama2", "mistral"]
+    assert calls == ["/api/tags"]
+
+def test_generate():
+    def handler(request):
+        body = json.loads(request.content)
+        assert request.url.path == "/api/generate"
+        assert body["stream"] is False
+        return httpx.Response(200, json={"response": f"echo {body['prompt']}"})
+
+    client = make_client(handler)
+    client.available_models = ["llama2"]
+    response = asyncio.run(client.generate("hi", model="llama2"))
+    assert response == {"response": "echo hi"}
+
+def test_stream_chat():
+    lines = [
+        {"message": {"content": "Hel"}, "done": False},
+        {"message": {"content": "lo"}, "done": False},
+        {"message": {"content": ""}, "done": True},
+    ]
+
+    def handler(request):
+        content = "\n".join(json.dumps(line) for line in lines) + "\n"
+        return httpx.Response(200, content=content.encode())
+
+    client = make_client(handler)
+    client.available_models = ["llama2"]
+
+    async def collect():
+        return [chunk async for chunk in client.stream_chat("hi", model="llama2")]
+
+    chunks = asyncio.run(collect())
+    assert "".join(c["message"]["content"] for c in chunks) == "Hello"
+
+def test_concurrent_generate():
+    async def handler(request):
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"response": "ok"})
+
+    client = make_client(handler)
+    client.available_models = ["llama2"]
+
+    async def fan_out():
+        return await asyncio.gather(*[client.generate(f"q{i}", model="llama2") for i in range(10)])
+
+    responses = asyncio.run(fan_out())
+    assert all(r == {"response": "ok"} for r in responses)
+
+def test_unavailable_model():
+    client = make_client(lambda request: httpx.Response(500))
+    client.available_models = ["llama2"]
+    response = asyncio.run(client.chat("hi", model="missing"))
+    assert "ollama pull missing" in response["error"]
@@ -0,0 +1,53 @@
+import argparse
+import io
+
+from benchmarks.corpus import make_corpus
+from benchmarks.fake_ollama import FakeOllama
+from benchmarks.run import HashEmbeddings, benchmark_embeddings, compare, summarize
+from src.document_processor.processor import DocumentProcessor
+from src.models.ollama_client import OllamaClient
+
+def test_fake_ollama_streams_over_http():
+    with FakeOllama(tokens=3, token_latency=0) as fake:
+        client = OllamaClient(fake.url)
+        assert client.get_available_models() == ["gemma3:4b"]
+
+        chunks = list(client.stream_generate("Hi", keep_alive="5m"))
+        assert "".join(chunk.get("response", "") for chunk in chunks) == "token token token "
+        assert chunks[-1]["done"] and chunks[-1]["eval_count"] == 3
+        assert fake.requests[-1]["keep_alive"] == "5m"
+
+        reply = client.chat("Hi")
+        assert reply["message"]["content"] == "token " * 3
+        assert "ollama pull" in client.generate("Hi", model="missing")["error"]
+
+def test_synthetic_corpus_is_extractable():
+    files, facts = make_corpus(["pdf", "docx", "txt"], documents=1, pages=2)
+    processor = DocumentProcessor()
+    for name, data in files:
+        text = processor.process_document(io.BytesIO(data))
+        assert any(f"Error code {code} means" in text for code in facts), name
+
+def test_summarize_and_compare():
+    stats = summarize([0.01, 0.02, 0.03, 0.04])
+    assert stats["count"] == 4
+    assert round(stats["p50_ms"], 3) == 25.0
+    assert round(stats["throughput_per_s"], 3) == 40.0
+
+    baseline = {"stages": {"qa": {"p50_ms": 100.0, "p95_ms": 200.0}}}
+    current = {"stages": {"qa": {"p50_ms": 130.0, "p95_ms": 210.0}, "new": {"p50_ms": 1.0, "p95_ms": 1.0}}}
+    assert compare(current, baseline, tolerance=0.2) == ["qa p50_ms: 100.00 -> 130.00 (+30%)"]
+
+def test_real_embedding_runs_start_with_an_empty_cache(monkeypatch):
+    import src.utils.embedding_backends as backends
+
+    monkeypatch.setattr(backends, "create_embeddings", lambda *args: HashEmbeddings())
+    args = argparse.Namespace(fake_embeddings=False, warm_cache=False)
+    first = benchmark_embeddings(args, "http://localhost:11434")
+    first.embed_documents(["error code 42"])
+    second = benchmark_embeddings(args, "http://localhost:11434")
+    assert len(second.store) == 0
+    second.embed_documents(["error code 42"])
+    assert second.misses == 1 and second.hits == 0
+
+    assert benchmark_embeddings(argparse.Namespace(fake_embeddings=False, warm_cache=True), "") is None
@@ -0,0 +1,28 @@
+from src.utils.bm25 import BM25Index, tokenize
+
+def test_tokenize_keeps_identifiers_and_parts():
+    assert tokenize("Error E42 on XR-200!") == ["error", "e42", "on", "xr-200", "xr", "200"]
+
+def test_search_ranks_exact_identifier_first():
+    index = BM25Index()
+    index.add("a", "the pump reports error E41 when the inlet is blocked")
+    index.add("b", "error E42 means the filter is clogged")
+    index.add("c", "general error handling for all pumps and fans")
+
+    results = index.search("error E42", k=2)
+    assert results[0][0] == "b"
+    assert len(results) == 2
+    assert index.search("nonexistent") == []
+
+def test_remove_and_replace():
+    index = BM25Index()
+    index.add("a", "filter clogged")
+    index.add("b", "fan speed")
+    index.remove(["a"])
+    assert len(index) == 1
+    assert index.search("filter") == []
+    assert "filter" not in index.postings
+
+    index.add("b", "pump pressure")
+    assert index.search("fan") == []
+    assert index.search("pump")[0][0] == "b"
@@ -0,0 +1,64 @@
+from src.document_processor.processor import Section
+from src.utils.chunking import ChunkStats, StructuredChunker, simhash
+
+def count_words(text):
+    return len(text.split())
+
+def test_structured_chunks_respect_token_budget():
+    chunker = StructuredChunker(count_words, max_tokens=20, min_tokens=5)
+    sentences = " ".join(f"Sentence number {i} is here." for i in range(30))
+    stats = ChunkStats()
+    chunks = list(chunker.chunk([Section(sentences, page=1)], stats))
+
+    assert all(chunk.tokens <= 20 for chunk in chunks)
+    assert all(chunk.text.endswith(".") for chunk in chunks)  # Split on sentence boundaries
+    assert stats.chunks == len(chunks) and stats.max_tokens <= 20
+    joined = " ".join(chunk.text for chunk in chunks)
+    assert all(f"number {i} " in joined for i in range(30))
+
+def test_chunks_do_not_cross_headings_and_carry_them():
+    chunker = StructuredChunker(count_words, max_tokens=100, min_tokens=5)
+    sections = [
+        Section("Setup", heading="Setup", is_heading=True),
+        Section("Mount the pump on the wall bracket.", heading="Setup"),
+        Section("E42 means the filter is clogged.", heading="Errors"),
+    ]
+    chunks = list(chunker.chunk(sections))
+    assert [chunk.heading for chunk in chunks] == ["Setup", "Errors"]
+    assert chunks[1].text == "Errors\nE42 means the filter is clogged."
+    assert chunks[1].metadata == {"heading": "Errors"}
+
+def test_small_pages_are_merged_until_min_tokens():
+    chunker = StructuredChunker(count_words, max_tokens=100, min_tokens=6)
+    sections = [Section("one two three", page=1), Section("four five six", page=2), Section("seven", page=3)]
+    chunks = list(chunker.chunk(sections))
+    assert [(chunk.page, chunk.text) for chunk in chunks] == [(1, "one two three four five six"), (3, "seven")]
+
+def test_near_duplicate_chunks_are_dropped():
+    chunker = StructuredChunker(count_words, max_tokens=100, min_tokens=1)
+    footer = "Copyright 2024 Example Pumps Inc. All rights reserved. Do not distribute this manual."
+    sections = [
+        Section("Pump manual introduction and safety notes for installers.", page=1),
+        Section(footer, page=2),
+        Section("Maintenance intervals for the filter and impeller.", page=3),
+        Section(footer.upper() + "\n", page=4),  # Same words, different case and spacing
+    ]
+    stats = ChunkStats()
+    chunks = list(chunker.chunk(sections, stats))
+    assert len(chunks) == 3
+    assert stats.duplicates == 1
+
+def test_overlap_repeats_trailing_sentences():
+    chunker = StructuredChunker(count_words, max_tokens=10, min_tokens=1, overlap_tokens=4)
+    text = "Alpha beta gamma delta. Epsilon zeta eta theta. Iota kappa lambda mu."
+    chunks = [chunk.text for chunk in chunker.chunk([Section(text)])]
+    assert chunks == [
+        "Alpha beta gamma delta. Epsilon zeta eta theta.",
+        "Epsilon zeta eta theta. Iota kappa lambda mu.",
+    ]
+
+def test_simhash_is_close_for_similar_text():
+    a = simhash("the quick brown fox jumps over the lazy dog near the river bank today")
+    b = simhash("the quick brown fox jumps over the lazy dog near the river bank tonight")
+    c = simhash("completely different content about pump maintenance schedules and filters")
+    assert bin(a ^ b).count("1") < bin(a ^ c).count("1")
@@ -1,5 +1,12 @@
-import pytest
+import codecs
 import io
+import zipfile
+from unittest.mock import patch
+
+import PyPDF2
+import docx
+import pytest
+
 from src.document_processor.processor import DocumentProcessor
 
 @pytest.fixture
@@ -51,4 +58,125 @@ def test_process_unknown_file(processor):
     
     # Should process as text file
     result = processor.process_document(file)
-    assert isinstance(result, str) 
\ No newline at end of file
+    assert isinstance(result, str) 
+
+def make_pdf(pages):
+    """Build a minimal PDF with one line of Helvetica text per page."""
+    objects = []
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append("<</Type /Catalog /Pages 2 0 R>>")
+    objects.append(f"<</Type /Pages /Kids [{kids}] /Count {len(pages)}>>")
+    objects.append("<</Type /Font /Subtype /Type1 /BaseFont /Helvetica>>")
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(
+            f"<</Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources <</Font <</F1 3 0 R>>>> /Contents {5 + 2 * i} 0 R>>"
+        )
+        objects.append(f"<</Length {len(stream)}>>\nstream\n{stream}\nendstream")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<</Size {len(objects) + 1} /Root 1 0 R>>\nstartxref\n{xref}\n%%EOF".encode()
+    return out
+
+def test_iter_document_yields_pages(processor):
+    file = io.BytesIO(make_pdf(["First page", "Second page"]))
+    file.name = "test.pdf"
+
+    pages = list(processor.iter_document(file))
+    assert len(pages) == 2
+    assert "First page" in pages[0]
+    assert "Second page" in pages[1]
+
+def test_parallel_pdf_extraction_matches_sequential():
+    pages = [f"Page number {i}" for i in range(12)]
+    data = make_pdf(pages)
+
+    sequential = DocumentProcessor().process_document(io.BytesIO(data))
+    parallel = DocumentProcessor(pdf_workers=3, parallel_min_pages=4).process_document(io.BytesIO(data))
+    assert parallel == sequential
+    assert all(page in parallel for page in pages)
+
+def test_iter_txt_streams_lines(processor):
+    file = io.BytesIO(b"line one\nline two")
+    file.name = "test.txt"
+    assert list(processor.iter_document(file)) == ["line one\n", "line two", "\n"]
+
+def test_sniffs_unnamed_pdf_and_parses_once(processor):
+    file = io.BytesIO(make_pdf(["Sniffed page"]))
+
+    with patch("PyPDF2.PdfReader", wraps=PyPDF2.PdfReader) as reader:
+        detected = processor._detect_file(file)
+        assert detected.mime_type == "application/pdf"
+        assert detected.reader is not None
+
+        file.seek(0)
+        result = processor.process_document(file)
+        assert "Sniffed page" in result
+        # One open for detection above, one for process_document; never two per call
+        assert reader.call_count == 2
+
+def test_sniffs_unnamed_docx(processor):
+    document = docx.Document()
+    document.add_paragraph("Hello from docx")
+    file = io.BytesIO()
+    document.save(file)
+    file.seek(0)
+
+    assert processor._get_file_type(file) == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    assert processor.process_document(file) == "Hello from docx\n"
+
+def test_sniffs_text_with_bom(processor):
+    file = io.BytesIO(codecs.BOM_UTF8 + "Grüße".encode("utf-8"))
+    assert processor.process_document(file) == "Grüße\n"
+
+    file = io.BytesIO("utf-16 text".encode("utf-16"))
+    assert processor.process_document(file) == "utf-16 text\n"
+
+def test_rejects_non_docx_zip(processor):
+    file = io.BytesIO()
+    with zipfile.ZipFile(file, "w") as archive:
+        archive.writestr("data.csv", "a,b")
+    file.seek(0)
+
+    with pytest.raises(ValueError, match="Unsupported file type"):
+        processor.process_document(file)
+
+def test_sections_carry_pdf_pages(processor):
+    file = io.BytesIO(make_pdf(["First page", "Second page"]))
+    sections = list(processor.iter_sections(file))
+    assert [section.page for section in sections] == [1, 2]
+    assert "Second page" in sections[1].text
+
+def test_sections_carry_docx_headings(processor):
+    document = docx.Document()
+    document.add_heading("Installation", level=1)
+    document.add_paragraph("Mount the pump.")
+    document.add_heading("Troubleshooting", level=1)
+    document.add_paragraph("E42 means the filter is clogged.")
+    file = io.BytesIO()
+    document.save(file)
+    file.seek(0)
+
+    sections = [section for section in processor.iter_sections(file) if not section.is_heading]
+    assert [(section.heading, section.text) for section in sections] == [
+        ("Installation", "Mount the pump.\n"),
+        ("Troubleshooting", "E42 means the filter is clogged.\n"),
+    ]
+
+def test_sections_group_text_paragraphs_under_markdown_headings(processor):
+    file = io.BytesIO(b"# Setup\nline one\nline two\n\nline three\n## Errors\nE42\n")
+    file.name = "notes.txt"
+    sections = [section for section in processor.iter_sections(file) if not section.is_heading]
+    assert [(section.heading, section.text) for section in sections] == [
+        ("Setup", "line one\nline two\n"),
+        ("Setup", "line three\n"),
+        ("Errors", "E42\n"),
+    ]
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from benchmarks.embeddings import chunk_texts
+from benchmarks.fake_ollama import FakeOllama
+from benchmarks.run import HashEmbeddings
+from src.utils.embedding_backends import (
+    OllamaEmbeddings,
+    create_embeddings,
+    embedding_id,
+    hub_repo,
+    length_buckets,
+    parity_report,
+)
+
+class ShiftedEmbeddings(HashEmbeddings):
+    """Hash vectors with one extra dimension set, to disagree with HashEmbeddings."""
+
+    def _embed(self, text):
+        vector = super()._embed(text)
+        vector[0] += 1.0
+        return vector
+
+def test_length_buckets_group_similar_lengths():
+    lengths = [5, 1, 9, 2, 8, 3]
+    buckets = length_buckets(lengths, batch_size=2)
+    assert buckets == [[1, 3], [5, 0], [4, 2]]
+    assert sorted(i for bucket in buckets for i in bucket) == list(range(len(lengths)))
+
+def test_embedding_id_and_hub_repo():
+    assert embedding_id("huggingface", "all-MiniLM-L6-v2") == "all-MiniLM-L6-v2"
+    assert embedding_id("onnx", "all-MiniLM-L6-v2") == "onnx:all-MiniLM-L6-v2"
+    assert hub_repo("all-MiniLM-L6-v2") == "sentence-transformers/all-MiniLM-L6-v2"
+    assert hub_repo("BAAI/bge-small-en") == "BAAI/bge-small-en"
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        create_embeddings("tpu", "all-MiniLM-L6-v2")
+
+def test_ollama_backend_batches_requests():
+    texts = chunk_texts(5)
+    with FakeOllama() as fake:
+        embeddings = OllamaEmbeddings("all-MiniLM-L6-v2", fake.url, batch_size=2)
+        vectors = embeddings.embed_documents(texts)
+        assert [len(request["input"]) for request in fake.requests] == [2, 2, 1]
+        assert fake.requests[0]["model"] == "all-minilm"
+    assert np.allclose(vectors, HashEmbeddings().embed_documents(texts))
+
+def test_parity_report():
+    texts = chunk_texts(8)
+    same = parity_report(HashEmbeddings(), HashEmbeddings(), texts)
+    assert same["texts"] == 8
+    assert same["mean_cosine"] == pytest.approx(1.0)
+
+    shifted = parity_report(ShiftedEmbeddings(), HashEmbeddings(), texts)
+    assert shifted["min_cosine"] <= shifted["mean_cosine"] < 0.99
@@ -0,0 +1,66 @@
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from src.utils.embedding_cache import CachedEmbeddings, EmbeddingStore
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.document_calls = []
+        self.query_calls = 0
+
+    def embed_documents(self, texts):
+        self.document_calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return [float(len(text)), 2.0]
+
+@pytest.fixture
+def store(tmp_path):
+    return EmbeddingStore(str(tmp_path / "embeddings.sqlite"))
+
+def test_duplicates_embedded_once_and_batched(store):
+    base = CountingEmbeddings()
+    cached = CachedEmbeddings(base, "test-model", store=store, batch_size=2)
+
+    vectors = cached.embed_documents(["a", "bb", "a", "ccc", "dddd"])
+    assert vectors[0] == vectors[2] == [1.0, 1.0]
+    assert vectors[3] == [3.0, 1.0]
+    assert base.document_calls == [["a", "bb"], ["ccc", "dddd"]]
+    assert cached.misses == 4
+    assert cached.hits == 1
+
+def test_memory_and_persistent_hits(store):
+    base = CountingEmbeddings()
+    cached = CachedEmbeddings(base, "test-model", store=store)
+    cached.embed_documents(["header", "body"])
+
+    # Same process: served from memory
+    cached.embed_documents(["header"])
+    assert len(base.document_calls) == 1
+
+    # New process: served from SQLite
+    fresh_base = CountingEmbeddings()
+    fresh = CachedEmbeddings(fresh_base, "test-model", store=store)
+    assert fresh.embed_documents(["body", "header"]) == [[4.0, 1.0], [6.0, 1.0]]
+    assert fresh_base.document_calls == []
+    assert fresh.hit_ratio == 1.0
+
+def test_queries_and_models_are_namespaced(store):
+    base = CountingEmbeddings()
+    cached = CachedEmbeddings(base, "test-model", store=store)
+    cached.embed_documents(["hello"])
+    assert cached.embed_query("hello") == [5.0, 2.0]
+    assert cached.embed_query("hello") == [5.0, 2.0]
+    assert base.query_calls == 1
+
+    other = CachedEmbeddings(CountingEmbeddings(), "other-model", store=store)
+    other.embed_documents(["hello"])
+    assert other.misses == 1
+
+def test_memory_lru_is_bounded(store):
+    cached = CachedEmbeddings(CountingEmbeddings(), "test-model", store=store, max_memory_items=2)
+    cached.embed_documents(["a", "b", "c"])
+    assert len(cached._memory) == 2
+    assert len(store) == 3
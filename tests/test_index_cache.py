@@ -0,0 +1,50 @@
+import os
+import time
+
+import pytest
+
+from src.utils.index_cache import IndexCache
+
+@pytest.fixture
+def cache(tmp_path):
+    return IndexCache(cache_dir=str(tmp_path / "indexes"), max_bytes=250)
+
+def write_blob(size):
+    def save(path):
+        with open(os.path.join(path, "index.bin"), "wb") as f:
+            f.write(b"x" * size)
+    return save
+
+def test_key_depends_on_content_and_settings():
+    key = IndexCache.make_key(b"doc", embedding_model="a", chunk_size=1000)
+    assert key == IndexCache.make_key(b"doc", chunk_size=1000, embedding_model="a")
+    assert key != IndexCache.make_key(b"doc2", embedding_model="a", chunk_size=1000)
+    assert key != IndexCache.make_key(b"doc", embedding_model="b", chunk_size=1000)
+
+def test_miss_then_hit(cache):
+    assert cache.get("abc") is None
+    path = cache.put("abc", write_blob(10), chunks=3)
+    assert cache.get("abc") == path
+    assert os.path.exists(os.path.join(path, "index.bin"))
+
+def test_failed_save_leaves_no_entry(cache):
+    def broken(path):
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        cache.put("abc", broken)
+    assert cache.get("abc") is None
+    assert os.listdir(cache.cache_dir) == []
+
+def test_lru_eviction(cache):
+    cache.put("first", write_blob(100))
+    time.sleep(0.01)
+    cache.put("second", write_blob(100))
+    time.sleep(0.01)
+    cache.get("first")  # "second" is now least recently used
+    time.sleep(0.01)
+    cache.put("third", write_blob(100))
+
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+    assert cache.get("third") is not None
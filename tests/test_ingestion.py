@@ -0,0 +1,103 @@
+import hashlib
+import threading
+import time
+from types import SimpleNamespace
+
+from src.utils.ingestion import IngestionQueue
+
+class FakeHandler:
+    def __init__(self, gate=None, fail=False):
+        self.gate = gate
+        self.fail = fail
+        self.calls = []
+        self.documents = {}
+
+    def ingest(self, data, source, progress=None):
+        self.calls.append(source)
+        for stage in ("extract", "split", "embed", "index"):
+            progress(stage, 0.0)
+            if self.gate is not None:
+                self.gate.wait(timeout=5)
+            progress(stage, 1.0)
+        if self.fail:
+            raise RuntimeError("broken file")
+        self.documents[self.document_id(data)] = source
+        return data.decode()
+
+    def document_id(self, data):
+        return hashlib.md5(data).hexdigest()
+
+    def list_documents(self):
+        return [SimpleNamespace(doc_id=doc_id, source=source) for doc_id, source in self.documents.items()]
+
+    def remove_document(self, doc_id):
+        return self.documents.pop(doc_id, None) is not None
+
+def wait_for(job, timeout=5):
+    deadline = time.time() + timeout
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+def test_job_completes_with_progress():
+    queue = IngestionQueue(FakeHandler())
+    job = wait_for(queue.submit(b"three small words", "a.txt"))
+    assert job.status == "done"
+    assert job.progress == 1.0
+    assert job.words == 3
+    assert queue.status(job.job_id) is job
+
+def test_resubmission_is_deduplicated():
+    handler = FakeHandler()
+    queue = IngestionQueue(handler)
+    first = wait_for(queue.submit(b"same bytes", "a.txt"))
+    second = queue.submit(b"same bytes", "a-copy.txt")
+    assert second is first
+    assert handler.calls == ["a.txt"]
+
+def test_removed_document_is_ingested_again():
+    handler = FakeHandler()
+    queue = IngestionQueue(handler)
+    first = wait_for(queue.submit(b"same bytes", "a.txt"))
+    assert handler.remove_document(first.doc_id)
+
+    second = wait_for(queue.submit(b"same bytes", "a.txt"))
+    assert second is not first
+    assert second.status == "done"
+    assert handler.calls == ["a.txt", "a.txt"]
+    assert [doc.doc_id for doc in handler.list_documents()] == [second.doc_id]
+
+def test_cancel_running_job():
+    gate = threading.Event()
+    queue = IngestionQueue(FakeHandler(gate=gate))
+    job = queue.submit(b"slow document", "slow.txt")
+    while job.status != "running":
+        time.sleep(0.01)
+
+    assert queue.cancel(job.job_id)
+    gate.set()
+    assert wait_for(job).status == "cancelled"
+    assert not queue.cancel(job.job_id)
+
+def test_cancel_queued_job():
+    gate = threading.Event()
+    queue = IngestionQueue(FakeHandler(gate=gate), max_workers=1)
+    running = queue.submit(b"first", "first.txt")
+    queued = queue.submit(b"second", "second.txt")
+
+    assert queue.cancel(queued.job_id)
+    assert queued.status == "cancelled"
+    gate.set()
+    assert wait_for(running).status == "done"
+
+def test_failed_job_can_be_resubmitted():
+    handler = FakeHandler(fail=True)
+    queue = IngestionQueue(handler)
+    job = wait_for(queue.submit(b"bad", "bad.txt"))
+    assert job.status == "failed"
+    assert "broken file" in job.error
+
+    handler.fail = False
+    retry = wait_for(queue.submit(b"bad", "bad.txt"))
+    assert retry is not job
+    assert retry.status == "done"
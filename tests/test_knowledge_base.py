@@ -0,0 +1,155 @@
+import hashlib
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from src.utils.knowledge_base import KnowledgeBase
+
+class HashEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings for tests."""
+
+    dim = 64
+
+    def _embed(self, text):
+        vector = [0.0] * self.dim
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+@pytest.fixture
+def kb():
+    return KnowledgeBase(HashEmbeddings())
+
+def test_add_multiple_documents(kb):
+    kb.add_texts("a", "pumps.pdf", ["pump pressure settings", "pump maintenance schedule"])
+    kb.add_texts("b", "fans.docx", ["fan speed control", "fan noise levels"])
+
+    assert len(kb) == 2
+    assert kb.store.index.ntotal == 4
+
+    docs = kb.similarity_search("fan speed", k=1)
+    assert docs[0].page_content == "fan speed control"
+    assert kb.source_of(docs[0]) == "fans.docx"
+
+def test_readding_document_is_noop(kb):
+    kb.add_texts("a", "pumps.pdf", ["pump pressure settings"])
+    kb.add_texts("a", "pumps-copy.pdf", ["pump pressure settings"])
+    assert len(kb) == 1
+    assert kb.store.index.ntotal == 1
+
+def test_remove_document(kb):
+    kb.add_texts("a", "pumps.pdf", ["pump pressure settings"])
+    kb.add_texts("b", "fans.docx", ["fan speed control"])
+
+    assert kb.remove_document("a")
+    assert not kb.remove_document("a")
+    assert kb.store.index.ntotal == 1
+    assert all(kb.source_of(doc) == "fans.docx" for doc in kb.similarity_search("pump pressure", k=3))
+
+    kb.remove_document("b")
+    assert kb.store is None
+    assert kb.similarity_search("anything") == []
+
+def test_add_prebuilt_index_tags_chunks(kb):
+    index = KnowledgeBase.build_index("a", ["pump pressure settings"], kb.embeddings)
+    kb.add_index("a", "pumps.pdf", index)
+    doc = kb.similarity_search("pump", k=1)[0]
+    assert doc.metadata["doc_id"] == "a"
+
+def test_empty_document_rejected(kb):
+    with pytest.raises(ValueError):
+        kb.add_texts("a", "empty.txt", [])
+
+def test_keyword_search_finds_exact_codes(kb):
+    kb.add_texts("a", "manual.pdf", ["error E41 inlet blocked", "error E42 filter clogged", "fan speed control"])
+    docs = kb.keyword_search("E42", k=1)
+    assert docs[0].page_content == "error E42 filter clogged"
+
+    kb.remove_document("a")
+    assert kb.keyword_search("E42") == []
+
+def test_hybrid_search_fuses_and_reranks(kb):
+    kb.add_texts("a", "manual.pdf", ["error E41 inlet blocked", "error E42 filter clogged", "fan speed control"])
+
+    docs = kb.hybrid_search("what does E42 mean", k=2, dense_k=3, keyword_k=3)
+    assert docs[0].page_content == "error E42 filter clogged"
+    assert len(docs) == 2
+
+    class ReverseReranker:
+        def rerank(self, query, docs, top_k=3):
+            return list(reversed(docs))[:top_k]
+
+    reranked = kb.hybrid_search("what does E42 mean", k=1, reranker=ReverseReranker(), rerank_k=2)
+    assert reranked == [docs[1]]
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    from langchain_core.documents import Document
+
+    from src.utils.knowledge_base import reciprocal_rank_fusion
+
+    a, b, c = (Document(page_content=name, id=name) for name in "abc")
+    # Ranked by both lists beats ranked first by only one
+    assert reciprocal_rank_fusion([[a, b, c], [b, c]]) == [b, c, a]
+
+@pytest.mark.parametrize("backend", ["hnsw", "sq8"])
+def test_trained_backend_supports_add_and_remove(backend):
+    kb = KnowledgeBase(HashEmbeddings(), index_backend=backend)
+    kb.add_texts("a", "pumps.pdf", ["pump pressure settings", "pump maintenance schedule"])
+    kb.add_texts("b", "fans.docx", ["fan speed control", "fan noise levels"])
+    assert kb.backend == backend
+    assert kb.store.index.ntotal == 4
+
+    assert kb.similarity_search("fan speed", k=1)[0].page_content == "fan speed control"
+
+    kb.remove_document("a")
+    assert kb.store.index.ntotal == 2
+    assert all(kb.source_of(doc) == "fans.docx" for doc in kb.similarity_search("pump pressure", k=3))
+
+class CountingEmbeddings(HashEmbeddings):
+    def __init__(self):
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+def test_removal_from_ivf_does_not_re_embed():
+    embeddings = CountingEmbeddings()
+    kb = KnowledgeBase(embeddings, index_backend="ivf_sq8")
+    for doc_id in "ab":
+        kb.add_texts(doc_id, f"{doc_id}.txt", [f"{doc_id}{i} section {i}" for i in range(1200)])
+    assert kb.backend == "ivf_sq8"
+    embedded = embeddings.embedded
+
+    assert kb.remove_document("a")
+    assert embeddings.embedded == embedded
+    assert kb.backend == "ivf_sq8" and kb.store.index.ntotal == 1200
+    assert all(kb.source_of(doc) == "b.txt" for doc in kb.similarity_search("a7 section 7", k=5))
+
+    # New chunks get ids of their own, after the removed ones
+    kb.add_texts("c", "c.txt", ["pump pressure settings"])
+    assert len(kb.store.index_to_docstore_id) == kb.store.index.ntotal == 1201
+    assert kb.similarity_search("pump pressure settings", k=1)[0].page_content == "pump pressure settings"
+
+def test_optimize_switches_backend(kb):
+    kb.add_texts("a", "pumps.pdf", ["pump pressure settings", "pump maintenance schedule"])
+    assert kb.backend == "flat"
+    assert kb.optimize("hnsw") == "hnsw"
+    assert kb.similarity_search("pump maintenance", k=1)[0].page_content == "pump maintenance schedule"
+
+    rows = kb.index_report(["pump pressure"], backends=["flat", "hnsw"], k=2)
+    assert [row["backend"] for row in rows] == ["flat", "hnsw"]
+
+def test_build_index_keeps_chunk_metadata(kb):
+    index = KnowledgeBase.build_index(
+        "a", ["pump pressure settings"], kb.embeddings, metadatas=[{"page": 3, "heading": "Pumps"}]
+    )
+    kb.add_index("a", "manual.pdf", index)
+    doc = kb.similarity_search("pump", k=1)[0]
+    assert doc.metadata == {"page": 3, "heading": "Pumps", "doc_id": "a", "chunk": 0}
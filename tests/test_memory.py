@@ -0,0 +1,114 @@
+import threading
+
+from src.utils.memory import ConversationMemory, estimate_tokens, is_follow_up
+from src.utils.metrics import registry
+
+def test_messages_keep_turns_in_order():
+    memory = ConversationMemory()
+    memory.add_exchange("Hi, I'm Ada", "Hello Ada!")
+    assert memory.messages() == [
+        {"role": "user", "content": "Hi, I'm Ada"},
+        {"role": "assistant", "content": "Hello Ada!"},
+    ]
+    assert memory.transcript() == "User: Hi, I'm Ada\nAssistant: Hello Ada!"
+
+def test_over_budget_history_is_summarized():
+    calls = []
+
+    def summarize(summary, turns):
+        calls.append((summary, [turn["content"] for turn in turns]))
+        return f"{summary} {len(turns)} turns".strip()
+
+    memory = ConversationMemory(max_tokens=100, summarize=summarize)
+    for i in range(10):
+        memory.add_exchange(f"question {i} " + "x" * 80, f"answer {i} " + "y" * 80)
+        assert memory.token_count <= 100
+
+    assert len(calls) >= 2
+    assert calls[0][0] == ""  # First summary starts from nothing
+    assert calls[1][0] == f"{len(calls[0][1])} turns"  # Later ones extend it
+    history = memory.messages()
+    assert history[0]["role"] == "system"
+    assert history[-1]["content"].startswith("answer 9")
+
+def test_compaction_leaves_room_for_several_turns():
+    calls = []
+    memory = ConversationMemory(max_tokens=200, summarize=lambda summary, turns: calls.append(turns) or "s")
+    for i in range(9):
+        memory.add("user", "z" * 120)  # About 31 tokens each
+    # Compacting down to half the budget means it is not redone on every turn
+    assert len(calls) == 1
+
+def test_without_summarizer_oldest_turns_are_dropped():
+    memory = ConversationMemory(max_tokens=50)
+    for i in range(20):
+        memory.add("user", f"message {i} " + "w" * 40)
+    assert memory.summary == ""
+    assert memory.messages()[-1]["content"].startswith("message 19")
+    assert memory.token_count <= 50
+
+def test_summarizer_failure_keeps_conversation_going():
+    def broken(summary, turns):
+        raise RuntimeError("model unavailable")
+
+    failures = registry.counter_value("assistant_errors_total", stage="summarize", error="RuntimeError")
+    memory = ConversationMemory(max_tokens=50, summarize=broken)
+    for i in range(10):
+        memory.add("user", "v" * 60)
+    assert memory.summary == ""
+    assert len(memory) >= 1
+    assert registry.counter_value("assistant_errors_total", stage="summarize", error="RuntimeError") > failures
+
+def test_fingerprint_and_clear():
+    memory = ConversationMemory()
+    assert memory.fingerprint == ""
+    memory.add("user", "hello")
+    fingerprint = memory.fingerprint
+    memory.add("assistant", "hi")
+    assert memory.fingerprint not in ("", fingerprint)
+    memory.clear()
+    assert memory.fingerprint == "" and len(memory) == 0
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("a" * 400) == 101
+
+def test_is_follow_up():
+    assert is_follow_up("What about its warranty?")
+    assert is_follow_up("Tell me more")
+    assert is_follow_up("and the second step?")
+    assert not is_follow_up("What does error code 42 mean?")
+    assert not is_follow_up("How do I reset the router?")
+
+def test_background_compaction_does_not_block_the_turn():
+    release = threading.Event()
+    calls = []
+
+    def slow_summary(summary, turns):
+        calls.append(len(turns))
+        release.wait(5)
+        return "summary"
+
+    memory = ConversationMemory(max_tokens=100, summarize=slow_summary, background=True)
+    for i in range(4):
+        memory.add("user", f"message {i} " + "x" * 120)
+    # Over budget, but the summary is still being written: the turns stay for now
+    assert len(memory) == 4 and memory.summary == ""
+
+    release.set()
+    memory.wait()
+    assert memory.summary == "summary"
+    assert memory.messages()[-1]["content"].startswith("message 3")
+    assert memory.token_count <= 100
+
+def test_summary_of_a_cleared_conversation_is_discarded():
+    release = threading.Event()
+    memory = ConversationMemory(
+        max_tokens=50, summarize=lambda summary, turns: release.wait(5) and "old", background=True
+    )
+    for i in range(3):
+        memory.add("user", "v" * 120)
+    memory.clear()
+    release.set()
+    memory.wait()
+    assert memory.summary == "" and len(memory) == 0
@@ -0,0 +1,73 @@
+import urllib.request
+
+from benchmarks.fake_ollama import FakeOllama
+from src.models.ollama_client import OllamaClient
+from src.utils import metrics
+from src.utils.metrics import MetricsRegistry
+
+def test_span_records_stage_into_trace_and_histogram():
+    registry = MetricsRegistry()
+    with registry.trace("answer") as trace:
+        with registry.span("retrieve"):
+            pass
+        registry.annotate(response_cache="miss")
+    assert [stage for stage, _ in trace.spans] == ["retrieve"]
+    assert trace.attributes == {"response_cache": "miss"}
+    assert registry.histogram_stats("assistant_stage_seconds", stage="retrieve")[0] == 1
+    assert registry.recent_traces() == [trace]
+
+def test_timed_iter_excludes_consumer_time():
+    registry = MetricsRegistry()
+    for _ in registry.timed_iter("extract", iter(range(3))):
+        registry.observe("consumer", 0.0)
+    count, total = registry.histogram_stats("assistant_stage_seconds", stage="extract")
+    assert count == 1
+    assert total < 0.01
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry()
+    registry.describe("requests_total", "Requests.")
+    registry.inc("requests_total", 2, endpoint="/api/chat")
+    registry.observe("latency_seconds", 0.2, buckets=(0.1, 1.0))
+    registry.gauge("hit_ratio", lambda: 0.5)
+    registry.gauge("broken", lambda: 1 / 0)
+    text = registry.render()
+    assert "# HELP requests_total Requests.\n# TYPE requests_total counter" in text
+    assert 'requests_total{endpoint="/api/chat"} 2' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{le="1"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+    assert "latency_seconds_count 1" in text
+    assert "hit_ratio 0.5" in text
+    assert "broken" not in text
+
+def test_client_captures_ollama_timings():
+    metrics.registry.reset()
+    with FakeOllama(tokens=4, token_latency=0.0) as fake:
+        client = OllamaClient(fake.url)
+        with metrics.registry.trace("answer") as trace:
+            client.generate("hello")
+            list(client.stream_chat("hello"))
+    registry = metrics.registry
+    assert registry.counter_value(
+        "ollama_tokens_total", endpoint="/api/generate", model="gemma3:4b", kind="generated"
+    ) == 4
+    assert registry.histogram_stats("ollama_eval_seconds", endpoint="/api/chat", model="gemma3:4b")[0] == 1
+    assert registry.histogram_stats("ollama_time_to_first_token_seconds", endpoint="/api/chat")[0] == 1
+    assert trace.attributes["generated_tokens"] == 4
+
+def test_client_counts_errors():
+    metrics.registry.reset()
+    with FakeOllama() as fake:
+        client = OllamaClient(fake.url)
+        client.available_models = ["missing"]
+        assert "error" in client.generate("hello", model="missing")
+    assert metrics.registry.counter_value("ollama_errors_total", endpoint="/api/generate") == 1
+
+def test_metrics_server_serves_registry():
+    metrics.registry.inc("scraped_total")
+    server = metrics.start_metrics_server(port=0, host="127.0.0.1")
+    port = server.server_address[1]
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert "scraped_total 1" in response.read().decode()
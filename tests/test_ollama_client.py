@@ -1,8 +1,9 @@
 from unittest.mock import MagicMock, patch
 
 import pytest
+import requests
 
-from src.models.ollama_client import OllamaClient
+from src.models.ollama_client import ModelCatalog, OllamaClient
 
 @pytest.fixture
 def ollama_client():
@@ -13,7 +14,7 @@ def test_initialization(ollama_client):
     assert ollama_client.current_model == "llama2"
     assert isinstance(ollama_client._available_models, list)
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_fetch_available_models(mock_get, ollama_client):
     # Mock successful response
     mock_response = MagicMock()
@@ -79,4 +80,98 @@ def test_generate_response_with_context(mock_post, ollama_client):
     
     call_args = mock_post.call_args[1]['json']
     assert "Test context" in call_args['prompt']
-    assert "Test prompt" in call_args['prompt'] 
\ No newline at end of file
+    assert "Test prompt" in call_args['prompt'] 
+
+@patch('requests.Session.post')
+def test_stream_generate(mock_post, ollama_client):
+    ollama_client.available_models = ["llama2"]
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.iter_lines.return_value = [
+        b'{"response": "Hel", "done": false}',
+        b'',
+        b'{"response": "lo", "done": false}',
+        b'{"response": "", "done": true, "eval_count": 2}',
+    ]
+    mock_post.return_value.__enter__.return_value = mock_response
+
+    chunks = list(ollama_client.stream_generate("Test prompt", model="llama2"))
+    assert "".join(c["response"] for c in chunks) == "Hello"
+    assert chunks[-1]["done"]
+
+    call_kwargs = mock_post.call_args[1]
+    assert call_kwargs['stream']
+    assert call_kwargs['json']['stream']
+
+@patch('requests.Session.post')
+def test_stream_chat_error_status(mock_post, ollama_client):
+    ollama_client.available_models = ["llama2"]
+    mock_response = MagicMock()
+    mock_response.status_code = 500
+    mock_post.return_value.__enter__.return_value = mock_response
+
+    chunks = list(ollama_client.stream_chat("Hi", model="llama2"))
+    assert len(chunks) == 1
+    assert "error" in chunks[0]
+
+def test_stream_unavailable_model(ollama_client):
+    ollama_client.available_models = ["llama2"]
+    chunks = list(ollama_client.stream_generate("Hi", model="missing"))
+    assert "ollama pull missing" in chunks[0]["error"]
+
+@patch('requests.Session.post')
+def test_generate_passes_timeout(mock_post, ollama_client):
+    ollama_client.available_models = ["llama2"]
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"response": "ok"}
+    mock_post.return_value = mock_response
+
+    ollama_client.generate("Hi", model="llama2", timeout=(1, 5))
+    assert mock_post.call_args[1]['timeout'] == (1, 5)
+
+    ollama_client.generate("Hi", model="llama2")
+    assert mock_post.call_args[1]['timeout'] == ollama_client.transport.timeout
+
+@patch('requests.Session.post')
+def test_generate_timeout_error(mock_post, ollama_client):
+    ollama_client.available_models = ["llama2"]
+    mock_post.side_effect = requests.Timeout("read timed out")
+
+    response = ollama_client.generate("Hi", model="llama2")
+    assert "did not respond in time" in response["error"]
+
+@patch('requests.Session.post')
+def test_chat_sends_history_and_keep_alive(mock_post, ollama_client):
+    ollama_client.available_models = ["llama2"]
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"message": {"role": "assistant", "content": "Ada"}}
+    mock_post.return_value = mock_response
+
+    history = [{"role": "user", "content": "I'm Ada"}, {"role": "assistant", "content": "Hi Ada"}]
+    ollama_client.chat("What's my name?", model="llama2", history=history, keep_alive="30m")
+
+    payload = mock_post.call_args[1]['json']
+    assert payload["messages"] == history + [{"role": "user", "content": "What's my name?"}]
+    assert payload["keep_alive"] == "30m"
+
+def test_model_catalog_shared_between_clients():
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return ["llama2", "mistral"]
+
+    catalog = ModelCatalog(fetch)
+    first = OllamaClient(catalog=catalog)
+    second = OllamaClient(catalog=catalog)
+
+    assert fetches == []  # Nothing fetched until the list is needed
+    assert first.get_available_models() == ["llama2", "mistral"]
+    assert second.set_model("mistral")
+    assert first.current_model != second.current_model
+    assert len(fetches) == 1
+
+    first.refresh_models()
+    assert len(fetches) == 2
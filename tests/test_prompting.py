@@ -0,0 +1,42 @@
+from src.utils.prompting import PromptBuilder, split_sentences, strip_overlap
+
+def count_words(text):
+    return len(text.split())
+
+def test_strip_overlap_removes_repeated_prefix():
+    previous = "The pump runs at 40 psi. The filter must be cleaned monthly."
+    text = "The filter must be cleaned monthly. Replace the seal yearly."
+    assert strip_overlap(previous, text) == "Replace the seal yearly."
+    assert strip_overlap("unrelated text here", text) == text
+
+def test_repeated_sentences_are_included_once():
+    builder = PromptBuilder(max_context_tokens=100, count_tokens=count_words)
+    context = builder.compress("filter", [
+        "Error E42 means the filter is clogged. Clean it.",
+        "Clean it. Then restart the pump.",
+    ])
+    assert context == ["Error E42 means the filter is clogged. Clean it.", "Then restart the pump."]
+
+def test_budget_cuts_at_sentence_boundary():
+    builder = PromptBuilder(max_context_tokens=8, count_tokens=count_words)
+    context = builder.compress("pump", ["One two three four. Five six seven eight. Nine ten.", "Never reached."])
+    assert context == ["One two three four. Five six seven eight."]
+
+def test_extract_sentences_keeps_question_terms():
+    builder = PromptBuilder(max_context_tokens=100, extract_sentences=True, count_tokens=count_words)
+    context = builder.compress("What does E42 mean?", [
+        "The manual covers pumps. Error E42 means the filter is clogged. See page 4.",
+        "Warranty terms apply.",
+    ])
+    assert context == ["Error E42 means the filter is clogged.", "Warranty terms apply."]
+
+def test_prompt_has_no_instruction_text():
+    prompt = PromptBuilder().build("What is E42?", ["E42 means clogged."], history="User: hi\nAssistant: hello")
+    assert prompt == (
+        "Conversation so far:\nUser: hi\nAssistant: hello\n\n"
+        "Context:\nE42 means clogged.\n\nQuestion: What is E42?\n\nAnswer:"
+    )
+    assert "ONLY" not in prompt
+
+def test_split_sentences():
+    assert split_sentences("A b. C d?\nE f") == ["A b.", "C d?", "E f"]
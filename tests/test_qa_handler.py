@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+from benchmarks.fake_ollama import FakeOllama
+from benchmarks.run import HashEmbeddings
+from src.models.ollama_client import OllamaClient
+from src.models.scheduler import OllamaScheduler
+from src.utils.qa_handler import CANNOT_ANSWER_MESSAGE, QAHandler
+from src.utils.response_cache import ResponseCache
+
+def make_handler(fake, tmp_path, **kwargs):
+    from src.utils.index_cache import IndexCache
+
+    return QAHandler(
+        base_url=fake.url,
+        ollama_client=kwargs.pop("ollama_client", None) or OllamaClient(fake.url),
+        embeddings=HashEmbeddings(),
+        index_cache=IndexCache(str(tmp_path)),
+        response_cache=kwargs.pop("response_cache", ResponseCache()),
+        token_counter=lambda text: len(text.split()),
+        **kwargs,
+    )
+
+def test_async_responses_from_separate_event_loops(tmp_path):
+    with FakeOllama(tokens=2, token_latency=0) as fake:
+        handler = make_handler(fake, tmp_path)
+        first = asyncio.run(handler.aget_response("hi"))
+        second = asyncio.run(handler.aget_response("hello again"))
+    assert first == second == "token token "
+
+def test_async_responses_respect_the_per_model_limit(tmp_path):
+    scheduler = OllamaScheduler(max_concurrency=1)
+    with FakeOllama(tokens=2, token_latency=0.05) as fake:
+        handler = make_handler(fake, tmp_path, ollama_client=OllamaClient(fake.url, scheduler=scheduler))
+
+        async def ask_all():
+            return await asyncio.gather(*(handler.aget_response(f"question {i}") for i in range(3)))
+
+        started = time.perf_counter()
+        answers = asyncio.run(ask_all())
+        elapsed = time.perf_counter() - started
+    assert answers == ["token token "] * 3
+    # One request at a time: the three answers take three generations' time
+    assert elapsed >= 3 * 2 * 0.05
+    assert scheduler.running() == 0
+
+def test_repeated_questions_hit_the_cache_within_a_conversation(tmp_path):
+    cache = ResponseCache()
+    with FakeOllama(tokens=2, token_latency=0) as fake:
+        handler = make_handler(fake, tmp_path, response_cache=cache)
+        handler.ingest(b"Error code 42 means the disk is full.\n\nError code 7 means the fan failed.", "manual.txt")
+        for _ in range(3):
+            handler.get_response("What does error code 42 mean?")
+        generated = [request for request in fake.requests if "prompt" in request]
+        assert len(generated) == 1
+        assert "Conversation so far" not in generated[0]["prompt"]
+
+        # A follow-up depends on the conversation, so it is answered with it
+        handler.get_response("And what causes it?")
+        assert "Conversation so far" in fake.requests[-1]["prompt"]
+    assert cache.hits == 2
+
+def test_streamed_and_plain_answers_are_cached_alike(tmp_path):
+    with FakeOllama(tokens=2, token_latency=0) as fake:
+        handler = make_handler(fake, tmp_path)
+        handler.ingest(b"Error code 42 means the disk is full.", "manual.txt")
+        streamed = "".join(handler.stream_response("What does error code 42 mean?"))
+        assert streamed.startswith("token token ") and "Sources: manual.txt" in streamed
+        assert handler.get_response("What does error code 42 mean?") == streamed
+
+def test_refusals_are_not_cached(tmp_path):
+    cache = ResponseCache()
+    with FakeOllama(tokens=1, token="I cannot answer this question.", token_latency=0) as fake:
+        handler = make_handler(fake, tmp_path, response_cache=cache)
+        handler.ingest(b"Error code 42 means the disk is full.", "manual.txt")
+        streamed = list(handler.stream_response("Who wrote the manual?"))
+        # Both paths show the same message, and the raw refusal is never streamed
+        assert streamed == [CANNOT_ANSWER_MESSAGE]
+        assert handler.get_response("Who wrote the manual?") == CANNOT_ANSWER_MESSAGE
+        assert cache.hits == 0 and len(cache) == 0
+
+def test_long_answers_are_streamed_once_they_are_not_refusals(tmp_path):
+    with FakeOllama(tokens=40, token_latency=0) as fake:
+        handler = make_handler(fake, tmp_path)
+        handler.ingest(b"Error code 42 means the disk is full.", "manual.txt")
+        pieces = list(handler.stream_response("What does error code 42 mean?"))
+    assert len(pieces) > 2 and pieces[1:-1] == ["token "] * (len(pieces) - 2)
+    assert "".join(pieces) == "token " * 40 + "\n\nSources: manual.txt"
@@ -0,0 +1,51 @@
+import time
+
+from src.utils.response_cache import ResponseCache
+
+def fake_embed(text):
+    # Questions mentioning "pressure" point one way, everything else another
+    return [1.0, 0.1] if "pressure" in text else [0.0, 1.0]
+
+def test_exact_hit_after_normalisation():
+    cache = ResponseCache()
+    cache.put("llama2", "docs", "What is the pump pressure?", "40 psi")
+
+    assert cache.get("llama2", "docs", "  what is the   PUMP pressure ") == "40 psi"
+    assert cache.hits == 1
+    assert cache.misses == 0
+
+def test_scope_includes_model_and_documents():
+    cache = ResponseCache()
+    cache.put("llama2", "docs", "question", "answer")
+
+    assert cache.get("mistral", "docs", "question") is None
+    assert cache.get("llama2", "other-docs", "question") is None
+    assert cache.misses == 2
+
+def test_semantic_hit():
+    cache = ResponseCache(semantic_threshold=0.9, embed=fake_embed)
+    cache.put("llama2", "docs", "What is the pump pressure?", "40 psi")
+
+    assert cache.get("llama2", "docs", "How high is the pressure in the pump") == "40 psi"
+    assert cache.get("llama2", "docs", "How loud is the fan") is None
+    assert cache.get("llama2", "other-docs", "pressure of the pump") is None
+    assert cache.semantic_hits == 1
+    assert cache.hit_ratio == 1 / 3
+
+def test_ttl_expiry():
+    cache = ResponseCache(ttl_seconds=0.01)
+    cache.put("llama2", "docs", "question", "answer")
+    time.sleep(0.02)
+    assert cache.get("llama2", "docs", "question") is None
+    assert len(cache) == 0
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    cache.put("m", "d", "one", "1")
+    cache.put("m", "d", "two", "2")
+    cache.get("m", "d", "one")
+    cache.put("m", "d", "three", "3")
+
+    assert cache.get("m", "d", "two") is None
+    assert cache.get("m", "d", "one") == "1"
+    assert cache.stats()["entries"] == 2
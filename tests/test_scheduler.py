@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.fake_ollama import FakeOllama
+from src.models.ollama_client import OllamaClient
+from src.models.scheduler import BACKGROUND, BUSY_ERROR, INTERACTIVE, OllamaScheduler, SchedulerBusy, request_key
+
+def _run_queued(scheduler, waiters):
+    """Hold the only slot while waiters queue up, then record the order they are served in."""
+    order = []
+    threads = []
+    with scheduler.slot("m"):
+        for session, priority in waiters:
+            def work(session=session, priority=priority):
+                with scheduler.slot("m", session, priority):
+                    order.append((session, priority))
+            thread = threading.Thread(target=work)
+            thread.start()
+            threads.append(thread)
+            while scheduler.queue_depth("m") < len(threads):
+                time.sleep(0.001)
+    for thread in threads:
+        thread.join()
+    return order
+
+def test_interactive_requests_are_served_before_background():
+    scheduler = OllamaScheduler(max_concurrency=1)
+    order = _run_queued(scheduler, [("a", BACKGROUND), ("b", INTERACTIVE), ("c", BACKGROUND)])
+    assert order == [("b", INTERACTIVE), ("a", BACKGROUND), ("c", BACKGROUND)]
+
+def test_sessions_take_turns():
+    scheduler = OllamaScheduler(max_concurrency=1)
+    order = _run_queued(scheduler, [("a", INTERACTIVE)] * 3 + [("b", INTERACTIVE)])
+    assert [session for session, _ in order] == ["a", "b", "a", "a"]
+
+def test_concurrency_is_limited_per_model():
+    scheduler = OllamaScheduler(max_concurrency=1, per_model={"big": 1, "small": 2})
+    with scheduler.slot("small"), scheduler.slot("small"), scheduler.slot("big"):
+        assert scheduler.running() == 3
+    assert scheduler.running() == 0
+
+def test_full_queue_and_timeout_are_rejected():
+    scheduler = OllamaScheduler(max_concurrency=1, max_queue=0)
+    with scheduler.slot("m"):
+        with pytest.raises(SchedulerBusy):
+            with scheduler.slot("m"):
+                pass
+
+    scheduler = OllamaScheduler(max_concurrency=1, queue_timeout=0.01)
+    with scheduler.slot("m"):
+        with pytest.raises(SchedulerBusy):
+            with scheduler.slot("m"):
+                pass
+    assert scheduler.queue_depth("m") == 0
+
+def test_identical_in_flight_requests_are_coalesced():
+    scheduler = OllamaScheduler()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def send():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return {"response": "shared"}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(scheduler.coalesce("key", send)))
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=lambda: results.append(scheduler.coalesce("key", send)))
+    follower.start()
+    time.sleep(0.01)
+    release.set()
+    leader.join()
+    follower.join()
+    assert calls == [1]
+    assert results == [{"response": "shared"}] * 2
+
+def test_request_key_ignores_key_order():
+    assert request_key("/api/generate", {"a": 1, "b": 2}) == request_key("/api/generate", {"b": 2, "a": 1})
+    assert request_key("/api/generate", {"a": 1}) != request_key("/api/chat", {"a": 1})
+
+def test_client_reports_busy_scheduler_as_error():
+    scheduler = OllamaScheduler(max_concurrency=1, max_queue=0)
+    with FakeOllama(tokens=2, token_latency=0.0) as fake:
+        client = OllamaClient(fake.url, scheduler=scheduler)
+        assert "error" not in client.generate("hello")
+        with scheduler.slot("gemma3:4b"):
+            assert client.generate("hello") == {"error": BUSY_ERROR}
+            assert list(client.stream_generate("hello")) == [{"error": BUSY_ERROR}]
+        assert "error" not in list(client.stream_generate("hello"))[-1]
+    assert scheduler.running() == 0
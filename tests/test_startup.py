@@ -0,0 +1,24 @@
+import subprocess
+import sys
+
+from src.utils.startup import StartupTimer
+
+def test_phase_records_duration():
+    timer = StartupTimer()
+    with timer.phase("load"):
+        pass
+    report = timer.report()
+    assert list(report) == ["load"]
+    assert report["load"] >= 0
+
+def test_repeated_phase_keeps_first_duration():
+    timer = StartupTimer()
+    timer.record("first render", 1.5)
+    timer.record("first render", 0.1)
+    assert timer.report() == {"first render": 1.5}
+    assert timer.format_report() == "first render: 1500 ms"
+
+def test_handler_import_leaves_the_document_stack_unloaded():
+    code = "import sys, src.utils.qa_handler; print(sorted(m for m in ('langchain_core', 'torch', 'faiss') if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
@@ -0,0 +1,17 @@
+from src.models.transport import OllamaTransport
+
+def test_transport_pool_and_retry_config():
+    transport = OllamaTransport("http://localhost:11434/", pool_size=4, connect_timeout=1, read_timeout=30, max_retries=3)
+    assert transport.base_url == "http://localhost:11434"
+    assert transport.timeout == (1, 30)
+
+    adapter = transport.session.get_adapter("http://localhost:11434/api/tags")
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 3
+    assert 503 in adapter.max_retries.status_forcelist
+    assert "POST" in adapter.max_retries.allowed_methods
+
+def test_transport_per_call_timeout_override():
+    transport = OllamaTransport(connect_timeout=2, read_timeout=60)
+    assert transport._resolve_timeout(None) == (2, 60)
+    assert transport._resolve_timeout(5) == 5
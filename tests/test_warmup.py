@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from benchmarks.fake_ollama import FakeOllama
+from src.models.ollama_client import OllamaClient
+from src.models.transport import OllamaTransport
+from src.models.warmup import COLD, LOADING, WARM, ModelWarmer, keep_alive_seconds
+from src.utils.metrics import registry
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+def test_keep_alive_seconds():
+    assert keep_alive_seconds("30m") == 1800
+    assert keep_alive_seconds("1h") == 3600
+    assert keep_alive_seconds("90s") == 90
+    assert keep_alive_seconds(45) == 45
+    assert keep_alive_seconds(-1) == float("inf")
+    assert keep_alive_seconds(None) == 300
+    with pytest.raises(ValueError):
+        keep_alive_seconds("soon")
+
+def test_selecting_a_model_preloads_it():
+    with FakeOllama(models=["a", "b"], load_latency=0.2, token_latency=0.0) as fake:
+        warmer = ModelWarmer(OllamaTransport(fake.url), keep_alive="30m")
+        client = OllamaClient(fake.url, warmer=warmer)
+        assert client.model_state("b") == COLD
+
+        assert client.set_model("b")
+        assert client.model_state() == LOADING
+        _wait_for(lambda: fake.requests)
+        assert fake.requests[-1] == {"model": "b", "keep_alive": "30m"}
+        _wait_for(lambda: client.model_state() == WARM)
+        assert warmer.status("b").load_seconds >= 0.2
+
+        # Loaded already, so the first question does not pay for the load
+        started = time.perf_counter()
+        assert "error" not in client.generate("hello", keep_alive="30m")
+        assert time.perf_counter() - started < 0.2
+        assert not warmer.warm("b")
+        warmer.close()
+
+def test_failed_warm_up_leaves_the_model_cold():
+    with FakeOllama(models=["a"]) as fake:
+        warmer = ModelWarmer(OllamaTransport(fake.url))
+        assert warmer.warm("missing")
+        _wait_for(lambda: warmer.status("missing").state == COLD)
+        assert "not available" in warmer.status("missing").error
+        _wait_for(lambda: registry.counter_value("ollama_warmup_errors_total", model="missing", error="not available"))
+        warmer.close()
+
+def test_models_in_use_are_kept_alive():
+    with FakeOllama(models=["a", "b"]) as fake:
+        warmer = ModelWarmer(OllamaTransport(fake.url), keep_alive="30m", interval=0.05, idle_timeout=0.2)
+        warmer.touch("a")
+        _wait_for(lambda: len(fake.requests) >= 2)
+        assert all(request == {"model": "a", "keep_alive": "30m"} for request in fake.requests)
+
+        # Unused for longer than idle_timeout: no more pings
+        time.sleep(0.25)
+        pinged = len(fake.requests)
+        time.sleep(0.15)
+        assert len(fake.requests) == pinged
+        warmer.close()
+
+def test_models_not_heard_of_for_keep_alive_turn_cold():
+    warmer = ModelWarmer(OllamaTransport("http://127.0.0.1:9"), keep_alive=0.05, interval=60)
+    warmer.touch("a")
+    assert warmer.status("a").state == WARM
+    time.sleep(0.06)
+    assert warmer.status("a").state == COLD
+    warmer.close()